@@ -1,31 +1,173 @@
 
 
 
-from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Request, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from typing import List
+from typing import TYPE_CHECKING, Dict, List, Optional
 import uvicorn
+import asyncio
+import importlib
+import logging
 import os
 import shutil
+import time
+from dataclasses import asdict
 from pathlib import Path
-import pandas as pd
 from dotenv import load_dotenv
 
-from utils import process_context_data
-import graphrag.api as api
-from graphrag.config.load_config import load_config
 from config import (
     PROJECT_DIRECTORY,
     COMMUNITY_LEVEL,
     CLAIM_EXTRACTION_ENABLED,
     RESPONSE_TYPE,
+    CLAIMIFY_CONCURRENCY,
+    CLAIMIFY_BATCH_SELECTION,
+    CLAIMIFY_SELECTION_BATCH_SIZE,
+    CLAIMIFY_MAX_BATCH_ITEMS,
+    CLAIMIFY_RESPONSE_FORMAT,
+    CLAIMIFY_FUSED,
+    CLAIM_VERIFY_TOP_K,
+    CLAIM_VERIFY_SUPPORT_THRESHOLD,
+    CLAIM_VERIFY_COVARIATE_THRESHOLD,
+    CLAIM_VERIFY_UNSUPPORTED_THRESHOLD,
+    CLAIM_VERIFY_JUDGE_BATCH_SIZE,
+    CLAIM_VERIFY_MAX_CLAIMS,
+    CLAIMIFY_PREFILTER_ENABLED,
+    CLAIMIFY_PREFILTER_RULES,
+    CLAIMIFY_PREFILTER_MODEL,
+    CLAIMIFY_PREFILTER_THRESHOLD,
+    CLAIMIFY_CACHE_ENABLED,
+    CLAIMIFY_CACHE_DIR,
+    CLAIMIFY_CACHE_MAX_ENTRIES,
+    CLAIMIFY_CACHE_MAX_DISK_ENTRIES,
+    CLAIMIFY_CACHE_TTL_SECONDS,
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_TTL_SECONDS,
+    SEARCH_CACHE_SIMILARITY_THRESHOLD,
+    INDEX_STORE_BACKEND,
+    INDEX_JOB_WORKERS,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MAX_FILE_BYTES,
+    UPLOAD_MAX_TOTAL_BYTES,
+    UPLOAD_SESSION_DIR,
+    UPLOAD_SESSION_TTL_SECONDS,
+    GRAPH_INDEX_ENABLED,
+    VECTOR_STORE_BACKEND,
+    VECTOR_INDEX_TYPE,
+    VECTOR_IVF_LISTS,
+    VECTOR_IVF_NPROBE,
+    VECTOR_IVF_MIN_ROWS,
+    EMBEDDING_SERVICE_ENABLED,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_MAX_DISK_ENTRIES,
+    EMBEDDING_BATCH_WINDOW_SECONDS,
+    EMBEDDING_MAX_BATCH_SIZE,
+    GLOBAL_PREFILTER_ENABLED,
+    GLOBAL_PREFILTER_TOP_K,
+    GLOBAL_PREFILTER_MAX_TOKENS,
+    GLOBAL_PREFILTER_WEIGHTS,
+    GLOBAL_LEVEL_SELECTION,
+    SERVER_TIMING_ENABLED,
+    PROFILER_ENABLED,
+    PROFILER_MAX_SECONDS,
+    LLM_GATEWAY_ENABLED,
+    LLM_MAX_CONNECTIONS,
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_MAX_BACKOFF_SECONDS,
+    LLM_COALESCE_REQUESTS,
+    STARTUP_BACKGROUND_LOAD,
+    STARTUP_READY_TIMEOUT_SECONDS,
 )
 
-from claimify import Claimify
-claimify = Claimify(model="gpt-4o-mini", p=2, f=2)
+from llm_cache import build_llm_cache
+from search_cache import SearchResultCache, index_fingerprint
+import claim_verifier
+import telemetry
+from embeddings import EmbeddingService, register_search_embedders
+import llm_gateway
+from llm_gateway import GatewayChatModel
+from indexing import diff_documents, stage_documents
+from jobs import Job, JobManager
+from uploads import (
+    UploadSessions,
+    UploadTooLarge,
+    commit_staged,
+    discard_staged,
+    safe_name,
+    stage_upload,
+)
+# graphrag and the modules built on it (utils, index_store, graph_index,
+# vector_index, report_ranking) take seconds to import; they are imported where
+# they are used, so uvicorn accepts requests (/status, /ready) while _load runs
+if TYPE_CHECKING:
+    from index_store import IndexSnapshot
+
+claimify_cache = (
+    build_llm_cache(
+        Path(PROJECT_DIRECTORY) / CLAIMIFY_CACHE_DIR,
+        max_entries=CLAIMIFY_CACHE_MAX_ENTRIES,
+        max_disk_entries=CLAIMIFY_CACHE_MAX_DISK_ENTRIES,
+        ttl_seconds=CLAIMIFY_CACHE_TTL_SECONDS,
+    )
+    if CLAIMIFY_CACHE_ENABLED else None
+)
+log = logging.getLogger(__name__)
+
+_claimify = None
+
+def get_claimify():
+    """The shared Claimify instance, created on first use (raises without GRAPHRAG_API_KEY)."""
+    global _claimify
+    if _claimify is None:
+        from claimify import Claimify
+        from claim_prefilter import PreFilter, SentenceClassifier
+        prefilter = None
+        if CLAIMIFY_PREFILTER_ENABLED:
+            prefilter = PreFilter(
+                rules=CLAIMIFY_PREFILTER_RULES,
+                classifier=(
+                    SentenceClassifier.load(Path(PROJECT_DIRECTORY) / CLAIMIFY_PREFILTER_MODEL)
+                    if CLAIMIFY_PREFILTER_MODEL else None
+                ),
+                threshold=CLAIMIFY_PREFILTER_THRESHOLD,
+            )
+        _claimify = Claimify(
+            model="gpt-4o-mini", p=2, f=2,
+            concurrency=CLAIMIFY_CONCURRENCY,
+            cache=claimify_cache,
+            batch_selection=CLAIMIFY_BATCH_SELECTION,
+            selection_batch_size=CLAIMIFY_SELECTION_BATCH_SIZE,
+            prefilter=prefilter,
+            response_format=CLAIMIFY_RESPONSE_FORMAT,
+            fused=CLAIMIFY_FUSED,
+        )
+    return _claimify
+
+_verifier = None
+
+def get_verifier():
+    """The shared ClaimVerifier; its judge uses the local-search chat model. Needs the config loaded."""
+    global _verifier
+    if _verifier is None:
+        config = app.state.config
+        _verifier = claim_verifier.ClaimVerifier(
+            embed=_embed_texts,
+            model=config.get_language_model_config(config.local_search.chat_model_id).model,
+            cache=claimify_cache,
+            top_k=CLAIM_VERIFY_TOP_K,
+            support_threshold=CLAIM_VERIFY_SUPPORT_THRESHOLD,
+            covariate_threshold=CLAIM_VERIFY_COVARIATE_THRESHOLD,
+            unsupported_threshold=CLAIM_VERIFY_UNSUPPORTED_THRESHOLD,
+            judge_batch_size=CLAIM_VERIFY_JUDGE_BATCH_SIZE,
+            concurrency=CLAIMIFY_CONCURRENCY,
+        )
+    return _verifier
 
 load_dotenv(Path(PROJECT_DIRECTORY) / ".env")
 
@@ -33,33 +175,177 @@ load_dotenv(Path(PROJECT_DIRECTORY) / ".env")
 OUTPUT_DIR = Path(PROJECT_DIRECTORY) / "output"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-def load_parquet_safe(path: Path, empty_cols: list[str] | None = None):
-    """
-    Load a parquet file if it exists and is non-empty; otherwise return an
-    empty DataFrame with the supplied columns (or 0-col DF if None).
-    """
-    if path.exists() and path.stat().st_size:
-        return pd.read_parquet(path)
-    return pd.DataFrame(columns=empty_cols or [])
+embedding_cache = (
+    build_llm_cache(
+        Path(PROJECT_DIRECTORY) / EMBEDDING_CACHE_DIR if EMBEDDING_CACHE_DIR else None,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+        max_disk_entries=EMBEDDING_CACHE_MAX_DISK_ENTRIES,
+    )
+    if EMBEDDING_SERVICE_ENABLED else None
+)
+
+def _embedding_service(settings) -> EmbeddingService:
+    """One service (and underlying graphrag model) per embedding model in settings.yaml."""
+    model = None
+
+    async def embed_batch(texts: list[str]) -> list[list[float]]:
+        if LLM_GATEWAY_ENABLED and settings.type in llm_gateway.OPENAI_EMBEDDING_TYPES:
+            res = await llm_gateway.shared().embed(model=settings.model, input=texts)
+            return [d.embedding for d in sorted(res.data, key=lambda d: d.index)]
+        # created on first use, on the service's loop
+        nonlocal model
+        if model is None:
+            from graphrag.language_model.factory import ModelFactory
+            model = ModelFactory.create_embedding_model(settings.type, name="api_embedding_service", config=settings)
+        return await model.aembed_batch(texts)
+
+    return EmbeddingService(
+        embed_batch,
+        model=settings.model,
+        cache=embedding_cache,
+        window_seconds=EMBEDDING_BATCH_WINDOW_SECONDS,
+        max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
+    )
+
+async def _embed_texts(texts: List[str]) -> List[list]:
+    """Embed texts with the local-search embedding model from settings.yaml, in batched requests."""
+    config = app.state.config
+    service = app.state.embedding_services.get(config.local_search.embedding_model_id)
+    if service is not None:
+        return [v.tolist() for v in await service.aembed_many(texts)]
+    model = config.get_language_model_config(config.local_search.embedding_model_id)
+    vectors = []
+    for i in range(0, len(texts), EMBEDDING_MAX_BATCH_SIZE):
+        res = await llm_gateway.shared().embed(model=model.model, input=list(texts[i:i + EMBEDDING_MAX_BATCH_SIZE]))
+        vectors.extend(d.embedding for d in res.data)
+    return vectors
+
+async def _embed_query(text: str) -> list[float]:
+    """Embed a query with the local-search embedding model from settings.yaml."""
+    return (await _embed_texts([text]))[0]
+
+def _chat_model(name: str, settings):
+    """Search chat model: OpenAI models go through the shared LLM gateway."""
+    if LLM_GATEWAY_ENABLED and settings.type in llm_gateway.OPENAI_CHAT_TYPES:
+        return GatewayChatModel(llm_gateway.shared(), settings)
+    from graphrag.language_model.factory import ModelFactory
+    return ModelFactory.create_chat_model(settings.type, name=name, config=settings)
+
+search_cache = (
+    SearchResultCache(
+        max_entries=SEARCH_CACHE_MAX_ENTRIES,
+        ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+        embed=_embed_query if SEARCH_CACHE_SIMILARITY_THRESHOLD is not None else None,
+        similarity_threshold=SEARCH_CACHE_SIMILARITY_THRESHOLD,
+    )
+    if SEARCH_CACHE_ENABLED else None
+)
+
+def index_changed() -> None:
+    """Call whenever the output folder changes so no stale search result is served."""
+    if search_cache is not None:
+        search_cache.invalidate()
+
+# serialises /reload and /clear/output; searches never wait on it
+_reload_lock = asyncio.Lock()
 
 # ---------- lifespan -------------------------------------------------------- #
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    app.state.config = load_config(Path(PROJECT_DIRECTORY))
+def _setup_models(config) -> None:
+    """Vector store, LLM gateway, chat and embedding models for the loaded settings.yaml."""
+    if VECTOR_STORE_BACKEND == "numpy":
+        import vector_index
+        vector_index.use_numpy_store(
+            config,
+            index_type=VECTOR_INDEX_TYPE,
+            nprobe=VECTOR_IVF_NPROBE,
+            ivf_lists=VECTOR_IVF_LISTS,
+            ivf_min_rows=VECTOR_IVF_MIN_ROWS,
+        )
+    llm_gateway.configure(
+        config,
+        max_connections=LLM_MAX_CONNECTIONS,
+        timeout=LLM_TIMEOUT_SECONDS,
+        max_retries=LLM_MAX_RETRIES,
+        max_backoff_seconds=LLM_MAX_BACKOFF_SECONDS,
+        coalesce=LLM_COALESCE_REQUESTS,
+    )
+    telemetry.register_traced_chat_models(config, _chat_model)
+    app.state.embedding_services = (
+        register_search_embedders(config, _embedding_service)
+        if EMBEDDING_SERVICE_ENABLED else {}
+    )
 
-    app.state.entities           = load_parquet_safe(OUTPUT_DIR / "entities.parquet")
-    app.state.communities        = load_parquet_safe(OUTPUT_DIR / "communities.parquet")
-    app.state.community_reports  = load_parquet_safe(OUTPUT_DIR / "community_reports.parquet")
-    app.state.text_units         = load_parquet_safe(OUTPUT_DIR / "text_units.parquet")
-    app.state.relationships      = load_parquet_safe(OUTPUT_DIR / "relationships.parquet")
+async def _load_index():
+    """The tables in OUTPUT_DIR as one IndexSnapshot (index_store.py)."""
+    from index_store import load_snapshot
+    return await load_snapshot(
+        OUTPUT_DIR, include_covariates=CLAIM_EXTRACTION_ENABLED, backend=INDEX_STORE_BACKEND
+    )
 
-    # covariates are optional
-    cov_path = OUTPUT_DIR / "covariates.parquet"
-    app.state.covariates = (
-        load_parquet_safe(cov_path) if CLAIM_EXTRACTION_ENABLED else None
+async def _load(app: FastAPI) -> None:
+    """Config, models and index tables; app.state.ready is set once they are loaded."""
+    timings = app.state.startup
+    try:
+        t0 = time.perf_counter()
+        from graphrag.config.load_config import load_config
+        app.state.config = await asyncio.to_thread(load_config, Path(PROJECT_DIRECTORY))
+        await asyncio.to_thread(_setup_models, app.state.config)
+        timings["models"] = round(time.perf_counter() - t0, 3)
+
+        # all tables live in one immutable snapshot, swapped as a whole by /reload
+        t0 = time.perf_counter()
+        app.state.index = await _load_index()
+        index_changed()
+        timings["index"] = round(time.perf_counter() - t0, 3)
+    except Exception as e:
+        app.state.startup_error = f"{type(e).__name__}: {e}"
+        log.exception("Startup failed")
+        return
+    app.state.ready.set()
+
+    # graphrag.api pulls in the whole indexing pipeline (numba, umap, ...), so it is
+    # imported here rather than at module level; only global and basic search need it
+    t0 = time.perf_counter()
+    try:
+        await asyncio.to_thread(importlib.import_module, "graphrag.api")
+        timings["graphrag_api"] = round(time.perf_counter() - t0, 3)
+    except Exception:
+        log.exception("Importing graphrag.api failed")
+
+async def require_ready() -> None:
+    """Wait for startup to finish (up to STARTUP_READY_TIMEOUT_SECONDS), else 503."""
+    if app.state.ready.is_set():
+        return
+    if app.state.startup_error is None:
+        try:
+            await asyncio.wait_for(app.state.ready.wait(), STARTUP_READY_TIMEOUT_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            pass
+    raise HTTPException(
+        status_code=503,
+        detail=app.state.startup_error or "Index is still loading",
+        headers={"Retry-After": "5"},
     )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = asyncio.Event()
+    app.state.startup = {}
+    app.state.startup_error = None
+    app.state.embedding_services = {}
+    if STARTUP_BACKGROUND_LOAD:
+        loading = asyncio.create_task(_load(app))
+    else:
+        await _load(app)
+
     yield
+    if STARTUP_BACKGROUND_LOAD:
+        loading.cancel()
+    job_manager.shutdown()
+    for service in app.state.embedding_services.values():
+        service.close()
+    llm_gateway.shared().close()
 # --------------------------------------------------------------------------- #
 
 app = FastAPI(lifespan=lifespan)
@@ -79,18 +365,20 @@ app.add_middleware(
 
 # ─────────────── General utility routes ──────────────── #
 # api.py  (add this route; upload route stays as-is)
-@app.post("/reload")
+@app.post("/reload", dependencies=[Depends(require_ready)])
 async def reload_data(request: Request):
-    request.app.state.entities          = load_parquet_safe(OUTPUT_DIR / "entities.parquet")
-    request.app.state.relationships     = load_parquet_safe(OUTPUT_DIR / "relationships.parquet")
-    request.app.state.documents         = load_parquet_safe(OUTPUT_DIR / "documents.parquet")
-    request.app.state.text_units        = load_parquet_safe(OUTPUT_DIR / "text_units.parquet")
-    request.app.state.communities       = load_parquet_safe(OUTPUT_DIR / "communities.parquet")
-    request.app.state.community_reports = load_parquet_safe(OUTPUT_DIR / "community_reports.parquet")
-    if CLAIM_EXTRACTION_ENABLED:
-        request.app.state.covariates    = load_parquet_safe(OUTPUT_DIR / "covariates.parquet")
+    async with _reload_lock:
+        t0 = time.perf_counter()
+        snapshot = await _load_index()
+        # single reference swap: in-flight searches keep the snapshot they started with
+        request.app.state.index = snapshot
+        index_changed()
 
-    return JSONResponse(content={"status": "Server data reloaded"})
+    return JSONResponse(content={
+        "status": "Server data reloaded",
+        **snapshot.summary(),
+        "total_seconds": round(time.perf_counter() - t0, 4),
+    })
 
 @app.get("/check/settings")
 async def check_settings():
@@ -155,53 +443,731 @@ async def check_output():
 #     return JSONResponse(content={"status": "Output directory cleared and server state reset"})
 
 
-# helper: return blank DF with same columns, or really empty if df is None
-def _blank(df):
-    import pandas as pd
-    return df.iloc[0:0] if df is not None else pd.DataFrame()
-
-@app.post("/clear/output")
+@app.post("/clear/output", dependencies=[Depends(require_ready)])
 async def clear_output(request: Request):
     if not OUTPUT_DIR.exists():
         return JSONResponse({"status": "No output directory found."})
 
-    # 1️⃣ wipe folder
-    for p in OUTPUT_DIR.iterdir():
-        p.unlink() if p.is_file() or p.is_symlink() else shutil.rmtree(p)
-
-    # 2️⃣ reset backend tables safely
-    s = request.app.state
-    for name in [
-        "entities",
-        "relationships",
-        "documents",
-        "text_units",
-        "communities",
-        "community_reports",
-        "covariates",
-    ]:
-        # if attribute exists use blank-copy; else create empty DF
-        old = getattr(s, name, None)
-        setattr(s, name, _blank(old))
+    from index_store import empty_snapshot
+    async with _reload_lock:
+        # 1️⃣ wipe folder
+        for p in OUTPUT_DIR.iterdir():
+            p.unlink() if p.is_file() or p.is_symlink() else shutil.rmtree(p)
+
+        # 2️⃣ swap in empty tables (same columns as before)
+        request.app.state.index = empty_snapshot(
+            request.app.state.index, fingerprint=index_fingerprint(OUTPUT_DIR)
+        )
+        index_changed()
 
     return JSONResponse({"status": "Output folder cleared; backend tables reset"})
 
 # ─────────────── Upload endpoint ──────────────── #
+upload_sessions = UploadSessions(
+    Path(PROJECT_DIRECTORY) / UPLOAD_SESSION_DIR,
+    max_bytes=UPLOAD_MAX_FILE_BYTES,
+    ttl_seconds=UPLOAD_SESSION_TTL_SECONDS,
+)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Per-request trace (telemetry.py), request metrics and the Server-Timing header."""
+    trace = telemetry.start_trace()
+    telemetry.IN_FLIGHT.inc()
+
+    def finish(status: int) -> None:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        telemetry.IN_FLIGHT.dec()
+        telemetry.REQUESTS.inc(method=request.method, route=route, status=str(status))
+        telemetry.REQUEST_SECONDS.observe(time.perf_counter() - trace.start, route=route)
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        finish(500)
+        raise
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = trace.server_timing(time.perf_counter() - trace.start)
+
+    # a streamed body is still being produced here; count the request once it
+    # is sent, or abandoned because the client went away before or during it
+    async def send_tracked(scope, receive, send):
+        try:
+            await response(scope, receive, send)
+        finally:
+            finish(response.status_code)
+
+    return send_tracked
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject an oversized upload from its Content-Length, before the body is read."""
+    length = request.headers.get("content-length")
+    if request.url.path.startswith("/upload") and UPLOAD_MAX_TOTAL_BYTES is not None \
+            and length and length.isdigit() and int(length) > UPLOAD_MAX_TOTAL_BYTES:
+        return JSONResponse(status_code=413, content={"detail": f"Upload exceeds {UPLOAD_MAX_TOTAL_BYTES} bytes"})
+    return await call_next(request)
+
 @app.post("/upload/new_file")
-async def upload_new_file(files: List[UploadFile] = File(...)):
-    uploaded = []
+async def upload_new_file(request: Request, files: List[UploadFile] = File(...)):
+    """
+    Stream files into the output folder in UPLOAD_CHUNK_SIZE chunks; nothing is
+    renamed into place unless every file is within the size limits.
+    """
+    staged, budget = [], UPLOAD_MAX_TOTAL_BYTES
+    try:
+        for fil in files:
+            f = await stage_upload(fil, OUTPUT_DIR, UPLOAD_CHUNK_SIZE, UPLOAD_MAX_FILE_BYTES, budget)
+            staged.append(f)
+            if budget is not None:
+                budget -= f.size
+    except UploadTooLarge as e:
+        discard_staged(staged)
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        discard_staged(staged)
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        discard_staged(staged)
+        raise
+
+    results = await asyncio.to_thread(commit_staged, staged)
+    if any(r["status"] == "stored" for r in results):
+        index_changed()
+    return JSONResponse(content={
+        "status": "Files uploaded successfully",
+        "files": [r["file"] for r in results],
+        "details": results,
+    })
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+
+def _get_session(session_id: str):
+    session = upload_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown upload session")
+    return session
+
+@app.post("/upload/sessions")
+async def create_upload_session(payload: UploadSessionRequest):
+    """Start a resumable upload; send the bytes with PUT /upload/sessions/{id}?offset=N."""
+    try:
+        session = upload_sessions.create(payload.filename, payload.size, payload.sha256)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(status_code=201, content=session.public())
+
+@app.get("/upload/sessions/{session_id}")
+async def upload_session_status(session_id: str):
+    """`offset` is where the next PUT must start (resume point after a failure)."""
+    return JSONResponse(content=_get_session(session_id).public())
+
+@app.put("/upload/sessions/{session_id}")
+async def upload_session_append(session_id: str, request: Request, offset: int = Query(0, ge=0)):
+    _get_session(session_id)
+    try:
+        session = await upload_sessions.append(session_id, offset, request.stream(), UPLOAD_CHUNK_SIZE)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown upload session")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        current = _get_session(session_id).offset
+        return JSONResponse(status_code=409, content={"detail": str(e), "offset": current})
+    return JSONResponse(content=session.public())
+
+@app.post("/upload/sessions/{session_id}/complete")
+async def upload_session_complete(session_id: str):
+    try:
+        result = await upload_sessions.complete(session_id, OUTPUT_DIR)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown upload session")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if result["status"] == "stored":
+        index_changed()
+    return JSONResponse(content=result)
+
+@app.delete("/upload/sessions/{session_id}")
+async def upload_session_abort(session_id: str):
+    if not upload_sessions.abort(session_id):
+        raise HTTPException(status_code=404, detail="Unknown upload session")
+    return JSONResponse(content={"status": "Upload session aborted"})
+
+# ─────────────── Indexing jobs ──────────────── #
+async def _reload_after_job(job: Job) -> None:
+    """Swap in the freshly built index once an indexing job succeeds."""
+    async with _reload_lock:
+        app.state.index = await _load_index()
+        index_changed()
+    job.result = {**(job.result or {}), "index": app.state.index.summary()}
+
+job_manager = JobManager(PROJECT_DIRECTORY, max_workers=INDEX_JOB_WORKERS, on_success=_reload_after_job)
+
+class IndexJobRequest(BaseModel):
+    method: str = "standard"   # or "fast"
+    update: bool = False       # incremental update run instead of a full build
+
+@app.post("/jobs")
+async def submit_job(payload: IndexJobRequest):
+    """Run graphrag build_index against PROJECT_DIRECTORY in a worker process."""
+    if payload.method not in ("standard", "fast"):
+        raise HTTPException(status_code=400, detail="method must be 'standard' or 'fast'")
+    job = job_manager.submit_index(method=payload.method, is_update_run=payload.update)
+    return JSONResponse(status_code=202, content=job.public())
+
+@app.get("/jobs")
+async def list_jobs():
+    return JSONResponse(content=[job.public() for job in job_manager.list()])
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return JSONResponse(content=job.public())
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """SSE stream of workflow progress and LLM-call counts (replays history first)."""
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    from utils import sse_event
+
+    async def events():
+        async for event in job_manager.follow(job_id):
+            yield sse_event(event["type"], event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    if not await job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job not found or already finished")
+    return JSONResponse(content=job_manager.get(job_id).public())
+
+def _read_documents(files: List[UploadFile], encoding: str) -> Dict[str, str]:
+    """title -> text of the uploaded input documents (on a worker thread)."""
+    uploads = {}
     for fil in files:
-        dest = OUTPUT_DIR / fil.filename
-        dest.write_bytes(await fil.read())
-        uploaded.append(fil.filename)
-    return JSONResponse(content={"status": "Files uploaded successfully", "files": uploaded})
+        title = safe_name(fil.filename)
+        fil.file.seek(0)
+        try:
+            uploads[title] = fil.file.read().decode(encoding)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"{title}: not valid {encoding} text ({e.reason})")
+    return uploads
+
+@app.post("/index/update", dependencies=[Depends(require_ready)])
+async def index_update(files: List[UploadFile] = File(...)):
+    """
+    Add new or changed input documents and index only those. Unchanged files
+    (same content hash as in documents.parquet) are skipped; the update runs
+    as an indexing job (see /jobs) and swaps in the merged index when it finishes.
+    """
+    config = app.state.config
+    try:
+        uploads = await asyncio.to_thread(_read_documents, files, config.input.encoding)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    delta = diff_documents(uploads, app.state.index.documents)
+    if delta.empty:
+        return JSONResponse(content={
+            "status": "No new or changed documents",
+            "unchanged": delta.unchanged,
+        })
+
+    staged = await asyncio.to_thread(
+        stage_documents,
+        delta,
+        Path(PROJECT_DIRECTORY) / config.input.base_dir,
+        config.input.file_pattern,
+        config.input.encoding,
+    )
+    if not staged["staged"]:
+        return JSONResponse(status_code=400, content={
+            "status": "No document matches the input file_pattern in settings.yaml",
+            **staged,
+        })
+
+    job = job_manager.submit_index(
+        is_update_run=True,
+        extra={
+            "new": list(delta.new),
+            "changed": list(delta.changed),
+            "unchanged": delta.unchanged,
+            **staged,
+        },
+    )
+    return JSONResponse(status_code=202, content=job.public())
+
+@app.get("/index/update/{job_id}")
+async def index_update_status(job_id: str):
+    return await job_status(job_id)
+
+# ─────────────── Search endpoints ──────────────── #
+async def _prefilter_reports(query: str, s: "IndexSnapshot"):
+    """The community reports global search should map over for this query (report_ranking.py)."""
+    import report_ranking
+    index = await asyncio.to_thread(
+        report_ranking.report_index, s, app.state.config, COMMUNITY_LEVEL,
+        use_embeddings=bool(GLOBAL_PREFILTER_WEIGHTS.get("semantic")),
+    )
+    query_vector = None
+    if index.vectors is not None:
+        try:
+            query_vector = await _embed_query(query)
+        except Exception:
+            pass  # embedding service unavailable: keyword and rank only
+    selection = index.select(
+        query, query_vector,
+        top_k=GLOBAL_PREFILTER_TOP_K,
+        max_tokens=GLOBAL_PREFILTER_MAX_TOKENS,
+        weights=GLOBAL_PREFILTER_WEIGHTS,
+        level_selection=GLOBAL_LEVEL_SELECTION,
+    )
+    reports = s.community_reports
+    return reports[reports["community"].astype(int).isin(selection.communities)]
+
+async def _search_args(method: str, query: str, s: "IndexSnapshot") -> dict:
+    """Keyword arguments shared by api.<method>_search and api.<method>_search_streaming."""
+    config = app.state.config
+    if method in INDEXED_METHODS:
+        import graph_index
+        # graph_index variants: objects and context builder are built once per snapshot
+        data = await asyncio.to_thread(graph_index.prepare, s, config, COMMUNITY_LEVEL, method)
+        return dict(config=config, data=data, graph=s.graph, response_type=RESPONSE_TYPE, query=query)
+    if method == "global":
+        dynamic = GLOBAL_LEVEL_SELECTION == "dynamic"
+        return dict(
+            config=config,
+            entities=s.entities,
+            communities=s.communities,
+            community_reports=(
+                await _prefilter_reports(query, s)
+                if GLOBAL_PREFILTER_ENABLED and not dynamic else s.community_reports
+            ),
+            community_level=COMMUNITY_LEVEL,
+            dynamic_community_selection=dynamic,
+            response_type=RESPONSE_TYPE,
+            query=query,
+        )
+    if method == "local":
+        return dict(
+            config=config,
+            entities=s.entities,
+            communities=s.communities,
+            community_reports=s.community_reports,
+            text_units=s.text_units,
+            relationships=s.relationships,
+            covariates=s.covariates,
+            community_level=COMMUNITY_LEVEL,
+            response_type=RESPONSE_TYPE,
+            query=query,
+        )
+    if method == "drift":
+        return dict(
+            config=config,
+            entities=s.entities,
+            communities=s.communities,
+            community_reports=s.community_reports,
+            text_units=s.text_units,
+            relationships=s.relationships,
+            community_level=COMMUNITY_LEVEL,
+            response_type=RESPONSE_TYPE,
+            query=query,
+        )
+    if method == "basic":
+        return dict(config=config, text_units=s.text_units, query=query)
+    raise ValueError(f"Unknown search method: {method}")
+
+INDEXED_METHODS = ("local", "drift") if GRAPH_INDEX_ENABLED else ()
+
+async def search_functions(method: str) -> tuple:
+    """(search, search_streaming) for a method."""
+    # normally already imported by _load; a request arriving earlier waits for
+    # the import on a worker thread instead of blocking the event loop
+    name = "graph_index" if method in INDEXED_METHODS else "graphrag.api"
+    module = await asyncio.to_thread(importlib.import_module, name)
+    return getattr(module, f"{method}_search"), getattr(module, f"{method}_search_streaming")
+
+def _cache_scope(method: str, s: "IndexSnapshot") -> dict:
+    """Everything besides the query that a cached search result depends on."""
+    if method == "basic":
+        return dict(community_level=None, response_type=None, fingerprint=s.fingerprint)
+    return dict(
+        community_level=COMMUNITY_LEVEL,
+        response_type=RESPONSE_TYPE,
+        fingerprint=s.fingerprint,
+    )
+
+class ContextOptions(BaseModel):
+    include: bool = True
+    format: str = "records"
+    columns: Optional[List[str]] = None
+
+    def apply(self, result: dict) -> dict:
+        return result if self.include else {k: v for k, v in result.items() if k != "context_data"}
+
+def context_options(
+    include_context: bool = Query(True, description="Set to false to leave context_data out"),
+    context_format: str = Query("records", description="records (list of rows) or columns (column -> values)"),
+    context_columns: Optional[str] = Query(None, description="Comma-separated columns to keep in every context table"),
+) -> ContextOptions:
+    from utils import CONTEXT_FORMATS
+    if context_format not in CONTEXT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"context_format must be one of {CONTEXT_FORMATS}")
+    columns = [c.strip() for c in context_columns.split(",") if c.strip()] if context_columns else None
+    return ContextOptions(include=include_context, format=context_format, columns=columns)
+
+async def _search(method: str, query: str, opts: ContextOptions) -> Response:
+    await require_ready()
+    from utils import SearchStatsCallback, SpanCallbacks, encode_json, search_response
+    snapshot = app.state.index  # pin the tables for the whole request
+    result = None
+    if search_cache is not None:
+        with telemetry.span("search_cache"):
+            cached = await search_cache.get(method, query, **_cache_scope(method, snapshot))
+        if cached is not None:
+            result = {**cached, "cached": True}
+
+    if result is None:
+        search, _ = await search_functions(method)
+        stats = SearchStatsCallback(telemetry.track_llm_usage())
+        try:
+            response, context = await search(
+                **await _search_args(method, query, snapshot), callbacks=[stats, SpanCallbacks()]
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        # context_data stays as DataFrames (also in the cache); it is encoded
+        # column-wise below in whatever shape this request asked for
+        result = search_response(response, context, stats)
+        if search_cache is not None:
+            await search_cache.set(method, query, result, **_cache_scope(method, snapshot))
+
+    with telemetry.span("serialize"):
+        content = encode_json(opts.apply(result), opts.format, opts.columns)
+    return Response(content=content, media_type="application/json")
+
+async def _search_stream(method: str, query: str, opts: ContextOptions) -> StreamingResponse:
+    """
+    Server-Sent-Events stream: one `token` event per chunk as the answer is
+    generated, then a trailing `metadata` event with context_data,
+    completion_time, llm_calls and prompt_tokens (or an `error` event).
+    A cached result is replayed as a single token event.
+    """
+    await require_ready()
+    from utils import SearchStatsCallback, SpanCallbacks, sse_event
+    snapshot = app.state.index  # pin the tables for the whole stream
+
+    async def events():
+        if search_cache is not None:
+            with telemetry.span("search_cache"):
+                cached = await search_cache.get(method, query, **_cache_scope(method, snapshot))
+            if cached is not None:
+                meta = {k: v for k, v in cached.items() if k != "response"}
+                yield sse_event("token", {"token": cached["response"]})
+                yield sse_event("metadata", opts.apply({**meta, "cached": True}), opts.format, opts.columns)
+                return
+
+        stats = SearchStatsCallback(telemetry.track_llm_usage())
+        response = ""
+        try:
+            _, search_streaming = await search_functions(method)
+            async for chunk in search_streaming(
+                **await _search_args(method, query, snapshot), callbacks=[stats, SpanCallbacks()]
+            ):
+                stats.mark_token()
+                response += chunk
+                yield sse_event("token", {"token": chunk})
+            meta = {"context_data": stats.context, **stats.metadata()}
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+
+        if search_cache is not None:
+            await search_cache.set(method, query, {"response": response, **meta}, **_cache_scope(method, snapshot))
+        with telemetry.span("serialize"):
+            event = sse_event("metadata", opts.apply(meta), opts.format, opts.columns)
+        yield event
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/search/cache/stats", dependencies=[Depends(require_ready)])
+async def search_cache_stats():
+    if search_cache is None:
+        return JSONResponse(content={"status": "Search cache disabled"})
+    return JSONResponse(content={**search_cache.stats(), "index_fingerprint": app.state.index.fingerprint})
+
+@app.post("/search/cache/clear")
+async def search_cache_clear():
+    if search_cache is not None:
+        search_cache.invalidate()
+    return JSONResponse(content={"status": "Search cache cleared"})
+
+@app.get("/embeddings/stats")
+async def embedding_stats():
+    services = getattr(app.state, "embedding_services", {})
+    if not services:
+        return JSONResponse(content={"status": "Embedding service disabled"})
+    return JSONResponse(content={model_id: s.stats() for model_id, s in services.items()})
 
-# ─────────────── Search endpoints (unchanged) ──────────────── #
-# ... (global_search, local_search, drift_search, basic_search remain identical)
+@app.get("/llm/stats")
+async def llm_stats():
+    return JSONResponse(content=llm_gateway.shared().stats())
+
+@app.get("/search/global")
+async def global_search(
+    query: str = Query(..., description="Search query for global context"),
+    opts: ContextOptions = Depends(context_options),
+):
+    return await _search("global", query, opts)
+
+@app.get("/search/global/stream")
+async def global_search_stream(
+    query: str = Query(..., description="Search query for global context"),
+    opts: ContextOptions = Depends(context_options),
+):
+    return await _search_stream("global", query, opts)
+
+@app.get("/search/local")
+async def local_search(
+    query: str = Query(..., description="Search query for local context"),
+    opts: ContextOptions = Depends(context_options),
+):
+    return await _search("local", query, opts)
+
+@app.get("/search/local/stream")
+async def local_search_stream(
+    query: str = Query(..., description="Search query for local context"),
+    opts: ContextOptions = Depends(context_options),
+):
+    return await _search_stream("local", query, opts)
+
+@app.get("/search/drift")
+async def drift_search(
+    query: str = Query(..., description="Search query for DRIFT context"),
+    opts: ContextOptions = Depends(context_options),
+):
+    return await _search("drift", query, opts)
+
+@app.get("/search/drift/stream")
+async def drift_search_stream(
+    query: str = Query(..., description="Search query for DRIFT context"),
+    opts: ContextOptions = Depends(context_options),
+):
+    return await _search_stream("drift", query, opts)
+
+@app.get("/search/basic")
+async def basic_search(
+    query: str = Query(..., description="Search query for basic search"),
+    opts: ContextOptions = Depends(context_options),
+):
+    return await _search("basic", query, opts)
+
+@app.get("/search/basic/stream")
+async def basic_search_stream(
+    query: str = Query(..., description="Search query for basic search"),
+    opts: ContextOptions = Depends(context_options),
+):
+    return await _search_stream("basic", query, opts)
+
+@app.get("/claimify/cache/stats")
+async def claimify_cache_stats():
+    if claimify_cache is None:
+        return JSONResponse(content={"status": "Claimify cache disabled"})
+    return JSONResponse(content=claimify_cache.stats())
+
+@app.get("/claimify/prefilter/stats")
+async def claimify_prefilter_stats():
+    if not CLAIMIFY_PREFILTER_ENABLED:
+        return JSONResponse(content={"status": "Claimify pre-filter disabled"})
+    if _claimify is None:
+        return JSONResponse(content={"sentences": 0, "rejected": 0, "by_reason": {}})
+    return JSONResponse(content=_claimify.prefilter.stats())
+
+# ─────────────── Claim extraction ──────────────── #
+class ClaimItem(BaseModel):
+    question: str
+    answer: str
+
+class ClaimsRequest(BaseModel):
+    items: List[ClaimItem]
+    fused: Optional[bool] = None  # one Disambiguation+Decomposition call per sentence; None = CLAIMIFY_FUSED
+
+CLAIM_STATS = ("sentences", "prefiltered", "llm_calls_saved", "llm_calls", "cache_hits", "prompt_tokens",
+               "completion_tokens", "parse_retries", "parse_failures")
+
+def _claims_batch(payload: ClaimsRequest):
+    if not payload.items:
+        raise HTTPException(status_code=400, detail="items must not be empty")
+    if len(payload.items) > CLAIMIFY_MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {CLAIMIFY_MAX_BATCH_ITEMS} items per request")
+    try:
+        claimify = get_claimify()
+    except EnvironmentError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return claimify.extract_many([(item.question, item.answer) for item in payload.items], fused=payload.fused)
+
+def _claims_totals(results: List[dict], t0: float) -> dict:
+    return {
+        "items": len(results),
+        "claims": sum(len(r["claims"]) for r in results),
+        "errors": sum(1 for r in results if r["error"] is not None),
+        **{k: sum(r[k] for r in results) for k in CLAIM_STATS},
+        "completion_time": round(time.perf_counter() - t0, 3),
+    }
+
+@app.post("/claims/extract")
+async def claims_extract(payload: ClaimsRequest):
+    """
+    Claims of a batch of (question, answer) pairs, in request order, each with
+    its LLM calls, cache hits and tokens. The sentences of all items share
+    Claimify's CLAIMIFY_CONCURRENCY slots.
+    """
+    t0 = time.perf_counter()
+    results = [r.public() async for r in _claims_batch(payload)]
+    results.sort(key=lambda r: r["index"])
+    return JSONResponse(content={"items": results, "totals": _claims_totals(results, t0)})
+
+@app.post("/claims/extract/stream")
+async def claims_extract_stream(payload: ClaimsRequest):
+    """
+    Server-Sent-Events variant of /claims/extract: one `claims` event per item
+    as soon as it is finished (completion order, see its `index`), then a
+    `done` event with the totals.
+    """
+    from utils import sse_event
+    t0 = time.perf_counter()
+    batch = _claims_batch(payload)
+
+    async def events():
+        results = []
+        async for r in batch:
+            results.append(r.public())
+            yield sse_event("claims", results[-1])
+        yield sse_event("done", _claims_totals(results, t0))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ─────────────── Claim verification ──────────────── #
+class VerifyRequest(BaseModel):
+    claims: List[str]
+    judge: bool = True            # send claims retrieval cannot decide to the LLM judge
+    top_k: Optional[int] = None   # evidence per kind and claim; None = CLAIM_VERIFY_TOP_K
+
+def _text_unit_vectors(ids: List[str]):
+    """Stored text_unit.text vectors of `ids`, the whole table read once (blocking)."""
+    from graphrag.config.embeddings import text_unit_text_embedding
+    import vector_index
+    return vector_index.read_vectors(app.state.config, text_unit_text_embedding, ids)
+
+@app.post("/claims/verify", dependencies=[Depends(require_ready)])
+async def claims_verify(payload: VerifyRequest):
+    """
+    Verdict per claim (supported, refuted, unsupported, or unverified without
+    the judge) with the text units and covariates it was checked against.
+    All claims are embedded in one batch and matched against the index's
+    embeddings; only the ambiguous ones cost an LLM call (claim_verifier.py).
+    """
+    if not payload.claims:
+        raise HTTPException(status_code=400, detail="claims must not be empty")
+    if len(payload.claims) > CLAIM_VERIFY_MAX_CLAIMS:
+        raise HTTPException(status_code=413, detail=f"At most {CLAIM_VERIFY_MAX_CLAIMS} claims per request")
+    snapshot = app.state.index  # pin the tables for the whole request
+    try:
+        index = await claim_verifier.evidence_index(snapshot, _embed_texts, _text_unit_vectors)
+        results, stats = await get_verifier().verify(payload.claims, index, judge=payload.judge, top_k=payload.top_k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    verdicts = {v: sum(1 for r in results if r.verdict == v) for v in claim_verifier.VERDICTS}
+    return JSONResponse(content={
+        "claims": [r.public() for r in results],
+        "totals": {**asdict(stats), "verdicts": verdicts},
+    })
+
+@app.get("/claims/verify/stats")
+async def claims_verify_stats():
+    if _verifier is None:
+        return JSONResponse(content={"claims": 0, "by_method_and_verdict": {}})
+    return JSONResponse(content=_verifier.stats())
+
+# ─────────────── Observability ──────────────── #
+_started_at = time.time()
+
+def _mirror_cache_counters() -> None:
+    """Copy the hit/miss counters the caches keep themselves into /metrics."""
+    caches = {}
+    if search_cache is not None:
+        st = search_cache.stats()
+        caches["search"] = (st["hits"], st["misses"])
+    if claimify_cache is not None:
+        st = claimify_cache.stats()
+        caches["claimify"] = (st["hits"], st["misses"])
+    for service in getattr(app.state, "embedding_services", {}).values():
+        st = service.stats()
+        caches[f"embedding:{st['model']}"] = (st["cache_hits"] + st["deduplicated"], st["embedded"])
+    for cache, (hits, misses) in caches.items():
+        telemetry.CACHE_EVENTS.set(hits, cache=cache, result="hit")
+        telemetry.CACHE_EVENTS.set(misses, cache=cache, result="miss")
+
+telemetry.registry.on_collect(_mirror_cache_counters)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(telemetry.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile")
+async def debug_profile(
+    seconds: float = Query(5.0, gt=0, description="How long to sample"),
+    interval: float = Query(0.005, gt=0, description="Seconds between samples"),
+):
+    """Sample the stacks of all threads; collapsed-stack text for speedscope / flamegraph.pl."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled (PROFILER_ENABLED in config.py)")
+    seconds = min(seconds, PROFILER_MAX_SECONDS)
+    return PlainTextResponse(await asyncio.to_thread(telemetry.sample_stacks, seconds, interval))
 
 @app.get("/status")
 async def status():
-    return JSONResponse(content={"status": "Server is up and running"})
+    index = getattr(app.state, "index", None)
+    return JSONResponse(content={
+        "status": "Server is up and running",
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - _started_at, 1),
+        "requests_in_flight": telemetry.IN_FLIGHT.value() - 1,  # minus this one
+        "ready": app.state.ready.is_set(),
+        "index_fingerprint": index.fingerprint if index is not None else None,
+        "jobs_running": sum(1 for j in job_manager.list() if j.status == "running"),
+    })
+
+@app.get("/ready")
+async def ready(warm: bool = Query(False, description="Also require graphrag.api (global / basic search) to be imported")):
+    """Readiness probe: 200 once the models and index tables are loaded, 503 until then."""
+    is_ready = app.state.ready.is_set() and (not warm or "graphrag_api" in app.state.startup)
+    content = {"ready": is_ready, "startup_seconds": app.state.startup, "error": app.state.startup_error}
+    if is_ready:
+        content["index"] = app.state.index.summary()
+    return JSONResponse(status_code=200 if is_ready else 503, content=content)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,111 @@
+"""
+Startup time and memory of the index store backends.
+
+Starts N worker processes per backend (like `uvicorn --workers N`), lets each
+one build an IndexSnapshot the way api.py does, and reports load time and
+memory while all of them are alive. RssAnon is memory private to a worker;
+RssFile is file-backed pages (the memory-mapped Arrow files), which the OS
+shares between workers through the page cache.
+
+    python benchmarks/bench_index_store.py --workers 4 --scale 50
+
+--scale replicates every table K times into a temp folder so the effect is
+visible on the small sample index in indexbox/output.
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from index_store import TABLES, load_snapshot  # noqa: E402
+
+
+def rss_kb() -> dict:
+    fields = {}
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0])
+    return fields
+
+
+def scaled_copy(src: Path, scale: int) -> Path:
+    import pandas as pd
+
+    dst = Path(tempfile.mkdtemp(prefix="bench_index_"))
+    for name in TABLES:
+        path = src / f"{name}.parquet"
+        if not path.exists():
+            continue
+        df = pd.read_parquet(path)
+        pd.concat([df] * scale, ignore_index=True).to_parquet(dst / path.name)
+    return dst
+
+
+def worker(output_dir: str, backend: str, results, done) -> None:
+    t0 = time.perf_counter()
+    snapshot = asyncio.run(load_snapshot(Path(output_dir), backend=backend))
+    seconds = time.perf_counter() - t0
+    # read every text column once, like the first queries would
+    for name in ("entities", "text_units", "community_reports"):
+        df = getattr(snapshot, name)
+        for col in df.select_dtypes(include=["object", "string"]).columns:
+            df[col].str.len().sum()
+    results.put({"seconds": seconds, **rss_kb()})
+    done.wait()
+
+
+def run(output_dir: Path, backend: str, workers: int) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    results, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=worker, args=(str(output_dir), backend, results, done)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", default=str(ROOT / "indexbox" / "output"))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    if args.scale > 1:
+        output_dir = scaled_copy(output_dir, args.scale)
+
+    try:
+        # first arrow run converts parquet -> arrow; measure that separately
+        t0 = time.perf_counter()
+        asyncio.run(load_snapshot(output_dir, backend="arrow"))
+        print(f"one-off parquet -> arrow conversion: {time.perf_counter() - t0:.3f}s\n")
+
+        print(f"{'backend':<8} {'workers':>7} {'load p50 s':>10} {'RssAnon/worker MB':>18} "
+              f"{'RssFile/worker MB':>18} {'sum RssAnon MB':>15}")
+        for backend in ("pandas", "arrow"):
+            rows = run(output_dir, backend, args.workers)
+            secs = sorted(r["seconds"] for r in rows)
+            anon = [r["RssAnon"] / 1024 for r in rows]
+            file_ = [r["RssFile"] / 1024 for r in rows]
+            print(f"{backend:<8} {args.workers:>7} {secs[len(secs) // 2]:>10.3f} "
+                  f"{sum(anon) / len(anon):>18.1f} {sum(file_) / len(file_):>18.1f} {sum(anon):>15.1f}")
+    finally:
+        if args.scale > 1:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Search response serialization: recursive converter vs column-wise encoder.
+
+Builds a local-search style context_data (entities, relationships, reports,
+sources tables) from the sample index, scaled to --rows rows per table, and
+times turning the whole result into response bytes:
+
+    current   process_context_data (to_dict records) + JSONResponse.render
+    records   utils.encode_json(..., "records")
+    columns   utils.encode_json(..., "columns")
+    no ctx    encode_json without context_data (include_context=false)
+
+    python benchmarks/bench_serialization.py --rows 500 --repeat 50
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import utils  # noqa: E402
+from utils import encode_json, process_context_data  # noqa: E402
+
+
+def sample(df: pd.DataFrame, rows: int) -> pd.DataFrame:
+    if df.empty:
+        return df
+    return pd.concat([df] * (rows // len(df) + 1), ignore_index=True).head(rows)
+
+
+def build_context(output_dir: Path, rows: int) -> dict:
+    """Same column layout as graphrag's local search context tables."""
+    entities = pd.read_parquet(output_dir / "entities.parquet")
+    relationships = pd.read_parquet(output_dir / "relationships.parquet")
+    reports = pd.read_parquet(output_dir / "community_reports.parquet")
+    text_units = pd.read_parquet(output_dir / "text_units.parquet")
+
+    ents = sample(entities, rows)
+    rels = sample(relationships, rows)
+    reps = sample(reports, rows)
+    srcs = sample(text_units, rows)
+    return {
+        "entities": pd.DataFrame({
+            "id": ents["human_readable_id"].astype(str),
+            "entity": ents["title"],
+            "description": ents["description"],
+            "number of relationships": ents["degree"],
+            "in_context": True,
+        }),
+        "relationships": pd.DataFrame({
+            "id": rels["human_readable_id"].astype(str),
+            "source": rels["source"],
+            "target": rels["target"],
+            "description": rels["description"],
+            "weight": rels["weight"],
+            "links": rels["combined_degree"],
+            "in_context": True,
+        }),
+        "reports": pd.DataFrame({
+            "id": reps["human_readable_id"].astype(str),
+            "title": reps["title"],
+            "content": reps["full_content"],
+        }),
+        "sources": pd.DataFrame({
+            "id": srcs["human_readable_id"].astype(str),
+            "text": srcs["text"],
+        }),
+    }
+
+
+def timeit(fn, repeat: int) -> tuple[float, int]:
+    fn()  # warm-up
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - t0)
+    return best, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", default=str(ROOT / "indexbox" / "output"))
+    parser.add_argument("--rows", type=int, default=500, help="rows per context table")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    context = build_context(Path(args.output_dir), args.rows)
+    result = {
+        "response": "x" * 2000,
+        "context_data": context,
+        "completion_time": 1.0,
+        "llm_calls": 1,
+        "prompt_tokens": 12000,
+    }
+
+    cases = {
+        "current": lambda: JSONResponse(content={
+            **result, "context_data": process_context_data(result["context_data"])
+        }).body,
+        "records": lambda: encode_json(result, "records"),
+        "columns": lambda: encode_json(result, "columns"),
+        "no ctx": lambda: encode_json({k: v for k, v in result.items() if k != "context_data"}),
+    }
+
+    print(f"rows/table={args.rows}  orjson={'yes' if utils.orjson is not None else 'no (pandas/json fallback)'}\n")
+    print(f"{'path':<8} {'best ms':>9} {'speedup':>8} {'bytes':>11}")
+    baseline = None
+    for name, fn in cases.items():
+        seconds, size = timeit(fn, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:<8} {seconds * 1000:>9.2f} {baseline / seconds:>7.1f}x {size:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Claimify sentence splitting: split_text + _context_window vs SentenceTable.
+
+Generates --answers long multi-paragraph answers and times the splitting
+Claimify does per answer: split it, then look up the context window of every
+sentence --lookups times (Selection and Disambiguation each ask for it):
+
+    current   paragraph_split + sentence_split, then the old
+              Claimify._context_window (a list join per lookup)
+    table     split_answer (offset spans, windows built in one pass), cold
+    memo      split_answer again for the same answers (memoized)
+    batch     split_many over all answers at once, cold
+
+Each path is checked to produce the same sentences and windows. The
+tokenizer is nltk punkt when punkt_tab is installed, else the regex fallback.
+
+    python benchmarks/bench_splitter.py --answers 200 --paragraphs 8 --sentences 12
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import splitter  # noqa: E402
+from splitter import paragraph_split, sentence_split, split_answer, split_many  # noqa: E402
+
+WORDS = (
+    "the community network report describes key entities relationships between organisations "
+    "people events and locations with evidence drawn from several sources in the dataset"
+).split()
+TAILS = [".", ".", ".", "!", "?", ". Ok.", " (see Dr. Smith).", ' "quoted."', " at 3.5 m."]
+
+
+def make_answer(rng: random.Random, paragraphs: int, sentences: int) -> str:
+    paras = []
+    for _ in range(paragraphs):
+        sents = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + rng.choice(TAILS)
+            for _ in range(sentences)
+        ]
+        paras.append(" ".join(sents))
+    return "\n\n".join(paras)
+
+
+def old_context_window(sents: list, idx: int, p: int, f: int) -> str:
+    start, end = max(0, idx - p), min(len(sents), idx + f + 1)
+    return " ".join(sents[start:idx] + sents[idx + 1:end])
+
+
+def current(answers: list, p: int, f: int, lookups: int) -> list:
+    out = []
+    for answer in answers:
+        sents = [s for para in paragraph_split(answer) for s in sentence_split(para)]
+        for _ in range(lookups):
+            windows = [old_context_window(sents, i, p, f) for i in range(len(sents))]
+        out.append((sents, windows))
+    return out
+
+
+def windows(tables, p: int, f: int, lookups: int) -> list:
+    out = []
+    for t in tables:
+        for _ in range(lookups):
+            w = [t.windows(p, f)[i] for i in range(len(t))]
+        out.append((list(t.sentences), w))
+    return out
+
+
+def table(answers: list, p: int, f: int, lookups: int) -> list:
+    return windows(map(split_answer, answers), p, f, lookups)
+
+
+def batch(answers: list, p: int, f: int, lookups: int) -> list:
+    return windows(split_many(answers, p, f), p, f, lookups)
+
+
+def timeit(fn, repeat: int, cold: bool) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            split_answer.cache_clear()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=8, help="paragraphs per answer")
+    parser.add_argument("--sentences", type=int, default=12, help="sentences per paragraph")
+    parser.add_argument("-p", type=int, default=2, help="sentences before, as Claimify(p=...)")
+    parser.add_argument("-f", type=int, default=2, help="sentences after, as Claimify(f=...)")
+    parser.add_argument("--lookups", type=int, default=2, help="window lookups per sentence")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    answers = [make_answer(rng, args.paragraphs, args.sentences) for _ in range(args.answers)]
+    p, f, k = args.p, args.f, args.lookups
+
+    expected = current(answers, p, f, k)
+    split_answer.cache_clear()
+    same = table(answers, p, f, k) == expected and batch(answers, p, f, k) == expected
+
+    cases = {
+        "current": (lambda: current(answers, p, f, k), False),
+        "table": (lambda: table(answers, p, f, k), True),
+        "memo": (lambda: table(answers, p, f, k), False),
+        "batch": (lambda: batch(answers, p, f, k), True),
+    }
+    table(answers, p, f, k)  # fill the memo for "memo"
+
+    n_sents = sum(len(s) for s, _ in expected)
+    chars = sum(map(len, answers))
+    print(f"answers={args.answers} sentences={n_sents:,} chars={chars:,} p={p} f={f} "
+          f"tokenizer={'punkt' if splitter._punkt() is not None else 'regex'} same output={'yes' if same else 'NO'}\n")
+    print(f"{'path':<8} {'best ms':>9} {'us/answer':>10} {'speedup':>8}")
+    baseline = None
+    for name, (fn, cold) in cases.items():
+        seconds = timeit(fn, args.repeat, cold)
+        baseline = baseline or seconds
+        print(f"{name:<8} {seconds * 1000:>9.2f} {seconds / args.answers * 1e6:>10.1f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
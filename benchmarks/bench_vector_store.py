@@ -0,0 +1,138 @@
+"""
+Vector search: graphrag's LanceDB store vs vector_index.NumpyVectorStore.
+
+Takes the default-entity-description embeddings from the sample index,
+scales them to --rows rows (copies with small gaussian noise, so there are
+near-duplicates as in a real entity table), writes them to a temporary
+LanceDB table and times top-k queries (perturbed rows of the table):
+
+    lancedb       graphrag LanceDBVectorStore.similarity_search_by_vector
+    numpy exact   NumpyVectorStore, one query at a time
+    numpy batch   NumpyVectorStore.search_batch, all queries at once (per query)
+    ivf nprobe=N  NumpyVectorStore with index_type="ivf"
+
+recall@k is measured against the exact numpy results (which rank like LanceDB).
+
+    python benchmarks/bench_vector_store.py --rows 20000 --queries 50
+"""
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from graphrag.vector_stores.lancedb import LanceDBVectorStore  # noqa: E402
+
+import vector_index  # noqa: E402
+from vector_index import NumpyVectorStore, read_lance_table, vector_matrix  # noqa: E402
+
+TABLE = "default-entity-description"
+
+
+def scaled_table(source: pa.Table, rows: int, noise: float, seed: int) -> pa.Table:
+    base = vector_matrix(source["vector"])
+    rng = np.random.default_rng(seed)
+    picks = np.arange(rows) % len(base)
+    vectors = base[picks] + rng.normal(0, noise, (rows, base.shape[1])).astype(np.float32)
+    text = source["text"].to_pylist()
+    return pa.table({
+        "id": [f"e{i}" for i in range(rows)],
+        "text": [text[i] for i in picks],
+        "vector": pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), base.shape[1]),
+        "attributes": ['{"title": "e%d"}' % i for i in range(rows)],
+    })
+
+
+def timed(fn, queries) -> tuple[float, list]:
+    fn(queries[0])  # warm-up
+    times, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append([r.document.id for r in fn(q)])
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), results
+
+
+def recall(results, truth, k: int) -> float:
+    return float(np.mean([len(set(r) & set(t)) / k for r, t in zip(results, truth)]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lancedb", default=str(ROOT / "reserve" / "indexbox" / "output" / "lancedb"))
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default 4 * sqrt(rows))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    source = read_lance_table(Path(args.lancedb), TABLE)
+    if source is None:
+        sys.exit(f"{TABLE} not found under {args.lancedb}")
+    table = scaled_table(source, args.rows, args.noise, seed=0)
+    dim = table.schema.field("vector").type.list_size
+
+    rng = np.random.default_rng(1)
+    queries = vector_matrix(table["vector"])[rng.choice(args.rows, args.queries, replace=False)]
+    queries = (queries + rng.normal(0, args.noise, queries.shape).astype(np.float32)).tolist()
+
+    db = Path(tempfile.mkdtemp(prefix="bench_vectors_"))
+    try:
+        lancedb.connect(str(db)).create_table(TABLE, data=table)
+        print(f"table={TABLE} rows={args.rows:,} dim={dim} queries={args.queries} k={args.k}\n")
+
+        lance = LanceDBVectorStore(collection_name=TABLE)
+        lance.connect(db_uri=str(db))
+
+        t0 = time.perf_counter()
+        exact = NumpyVectorStore(collection_name=TABLE)
+        exact.connect(db_uri=str(db))
+        print(f"numpy conversion: {time.perf_counter() - t0:.2f}s")
+        t0 = time.perf_counter()
+        ivf = NumpyVectorStore(collection_name=TABLE, index_type="ivf", ivf_lists=args.nlist)
+        ivf.connect(db_uri=str(db))
+        print(f"ivf build ({ivf.document_collection.nlist} lists): {time.perf_counter() - t0:.2f}s")
+        vector_index._open_indexes.clear()
+        t0 = time.perf_counter()
+        exact.connect(db_uri=str(db))
+        print(f"reopen from disk: {(time.perf_counter() - t0) * 1000:.1f} ms\n")
+
+        _, truth = timed(lambda q: exact.similarity_search_by_vector(q, args.k), queries)
+        cases = {
+            "lancedb": lambda q: lance.similarity_search_by_vector(q, args.k),
+            "numpy exact": lambda q: exact.similarity_search_by_vector(q, args.k),
+        }
+        for nprobe in args.nprobe:
+            cases[f"ivf nprobe={nprobe}"] = (
+                lambda q, p=nprobe: (setattr(ivf, "nprobe", p), ivf.similarity_search_by_vector(q, args.k))[1]
+            )
+
+        print(f"{'path':<16} {'p50 ms':>9} {'speedup':>8} {f'recall@{args.k}':>10}")
+        baseline = None
+        for name, fn in cases.items():
+            seconds, results = timed(fn, queries)
+            baseline = baseline or seconds
+            print(f"{name:<16} {seconds * 1000:>9.2f} {baseline / seconds:>7.1f}x {recall(results, truth, args.k):>10.3f}")
+
+        t0 = time.perf_counter()
+        batch = exact.search_batch(queries, args.k)
+        per_query = (time.perf_counter() - t0) / len(queries)
+        ids = [[r.document.id for r in res] for res in batch]
+        print(f"{'numpy batch':<16} {per_query * 1000:>9.2f} {baseline / per_query:>7.1f}x {recall(ids, truth, args.k):>10.3f}")
+    finally:
+        shutil.rmtree(db, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
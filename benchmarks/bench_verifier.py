@@ -0,0 +1,127 @@
+"""
+Claim verification cost: ClaimVerifier vs one embedding and one LLM call per claim.
+
+Builds a synthetic EvidenceIndex (--units text units, --covariates covariates,
+random unit vectors of --dim) and a claim set in which --decided of the claims
+are near-copies of an evidence row (decided by retrieval) and the rest are
+ambiguous (sent to the judge). Embedding and chat requests go to in-process
+fakes that count them, so no server is needed. For each claim count it reports
+
+    retrieval ms   vectorized top-k (one matrix product per block) vs a
+                   per-claim loop over the same matrices
+    embed calls    embedding requests (fake batch size --embed-batch)
+    llm calls      judge requests, vs one per claim when every claim goes to
+                   the LLM
+
+    python benchmarks/bench_verifier.py --claims 10 100 1000 --units 20000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from claim_verifier import ClaimVerifier, EvidenceIndex, top_k, _unit  # noqa: E402
+
+
+class FakeEmbed:
+    """Vectors looked up per text; counts requests of at most `batch` texts."""
+
+    def __init__(self, vectors: dict, dim: int, batch: int):
+        self.vectors, self.dim, self.batch, self.calls = vectors, dim, batch, 0
+
+    async def __call__(self, texts):
+        self.calls += -(-len(texts) // self.batch)
+        return [self.vectors.get(t, np.ones(self.dim, dtype=np.float32)) for t in texts]
+
+
+class FakeGateway:
+    def __init__(self):
+        self.calls = 0
+
+    async def chat(self, messages, **params):
+        self.calls += 1
+        ids = [int(line[1:-1]) for line in messages[-1]["content"].splitlines() if line[:1] == "[" and line[-1:] == "]"]
+        content = json.dumps({"verdicts": [{"id": i, "verdict": "unsupported"} for i in ids]})
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_index(rng: np.random.Generator, units: int, covariates: int, dim: int) -> EvidenceIndex:
+    unit_vectors = _unit(rng.standard_normal((units, dim)).astype(np.float32))
+    cov_vectors = _unit(rng.standard_normal((covariates, dim)).astype(np.float32))
+    text_units = pd.DataFrame({"id": [f"u{i}" for i in range(units)], "human_readable_id": np.arange(units),
+                               "text": [f"unit {i}" for i in range(units)]})
+    covs = pd.DataFrame({"id": [f"c{i}" for i in range(covariates)], "human_readable_id": np.arange(covariates),
+                         "subject_id": "NONE", "description": [f"covariate {i}" for i in range(covariates)],
+                         "status": "TRUE"})
+    return EvidenceIndex(text_units, unit_vectors, covs, cov_vectors)
+
+
+def make_claims(rng: np.random.Generator, index: EvidenceIndex, n: int, decided: float) -> dict:
+    """claim text -> vector; `decided` of them close to a text unit (cosine ~0.95)."""
+    claims = {}
+    for i in range(n):
+        if rng.random() < decided:
+            base = index.unit_vectors[rng.integers(len(index.unit_vectors))]
+            v = base + 0.3 * _unit(rng.standard_normal((1, base.shape[0])).astype(np.float32))[0]
+        else:
+            # between the thresholds: part of a unit plus noise (cosine ~0.55)
+            base = index.unit_vectors[rng.integers(len(index.unit_vectors))]
+            v = base + 1.5 * _unit(rng.standard_normal((1, base.shape[0])).astype(np.float32))[0]
+        # no digits: the verifier checks that a claim's numbers appear in its evidence
+        claims["claim " + "".join(chr(97 + int(d)) for d in str(i))] = _unit(v[None, :])[0]
+    return claims
+
+
+def per_claim_retrieval(index: EvidenceIndex, vectors: np.ndarray, k: int) -> None:
+    for v in vectors:
+        top_k(v[None, :], index.unit_vectors, k)
+        top_k(v[None, :], index.covariate_vectors, k)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--units", type=int, default=20000)
+    parser.add_argument("--covariates", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--decided", type=float, default=0.8, help="share of claims retrieval decides")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--embed-batch", type=int, default=64, help="as EMBEDDING_MAX_BATCH_SIZE")
+    parser.add_argument("--judge-batch", type=int, default=10, help="as CLAIM_VERIFY_JUDGE_BATCH_SIZE")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    index = make_index(rng, args.units, args.covariates, args.dim)
+    print(f"units={args.units:,} covariates={args.covariates:,} dim={args.dim} decided~{args.decided:.0%}\n")
+    print(f"{'claims':>7} {'vector ms':>10} {'loop ms':>9} {'embed calls':>12} {'per claim':>10} "
+          f"{'llm calls':>10} {'per claim':>10} {'judged':>7}")
+    for n in args.claims:
+        claims = make_claims(rng, index, n, args.decided)
+        vectors = np.stack(list(claims.values()))
+
+        t0 = time.perf_counter()
+        index.search(vectors, args.top_k)
+        vector_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        per_claim_retrieval(index, vectors, args.top_k)
+        loop_ms = (time.perf_counter() - t0) * 1000
+
+        embed, gateway = FakeEmbed(claims, args.dim, args.embed_batch), FakeGateway()
+        verifier = ClaimVerifier(embed, gateway=gateway, top_k=args.top_k, judge_batch_size=args.judge_batch)
+        _, stats = asyncio.run(verifier.verify(list(claims), index))
+        print(f"{n:>7} {vector_ms:>10.1f} {loop_ms:>9.1f} {embed.calls:>12} {n:>10} "
+              f"{gateway.calls:>10} {n:>10} {stats.judged:>7}")
+
+
+if __name__ == "__main__":
+    main()
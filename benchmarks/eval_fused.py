@@ -0,0 +1,195 @@
+"""
+Claimify fused Disambiguation+Decomposition vs the three-call chain.
+
+Extracts the claims of every {"question", "answer"} line of --answers in two
+modes, without the response cache:
+
+    chain    Selection -> Disambiguation -> Decomposition (two calls per
+             selected sentence after Selection)
+    fused    Selection -> DISAMBIGUATION_DECOMPOSITION (one call)
+
+After one warm-up extract per mode (so neither pays the gateway's cold start),
+each mode runs --repeats times, alternating which one goes first. Per mode it
+reports the median and minimum wall time of the whole set, p50/p95 per answer
+over all runs, and per run the LLM calls, prompt and completion tokens and
+the number of claims. Claim overlap compares each answer's fused claims with
+its chain claims (first run of each): a pair matches when the Jaccard
+similarity of their word sets is at least --match (greedy, one-to-one);
+precision = matched / fused claims, recall = matched / chain claims, exact =
+identical claims after normalising case and spacing.
+
+    python benchmarks/eval_fused.py                       # OPENAI_BASE_URL / GRAPHRAG_API_KEY
+    python benchmarks/eval_fused.py --mock --latency 0.3  # against benchmarks/mock_llm.py
+    python benchmarks/eval_fused.py --response-format none --show
+
+Both modes run Selection the same way, so the difference is the
+Disambiguation/Decomposition stage. Run it on answers with a real model to
+judge claim quality; the mock only shows the call and latency savings. Against
+mock_llm.py (--latency 0.2, --repeats 4) the fused mode made 76 calls per run
+instead of 114, with a median wall time of 2.21 s against 3.25 s for the chain
+(about 1.5x).
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_WORD = re.compile(r"\w+")
+
+
+def words(claim: str) -> frozenset:
+    return frozenset(w.lower() for w in _WORD.findall(claim))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def matches(fused: list, chain: list, threshold: float) -> list:
+    """Greedy one-to-one (fused index, chain index, similarity) pairs, best first."""
+    fw, cw = [words(c) for c in fused], [words(c) for c in chain]
+    pairs = sorted(((jaccard(a, b), i, j) for i, a in enumerate(fw) for j, b in enumerate(cw)), reverse=True)
+    used_f, used_c, out = set(), set(), []
+    for sim, i, j in pairs:
+        if sim < threshold:
+            break
+        if i not in used_f and j not in used_c:
+            used_f.add(i)
+            used_c.add(j)
+            out.append((i, j, sim))
+    return out
+
+
+def normalise(claim: str) -> str:
+    return " ".join(claim.lower().split()).rstrip(".")
+
+
+async def run(claimify, items: list, repeats: int) -> dict:
+    """
+    mode -> [(Extractions in item order, wall seconds)] per repeat. One warm-up
+    extract per mode first (gateway thread, HTTP pool), then the modes run one
+    after the other, alternating which goes first.
+    """
+    for fused in (False, True):
+        [_ async for _ in claimify.extract_many(items[:1], fused=fused)]
+    runs = {"chain": [], "fused": []}
+    for r in range(repeats):
+        for mode in (("chain", "fused") if r % 2 == 0 else ("fused", "chain")):
+            t0 = time.perf_counter()
+            results = [x async for x in claimify.extract_many(items, fused=mode == "fused")]
+            runs[mode].append((sorted(results, key=lambda x: x.index), time.perf_counter() - t0))
+    return runs
+
+
+def start_mock(args) -> subprocess.Popen:
+    proc = subprocess.Popen([
+        sys.executable, str(ROOT / "benchmarks" / "mock_llm.py"), "--port", str(args.mock_port),
+        "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+    ], cwd=ROOT)
+    url = f"http://127.0.0.1:{args.mock_port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"mock_llm.py exited with {proc.returncode}")
+        try:
+            urllib.request.urlopen(f"{url}/stats", timeout=1)
+            break
+        except OSError:
+            time.sleep(0.2)
+    os.environ.setdefault("GRAPHRAG_API_KEY", "mock-key")
+    os.environ["OPENAI_BASE_URL"] = f"{url}/v1"
+    return proc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", default=str(ROOT / "benchmarks" / "data" / "claimify_answers.jsonl"))
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--concurrency", type=int, default=8, help="as CLAIMIFY_CONCURRENCY")
+    parser.add_argument("--batch-selection", action="store_true", help="as CLAIMIFY_BATCH_SELECTION")
+    parser.add_argument("--response-format", default="json_schema", choices=["json_schema", "json_object", "none"])
+    parser.add_argument("--no-prefilter", action="store_true")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per mode, alternating the order")
+    parser.add_argument("--match", type=float, default=0.6, help="Jaccard similarity for two claims to match")
+    parser.add_argument("--show", action="store_true", help="list the claims of each answer side by side")
+    parser.add_argument("--mock", action="store_true", help="start benchmarks/mock_llm.py and use it")
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2, help="mock: seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="mock: generation rate, 0 = instant")
+    args = parser.parse_args()
+
+    mock = start_mock(args) if args.mock else None
+    try:
+        from claim_prefilter import PreFilter
+        from claimify import Claimify
+
+        with open(args.answers, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        items = [(r["question"], r["answer"]) for r in rows]
+        claimify = Claimify(
+            model=args.model, concurrency=args.concurrency, batch_selection=args.batch_selection,
+            prefilter=None if args.no_prefilter else PreFilter(),
+            response_format=None if args.response_format == "none" else args.response_format,
+        )
+        runs = asyncio.run(run(claimify, items, max(1, args.repeats)))
+    finally:
+        if mock is not None:
+            mock.terminate()
+            mock.wait(timeout=10)
+
+    print(f"{len(items)} answers x {args.repeats} runs per mode (after a warm-up), model={args.model} "
+          f"concurrency={args.concurrency} response_format={args.response_format} "
+          f"batch_selection={args.batch_selection}\n")
+    cols = ["mode", "median s", "min s", "p50 s", "p95 s", "llm calls", "prompt tok", "compl tok", "claims", "errors"]
+    print("".join(f"{c:>11}" for c in cols))
+    for mode, mode_runs in runs.items():
+        walls = [seconds for _, seconds in mode_runs]
+        results = [r for run_results, _ in mode_runs for r in run_results]
+        per_item = np.array([r.stats.seconds for r in results])
+        n = len(mode_runs)
+        row = [mode, f"{np.median(walls):.2f}", f"{min(walls):.2f}",
+               f"{np.percentile(per_item, 50):.2f}", f"{np.percentile(per_item, 95):.2f}",
+               sum(r.stats.llm_calls for r in results) // n, sum(r.stats.prompt_tokens for r in results) // n,
+               sum(r.stats.completion_tokens for r in results) // n, sum(len(r.claims) for r in results) // n,
+               sum(r.error is not None for r in results)]
+        print("".join(f"{v:>11}" for v in row))
+
+    # claim overlap of the first run of each mode
+    chain_results, fused_results = runs["chain"][0][0], runs["fused"][0][0]
+    matched = exact = n_fused = n_chain = 0
+    for chain, fused in zip(chain_results, fused_results):
+        matched += len(matches(fused.claims, chain.claims, args.match))
+        exact += len({normalise(c) for c in fused.claims} & {normalise(c) for c in chain.claims})
+        n_fused += len(fused.claims)
+        n_chain += len(chain.claims)
+    print(f"\nclaim overlap (Jaccard >= {args.match:g}): "
+          f"precision {matched / n_fused if n_fused else float('nan'):.3f}  "
+          f"recall {matched / n_chain if n_chain else float('nan'):.3f}  "
+          f"exact {exact}/{n_chain}")
+
+    if args.show:
+        for (question, _), chain, fused in zip(items, chain_results, fused_results):
+            print(f"\n# {question}")
+            pairs = {i: (j, sim) for i, j, sim in matches(fused.claims, chain.claims, args.match)}
+            paired_chain = {j for j, _ in pairs.values()}
+            for i, claim in enumerate(fused.claims):
+                j, sim = pairs.get(i, (None, 0.0))
+                print(f"  fused {claim}" + (f"\n  chain {chain.claims[j]}  ({sim:.2f})" if j is not None else "  (no match)"))
+            for j, claim in enumerate(chain.claims):
+                if j not in paired_chain:
+                    print(f"  chain {claim}  (no match)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Claimify pre-filter vs sending every sentence to Selection, on a labelled set.
+
+Each line of --labels is {"question", "sentence", "label"}; label is true when
+the sentence contains a specific and verifiable proposition (what Selection
+should keep). For every pre-filter configuration it reports:
+
+    rejected     sentences rejected locally (no Selection call)
+    precision    rejected sentences that really are non-claims
+    recall       non-claims caught by the pre-filter
+    lost         claims wrongly rejected (these never reach Decomposition)
+    calls        Selection calls: one per sentence, and batched per --batch-size
+                 (the labelled set taken as one answer); the current pipeline
+                 is the "none" row
+
+Configurations: "none", the rules (--rules, default all), and with a
+classifier either --model (trained file) or --cv K (K-fold: each sentence
+scored by a model trained on the other folds) at each --threshold.
+
+    python benchmarks/eval_prefilter.py --cv 5 --threshold 0.05 0.1 0.2 --show
+    python benchmarks/eval_prefilter.py --train indexbox/cache/prefilter.npz
+    python benchmarks/eval_prefilter.py --llm    # also run Selection (OPENAI_BASE_URL / GRAPHRAG_API_KEY)
+
+With --llm, Selection is asked about every sentence as well; "llm acc" is the
+accuracy of the labels reproduced by Selection alone (current pipeline) and by
+pre-filter + Selection on the sentences it keeps.
+"""
+import argparse
+import asyncio
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from claim_prefilter import RULES, PreFilter, SentenceClassifier, load_labels  # noqa: E402
+
+
+def cv_probabilities(sentences: list, labels: list, folds: int, seed: int) -> np.ndarray:
+    order = np.random.default_rng(seed).permutation(len(sentences))
+    probs = np.zeros(len(sentences), dtype=np.float32)
+    for fold in np.array_split(order, folds):
+        held = set(fold.tolist())
+        train = [i for i in range(len(sentences)) if i not in held]
+        model = SentenceClassifier.fit([sentences[i] for i in train], [labels[i] for i in train])
+        probs[fold] = model.predict_proba([sentences[i] for i in fold])
+    return probs
+
+
+async def llm_verdicts(rows: list, concurrency: int) -> list:
+    """Selection's verdict per sentence, as Claimify asks it (no surrounding context)."""
+    from claimify import Claimify
+    from splitter import SentenceTable
+
+    claimify = Claimify(concurrency=concurrency)
+
+    async def one(row: dict) -> bool:
+        async with claimify._sem:
+            doc = SentenceTable(row["sentence"], [(0, len(row["sentence"]))])
+            return await claimify._select(row["question"], doc, 0)
+
+    return await asyncio.gather(*(one(r) for r in rows))
+
+
+def report(name: str, rejected: list, labels: list, batch_size: int, llm: list = None) -> dict:
+    n = len(labels)
+    n_rej = sum(rejected)
+    true_rej = sum(1 for r, y in zip(rejected, labels) if r and not y)
+    non_claims = sum(1 for y in labels if not y)
+    row = {
+        "config": name,
+        "rejected": n_rej,
+        "precision": true_rej / n_rej if n_rej else float("nan"),
+        "recall": true_rej / non_claims if non_claims else float("nan"),
+        "lost": sum(1 for r, y in zip(rejected, labels) if r and y),
+        "calls": n - n_rej,
+        "batched": math.ceil((n - n_rej) / batch_size),
+    }
+    if llm is not None:
+        predicted = [False if r else v for r, v in zip(rejected, llm)]
+        row["llm acc"] = sum(p == y for p, y in zip(predicted, labels)) / n
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", default=str(ROOT / "benchmarks" / "data" / "selection_labels.jsonl"))
+    parser.add_argument("--rules", nargs="*", default=None, choices=list(RULES), help="default: all")
+    parser.add_argument("--model", help="trained classifier (.npz) to evaluate")
+    parser.add_argument("--cv", type=int, default=0, help="evaluate a classifier by K-fold cross-validation")
+    parser.add_argument("--threshold", type=float, nargs="+", default=[0.05])
+    parser.add_argument("--train", help="train a classifier on all labels and save it here (.npz)")
+    parser.add_argument("--batch-size", type=int, default=10, help="as CLAIMIFY_SELECTION_BATCH_SIZE")
+    parser.add_argument("--llm", action="store_true", help="also run the Selection prompt on every sentence")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--show", action="store_true", help="list wrong rejections and missed non-claims")
+    args = parser.parse_args()
+
+    rows = load_labels(Path(args.labels))
+    sentences = [r["sentence"] for r in rows]
+    labels = [bool(r["label"]) for r in rows]
+
+    if args.train:
+        SentenceClassifier.fit(sentences, labels).save(Path(args.train))
+        print(f"classifier trained on {len(rows)} sentences -> {args.train}\n")
+
+    llm = asyncio.run(llm_verdicts(rows, args.concurrency)) if args.llm else None
+
+    rules = PreFilter(rules=args.rules)
+    by_rules = [r is not None for r in rules.verdicts(sentences)]
+    configs = [("none", [False] * len(rows)), ("rules", by_rules)]
+
+    probs = None
+    if args.model:
+        probs = SentenceClassifier.load(Path(args.model)).predict_proba(sentences)
+    elif args.cv:
+        probs = cv_probabilities(sentences, labels, args.cv, args.seed)
+    if probs is not None:
+        for t in args.threshold:
+            configs.append((f"rules+clf<{t:g}", [r or bool(p < t) for r, p in zip(by_rules, probs)]))
+
+    print(f"{len(rows)} sentences, {sum(labels)} claims, {len(rows) - sum(labels)} non-claims, "
+          f"rules={','.join(args.rules if args.rules is not None else RULES)}\n")
+    cols = ["config", "rejected", "precision", "recall", "lost", "calls", "batched"] + (["llm acc"] if llm else [])
+    print("".join(f"{c:>16}" if i == 0 else f"{c:>10}" for i, c in enumerate(cols)))
+    for name, rejected in configs:
+        row = report(name, rejected, labels, args.batch_size, llm)
+        print("".join(
+            f"{row[c]:>16}" if i == 0 else f"{row[c]:>10.3f}" if isinstance(row[c], float) else f"{row[c]:>10}"
+            for i, c in enumerate(cols)
+        ))
+
+    if args.show:
+        name, rejected = configs[-1]
+        print(f"\n{name}: wrongly rejected")
+        for s, r, y in zip(sentences, rejected, labels):
+            if r and y:
+                print(f"  - {s}")
+        print(f"{name}: non-claims still sent to Selection")
+        for s, r, y in zip(sentences, rejected, labels):
+            if not r and not y:
+                print(f"  - {s}")
+
+
+if __name__ == "__main__":
+    main()
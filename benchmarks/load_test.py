@@ -0,0 +1,300 @@
+"""
+Load test of the search endpoints and Claimify.extract against the mock LLM.
+
+Starts benchmarks/mock_llm.py and the API (uvicorn api:app) as subprocesses,
+with GRAPHRAG_API_KEY set to a dummy key and OPENAI_BASE_URL pointing at the
+mock, then for each target and concurrency level sends --requests requests
+(--concurrency at a time) and reports
+
+    p50 / p95 / p99 latency, requests per second, errors,
+    LLM calls per request and 429s (from the mock's /stats),
+    mean Server-Timing phases of the API responses,
+    peak RSS of the API process (or of this process for claimify).
+
+Targets: global, local, drift, basic (GET /search/<mode>), their streamed
+variants as <mode>/stream (latency = until the last event), and claimify
+(Claimify.extract in this process, answers from --answer-file).
+
+Queries are made unique per request so the search cache does not answer
+them; pass --cache-hits to repeat the same few queries instead.
+
+    python benchmarks/load_test.py --targets local global claimify --concurrency 1 8 32 --requests 64
+
+Use --api-url / --mock-url to test servers that are already running. The
+sample index needs tiktoken's encodings (set TIKTOKEN_CACHE_DIR when offline).
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+SEARCH_TARGETS = ("global", "local", "drift", "basic")
+QUERIES = [
+    "What are the main themes in the dataset?",
+    "Who are the key people and how are they connected?",
+    "Which organisations appear most often and why?",
+    "Summarise the most important events.",
+]
+ANSWER = (
+    "The network connects several organisations through shared members. "
+    "Alice founded the Riverside Cooperative in 2015 and still chairs its board. "
+    "The cooperative partners with the city council on housing projects. "
+    "Most of its funding comes from member fees and a regional development grant. "
+    "Critics argue that the council relies too heavily on a single partner."
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Peak resident set size in MB (VmHWM) of `pid`, or of this process."""
+    if pid is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    m = re.search(r"VmHWM:\s+(\d+) kB", status)
+    return int(m.group(1)) / 1024 if m else None
+
+
+def server_timing(header: Optional[str]) -> Dict[str, float]:
+    phases = {}
+    for item in (header or "").split(","):
+        m = re.match(r"\s*([\w-]+);dur=([\d.]+)", item)
+        if m:
+            phases[m.group(1)] = float(m.group(2))
+    return phases
+
+
+def start(cmd: List[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(cmd, cwd=ROOT, env=env)
+
+
+def wait_until_up(url: str, proc: Optional[subprocess.Popen], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            sys.exit(f"{' '.join(proc.args)} exited with {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    sys.exit(f"{url} not up after {timeout:.0f}s")
+
+
+class Result:
+    def __init__(self, target: str, concurrency: int):
+        self.target, self.concurrency = target, concurrency
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.phases: Dict[str, List[float]] = {}
+        self.elapsed = 0.0
+        self.llm_calls = 0
+        self.rate_limited = 0
+        self.rss_mb: Optional[float] = None
+
+    def add(self, seconds: float, error: Optional[str] = None, phases: Optional[Dict[str, float]] = None) -> None:
+        if error is not None:
+            self.errors[error] += 1
+            return
+        self.latencies.append(seconds)
+        for name, ms in (phases or {}).items():
+            self.phases.setdefault(name, []).append(ms)
+
+    def row(self) -> dict:
+        ok = self.latencies or [float("nan")]
+        total = len(self.latencies) + sum(self.errors.values())
+        return {
+            "target": self.target,
+            "concurrency": self.concurrency,
+            "requests": total,
+            "errors": dict(self.errors),
+            "p50_ms": percentile(ok, 50) * 1000,
+            "p95_ms": percentile(ok, 95) * 1000,
+            "p99_ms": percentile(ok, 99) * 1000,
+            "rps": len(self.latencies) / self.elapsed if self.elapsed else 0.0,
+            "llm_calls_per_request": self.llm_calls / total if total else 0.0,
+            "llm_429s": self.rate_limited,
+            "peak_rss_mb": self.rss_mb,
+            "server_timing_ms": {k: statistics.mean(v) for k, v in sorted(self.phases.items())},
+        }
+
+
+async def run_search(client: httpx.AsyncClient, target: str, query: str, result: Result) -> None:
+    t0 = time.perf_counter()
+    try:
+        if target.endswith("/stream"):
+            async with client.stream("GET", f"/search/{target}", params={"query": query}) as r:
+                phases = server_timing(r.headers.get("server-timing"))
+                error = None if r.status_code == 200 else f"HTTP {r.status_code}"
+                event = None
+                async for line in r.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[7:]
+                    elif event == "error" and line.startswith("data: "):
+                        error = f"stream error: {line[6:126]}"
+        else:
+            r = await client.get(f"/search/{target}", params={"query": query, "include_context": "false"})
+            phases = server_timing(r.headers.get("server-timing"))
+            error = None if r.status_code == 200 else f"HTTP {r.status_code}: {r.text[:120]}"
+    except httpx.HTTPError as e:
+        phases, error = None, type(e).__name__
+    result.add(time.perf_counter() - t0, error, phases)
+
+
+async def run_claimify(claimify, question: str, answer: str, result: Result) -> None:
+    t0 = time.perf_counter()
+    try:
+        claims = await claimify.extract(question, answer)
+        error = None if claims else "no claims"
+    except Exception as e:  # noqa: BLE001 - counted per exception type
+        error = type(e).__name__
+    result.add(time.perf_counter() - t0, error)
+
+
+async def run_level(target: str, concurrency: int, args, api_pid: Optional[int], mock: httpx.AsyncClient) -> Result:
+    result = Result(target, concurrency)
+    sem = asyncio.Semaphore(concurrency)
+    if args.cache_hits:
+        queries = [QUERIES[i % len(QUERIES)] for i in range(args.requests)]
+    else:
+        queries = [f"{QUERIES[i % len(QUERIES)]} ({target} c{concurrency} #{i})" for i in range(args.requests)]
+
+    if target == "claimify":
+        from claimify import Claimify
+        claimify = Claimify(concurrency=args.claimify_concurrency, batch_selection=args.batch_selection)
+        answer = Path(args.answer_file).read_text(encoding="utf-8") if args.answer_file else ANSWER
+
+        async def one(i: int) -> None:
+            async with sem:
+                text = answer if args.cache_hits else f"{answer} Request {i} was load test number {i}."
+                await run_claimify(claimify, queries[i], text, result)
+    else:
+        client = httpx.AsyncClient(base_url=args.api_url, timeout=args.timeout,
+                                   limits=httpx.Limits(max_connections=concurrency))
+
+        async def one(i: int) -> None:
+            async with sem:
+                await run_search(client, target, queries[i], result)
+
+    await mock.post("/stats/reset")
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    result.elapsed = time.perf_counter() - t0
+    if target != "claimify":
+        await client.aclose()
+    stats = (await mock.get("/stats")).json()
+    result.llm_calls = sum(v for k, v in stats.items() if not k.startswith("embedding") and k != "rate_limited")
+    result.rate_limited = stats.get("rate_limited", 0)
+    if target == "claimify":
+        result.rss_mb = peak_rss_mb()
+    elif api_pid is not None:
+        result.rss_mb = peak_rss_mb(api_pid)
+    return result
+
+
+def print_row(row: dict) -> None:
+    errors = sum(row["errors"].values())
+    rss = f"{row['peak_rss_mb']:.0f}" if row["peak_rss_mb"] is not None else "-"
+    print(f"{row['target']:<14} {row['concurrency']:>4} {row['requests']:>6} {errors:>6} "
+          f"{row['p50_ms']:>9.0f} {row['p95_ms']:>9.0f} {row['p99_ms']:>9.0f} {row['rps']:>7.2f} "
+          f"{row['llm_calls_per_request']:>6.1f} {row['llm_429s']:>5} {rss:>8}")
+    if row["server_timing_ms"]:
+        print(" " * 19 + "  ".join(f"{k}={v:.0f}ms" for k, v in row["server_timing_ms"].items()))
+    for error, count in row["errors"].items():
+        print(" " * 19 + f"{count} x {error}")
+
+
+async def main_async(args, api_pid: Optional[int]) -> List[dict]:
+    rows = []
+    print(f"{'target':<14} {'conc':>4} {'reqs':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'rps':>7} {'llm/r':>6} {'429s':>5} {'rss MB':>8}")
+    async with httpx.AsyncClient(base_url=args.mock_url, timeout=10) as mock:
+        for target in args.targets:
+            for concurrency in args.concurrency:
+                row = (await run_level(target, concurrency, args, api_pid, mock)).row()
+                print_row(row)
+                rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", default=["local", "global"],
+                        choices=[*SEARCH_TARGETS, *(f"{t}/stream" for t in SEARCH_TARGETS), "claimify"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--requests", type=int, default=32, help="requests per target and concurrency level")
+    parser.add_argument("--cache-hits", action="store_true", help="repeat queries instead of making them unique")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--api-url", default=None, help="use a running API instead of starting one")
+    parser.add_argument("--api-port", type=int, default=8901)
+    parser.add_argument("--mock-url", default=None, help="use a running mock instead of starting one")
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2, help="mock: seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="mock: generation rate, 0 = instant")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="mock: words in free-text answers")
+    parser.add_argument("--dim", type=int, default=3072, help="mock: embedding dimensions of the index")
+    parser.add_argument("--rpm", type=int, default=0, help="mock: chat requests per minute before 429s")
+    parser.add_argument("--claimify-concurrency", type=int, default=8)
+    parser.add_argument("--batch-selection", action="store_true")
+    parser.add_argument("--answer-file", default=None, help="text Claimify extracts claims from")
+    parser.add_argument("--json", dest="json_out", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    procs: List[subprocess.Popen] = []
+    if args.mock_url is None:
+        args.mock_url = f"http://127.0.0.1:{args.mock_port}"
+        procs.append(start([
+            sys.executable, str(ROOT / "benchmarks" / "mock_llm.py"), "--port", str(args.mock_port),
+            "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+            "--answer-tokens", str(args.answer_tokens), "--dim", str(args.dim), "--rpm", str(args.rpm),
+        ], dict(os.environ)))
+    os.environ.setdefault("GRAPHRAG_API_KEY", "mock-key")
+    os.environ["OPENAI_BASE_URL"] = f"{args.mock_url}/v1"
+    sys.path.insert(0, str(ROOT))
+
+    api_pid = None
+    try:
+        wait_until_up(f"{args.mock_url}/stats", procs[0] if procs else None, timeout=30)
+        if args.api_url is None and any(t != "claimify" for t in args.targets):
+            args.api_url = f"http://127.0.0.1:{args.api_port}"
+            api = start([sys.executable, "-m", "uvicorn", "api:app", "--port", str(args.api_port),
+                         "--log-level", "warning"], dict(os.environ))
+            procs.append(api)
+            api_pid = api.pid
+            wait_until_up(f"{args.api_url}/ready?warm=true", api, timeout=300)
+        mock = (f"{args.mock_url} (latency={args.latency}s tokens/s={args.tokens_per_second or 'inf'})"
+                if len(procs) and procs[0].args[1].endswith("mock_llm.py") else args.mock_url)
+        print(f"mock={mock} api={args.api_url or '-'} requests={args.requests}\n")
+        rows = asyncio.run(main_async(args, api_pid))
+        if args.json_out:
+            Path(args.json_out).write_text(json.dumps(rows, indent=2))
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+if __name__ == "__main__":
+    main()
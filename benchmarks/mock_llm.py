@@ -0,0 +1,243 @@
+"""
+OpenAI-compatible stand-in for load tests: answers /v1/chat/completions
+(plain and streamed) and /v1/embeddings without calling OpenAI.
+
+Responses are deterministic (seeded from the request) and shaped like what
+the callers parse, recognised from the prompt:
+
+    global map        {"points": [...]}
+    DRIFT primer      {"intermediate_answer", "score", "follow_up_queries"}
+    DRIFT local       {"response", "score", "follow_up_queries"}
+    Claimify          selection verdicts (single and batched JSON),
+                      DecontextualizedSentence, proposition list
+    anything else     --answer-tokens words of markdown
+
+Latency model: --latency seconds before the first token, then
+--tokens-per-second (0 = instant). Embeddings are unit vectors of --dim
+dimensions (or the request's `dimensions`) after --embedding-latency.
+With --rpm, requests beyond that many per minute (sliding window) get a 429
+with retry-after, like OpenAI's rate limiter.
+
+    python benchmarks/mock_llm.py --port 8900 --latency 0.3 --tokens-per-second 80
+
+Point clients at it with OPENAI_BASE_URL=http://127.0.0.1:8900/v1 (graphrag
+and claimify.py both use the OpenAI SDK default when settings.yaml has no
+api_base). GET /stats returns call counts per kind.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import Counter, deque
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "the community network report describes key entities relationships between organisations "
+    "people events and locations with evidence drawn from several sources in the dataset"
+).split()
+SELECTED = "Contains a specific and verifiable proposition"
+
+
+def _seed(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha256("\x1f".join(parts).encode()).digest()[:8], "little")
+
+
+def _words(rng: np.random.Generator, n: int) -> str:
+    return " ".join(WORDS[i] for i in rng.integers(0, len(WORDS), n))
+
+
+def _sentence(prompt: str) -> str:
+    m = re.search(r"Sentence:\s*\n(.+?)\s*$", prompt, re.S)
+    return m.group(1).strip() if m else "The sentence."
+
+
+def respond(messages: list, answer_tokens: int, structured: bool = False) -> tuple[str, str]:
+    """(kind, content) for a chat request; structured: Claimify's JSON replies (response_format set)."""
+    system = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+    user = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") != "system")
+    text = system + "\n" + user
+    rng = np.random.default_rng(_seed(text))
+
+    if "performing a VERIFICATION task" in user:
+        ids = [int(i) for i in re.findall(r"^\[(\d+)\]", user, re.M)]
+        verdicts = ["supported", "unsupported", "refuted"]
+        return "claim_verification", json.dumps({"verdicts": [{"id": i, "verdict": verdicts[i % 3]} for i in ids]})
+    if "batched SELECTION task" in user:
+        ids = [int(i) for i in re.findall(r"^\[(\d+)\]", user, re.M)]
+        verdicts = [{"id": i, "verdict": SELECTED} for i in ids]
+        return "claimify_selection_batch", json.dumps({"verdicts": verdicts} if structured else verdicts)
+    if "performing a SELECTION task" in user:
+        if structured:
+            return "claimify_selection", json.dumps({"reasoning": _words(rng, 12), "verdict": SELECTED,
+                                                     "sentence": _sentence(user)})
+        return "claimify_selection", f"Final submission: {SELECTED}"
+    if "combined DISAMBIGUATION and DECOMPOSITION task" in user:
+        sentence = _sentence(user).rstrip(".")
+        claims = [sentence, _words(rng, 8)]
+        if structured:
+            return "claimify_fused", json.dumps({"reasoning": _words(rng, 12), "decontextualized": True,
+                                                 "sentence": _sentence(user), "propositions": claims})
+        return "claimify_fused", (f"DecontextualizedSentence:\n{_sentence(user)}\n\nPropositions:\n[\n"
+                                  + ",\n".join(f'  "{c}"' for c in claims) + "\n]")
+    if "performing a DISAMBIGUATION task" in user:
+        if structured:
+            return "claimify_disambiguation", json.dumps({"reasoning": _words(rng, 12), "decontextualized": True,
+                                                          "sentence": _sentence(user)})
+        return "claimify_disambiguation", f"DecontextualizedSentence: {_sentence(user)}"
+    if "performing a DECOMPOSITION task" in user:
+        sentence = _sentence(user).rstrip(".")
+        if structured:
+            return "claimify_decomposition", json.dumps({"referential_terms": [], "clarified_sentence": sentence,
+                                                         "propositions": [sentence, _words(rng, 8)]})
+        claims = [f'  "{sentence} - true or false?",', f'  "{_words(rng, 8)} - true or false?"']
+        return "claimify_decomposition", "Propositions:\n[\n" + "\n".join(claims) + "\n]"
+    if "intermediate_answer" in text:
+        return "drift_primer", json.dumps({
+            "intermediate_answer": _words(rng, answer_tokens),
+            "score": int(rng.integers(40, 100)),
+            "follow_up_queries": [_words(rng, 6) + "?" for _ in range(3)],
+        })
+    if "follow_up_queries" in text:
+        return "drift_local", json.dumps({
+            "response": _words(rng, answer_tokens),
+            "score": int(rng.integers(40, 100)),
+            "follow_up_queries": [_words(rng, 6) + "?" for _ in range(2)],
+        })
+    if '"points"' in text:
+        return "global_map", json.dumps({"points": [
+            {"description": _words(rng, 20) + " [Data: Reports (1, 2)]", "score": int(rng.integers(1, 100))}
+            for _ in range(3)
+        ]})
+    return "answer", "## Summary\n\n" + _words(rng, answer_tokens) + " [Data: Reports (1)]."
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI()
+    calls: Counter = Counter()
+    window: deque = deque()
+
+    def rate_limited() -> JSONResponse | None:
+        if not args.rpm:
+            return None
+        now = time.monotonic()
+        while window and window[0] <= now - 60:
+            window.popleft()
+        if len(window) < args.rpm:
+            window.append(now)
+            return None
+        calls["rate_limited"] += 1
+        wait = window[0] + 60 - now
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"retry-after-ms": str(int(wait * 1000)), "retry-after": str(max(1, round(wait)))},
+        )
+
+    async def generate(n_tokens: int) -> None:
+        await asyncio.sleep(args.latency)
+        if args.tokens_per_second > 0:
+            await asyncio.sleep(n_tokens / args.tokens_per_second)
+
+    @app.post("/v1/chat/completions")
+    async def chat(request: Request):
+        if (limited := rate_limited()) is not None:
+            return limited
+        body = await request.json()
+        messages = body.get("messages", [])
+        kind, content = respond(messages, args.answer_tokens, structured="response_format" in body)
+        calls[kind] += 1
+        usage = {
+            "prompt_tokens": sum(_tokens(str(m.get("content", ""))) for m in messages),
+            "completion_tokens": _tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = body.get("model", "mock")
+        head = {"id": f"chatcmpl-{_seed(content) % 10**12}", "created": int(time.time()), "model": model}
+
+        if not body.get("stream"):
+            await generate(usage["completion_tokens"])
+            return JSONResponse({
+                **head, "object": "chat.completion", "usage": usage,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+            })
+
+        async def events():
+            def chunk(delta: dict, finish=None, **extra) -> str:
+                payload = {**head, "object": "chat.completion.chunk", **extra,
+                           "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                return f"data: {json.dumps(payload)}\n\n"
+
+            await asyncio.sleep(args.latency)
+            yield chunk({"role": "assistant", "content": ""})
+            pieces = re.findall(r"\S+\s*", content)
+            for piece in pieces:
+                if args.tokens_per_second > 0:
+                    await asyncio.sleep(1 / args.tokens_per_second)
+                yield chunk({"content": piece})
+            yield chunk({}, finish="stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({**head, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        texts = body.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        dim = body.get("dimensions") or args.dim
+        calls["embedding"] += 1
+        calls["embedding_texts"] += len(texts)
+        await asyncio.sleep(args.embedding_latency)
+        data = []
+        for i, text in enumerate(texts):
+            v = np.random.default_rng(_seed(str(text))).standard_normal(dim).astype(np.float32)
+            data.append({"object": "embedding", "index": i, "embedding": (v / np.linalg.norm(v)).tolist()})
+        tokens = sum(_tokens(str(t)) for t in texts)
+        return JSONResponse({"object": "list", "data": data, "model": body.get("model", "mock"),
+                             "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    @app.get("/stats")
+    async def stats():
+        return dict(calls)
+
+    @app.post("/stats/reset")
+    async def stats_reset():
+        calls.clear()
+        return {}
+
+    return app
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="generation rate, 0 = instant")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="words in free-text answers")
+    parser.add_argument("--dim", type=int, default=3072, help="embedding dimensions")
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--rpm", type=int, default=0, help="chat requests per minute before 429s, 0 = no limit")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
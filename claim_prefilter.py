@@ -0,0 +1,237 @@
+import json
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+'''
+Local pre-filter in front of Claimify's Selection step.
+
+Selection asks the LLM, per sentence (or per chunk of sentences), whether it
+contains a specific and verifiable proposition. Some sentences can be
+rejected without asking: prompt.SELECTION itself says that statements about
+a lack of information never qualify, and markdown answers contain headings,
+empty bullets and bare citations that carry no proposition at all.
+
+PreFilter.keep(sentences) returns the indices that still go to Selection:
+
+- rules       : cheap checks on the sentence text (RULES below); each can be
+                switched off by leaving its name out of `rules`.
+- classifier  : optional SentenceClassifier, a logistic regression on hashed
+                word n-grams and a few shape features, trained on labelled
+                sentences (benchmarks/eval_prefilter.py --train). A sentence
+                is rejected when its P(claim) is below `threshold`; keep the
+                threshold low, a false rejection loses claims for good while
+                a false keep only costs the Selection call we have today.
+
+Rejected sentences stay in the answer's context windows, so Selection of
+their neighbours sees the same context as before.
+'''
+
+_WORDS = re.compile(r"[^\W_]+")
+_CITATION = re.compile(r"\[(?:Data|Source)s?:[^\]]*\]", re.I)
+_MARKUP = re.compile(r"[#>*_`~|•▪◦\-–—]+")
+_LIST_MARKER = re.compile(r"^\s*(?:[-*+•▪◦]|\d+[.)]|[a-zA-Z][.)])\s+")
+# markdown and bold headings, and bare labels of up to three words ("Main themes:");
+# a longer line ending in a colon ("The plan covers three benefits:") can carry a claim
+_HEADING = re.compile(r"^\s*(?:#{1,6}\s+[^\n]*|(\*\*|__)[^*_\n]+\1:?|[^\W_]+(?:[ \t]+[^\W_]+){0,2}:)\s*$")
+# a lack-of-information statement: a negated information word ...
+_NEGATED_INFORMATION = re.compile(
+    r"(?:\bnot\b|\bno\b|n't\b|\bcannot\b|\bnor\b|\blacks?\b|\babsence\b|\bunable\b)[^.;]{0,60}?"
+    r"\b(?:information|details?|data|mention(?:s|ed)?|specif(?:y|ies|ied)|evidence|indication)\b",
+    re.I,
+)
+# ... about the source the answer was drawn from ("the provided text", "the
+# dataset", "these reports"); "available" or "provided" alone names no source
+_SOURCE_NOUN = r"(?:data|dataset|datasets|text|texts|context|reports?|sources?|tables?|documents?|records?)\b"
+_SOURCE = re.compile(
+    r"\b(?:provided|given|available|supplied|above)\s+" + _SOURCE_NOUN
+    + r"|\b(?:this|these)\s+" + _SOURCE_NOUN
+    + r"|\bthe\s+(?:dataset|datasets|context)\b",
+    re.I,
+)
+_DONT_KNOW = re.compile(r"\b(?:i|we)\s+(?:don't|do\s+not)\s+know\b", re.I)
+# hedge openers: only a sentence with nothing after the opener is rejected
+_HEDGE = re.compile(
+    r"^\s*(?:(?:it\s+is|it's)\s+(?:important|worth|essential|crucial|useful|helpful)\s+to\s+"
+    r"(?:note|mention|remember|consider|keep\s+in\s+mind|highlight)"
+    r"|(?:it\s+is|it's)\s+worth\s+(?:noting|mentioning|remembering)"
+    r"|(?:please\s+)?note\s+that|keep\s+in\s+mind\s+that"
+    r"|in\s+(?:summary|conclusion|short|essence)|to\s+(?:summarize|sum\s+up|conclude)|overall)\b",
+    re.I,
+)
+# closing boilerplate, rejected whatever follows
+_CLOSING = re.compile(
+    r"^\s*(?:(?:i\s+)?hope\s+(?:this|that|the\s+above)\s+(?:helps|answers|clarifies|is\s+helpful)"
+    r"|let\s+me\s+know\s+if|feel\s+free\s+to\s+(?:ask|reach\s+out|contact|let\s+me\s+know)"
+    r"|if\s+you\s+have\s+(?:any\s+)?(?:further\s+|more\s+|other\s+|additional\s+)?questions)\b",
+    re.I,
+)
+
+
+def _content(sentence: str) -> str:
+    """The sentence without citations, list markers and markdown markup."""
+    return _MARKUP.sub(" ", _LIST_MARKER.sub("", _CITATION.sub(" ", sentence))).strip()
+
+
+def _has_specifics(text: str, skip_first: bool = True) -> bool:
+    """Digits, or a capitalised word not starting the sentence (a likely name)."""
+    if any(c.isdigit() for c in text):
+        return True
+    return any(w[0].isupper() for w in _WORDS.findall(text)[1 if skip_first else 0:])
+
+
+def no_content(sentence: str) -> bool:
+    return not _WORDS.search(_content(sentence))
+
+
+def heading(sentence: str) -> bool:
+    return "\n" not in sentence.strip() and bool(_HEADING.match(_CITATION.sub("", sentence)))
+
+
+def no_information(sentence: str) -> bool:
+    # "The company did not provide revenue data to regulators" names no source: kept
+    if _DONT_KNOW.search(sentence):
+        return True
+    return bool(_NEGATED_INFORMATION.search(sentence)) and bool(_SOURCE.search(sentence))
+
+
+def question(sentence: str) -> bool:
+    return _content(sentence).rstrip(" .").endswith("?")
+
+
+def hedge(sentence: str) -> bool:
+    # "Note that the policy excludes pre-existing conditions" still goes to Selection
+    text = _content(sentence)
+    if _CLOSING.match(text):
+        return True
+    m = _HEDGE.match(text)
+    return m is not None and not _WORDS.search(text[m.end():])
+
+
+RULES: Dict[str, Callable[[str], bool]] = {
+    "no_content": no_content,
+    "heading": heading,
+    "no_information": no_information,
+    "question": question,
+    "hedge": hedge,
+}
+
+
+class SentenceClassifier:
+    """Logistic regression P(sentence contains a verifiable proposition) on hashed features."""
+
+    SHAPE = ("digit", "name", "modal", "first_person", "colon", "short", "long", "list_item", "citation")
+    _MODAL = re.compile(r"\b(?:can|could|may|might|should|must|would|ought)\b", re.I)
+    _FIRST_PERSON = re.compile(r"\b(?:i|we|you|our|your)\b", re.I)
+
+    def __init__(self, weights: np.ndarray, bias: float = 0.0, dim: int = 2 ** 14):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.dim = dim
+
+    def _features(self, sentence: str) -> Dict[int, float]:
+        text = _content(sentence)
+        words = [w.lower() for w in _WORDS.findall(text)]
+        feats: Dict[int, float] = {}
+        for gram in [*words, *(f"{a} {b}" for a, b in zip(words, words[1:]))]:
+            h = zlib.crc32(gram.encode()) % self.dim
+            feats[h] = feats.get(h, 0.0) + 1.0
+        shape = (
+            any(c.isdigit() for c in text), _has_specifics(text), bool(self._MODAL.search(text)),
+            bool(self._FIRST_PERSON.search(text)), text.rstrip().endswith(":"), len(words) < 4,
+            len(words) > 30, bool(_LIST_MARKER.match(sentence)), bool(_CITATION.search(sentence)),
+        )
+        norm = max(1.0, float(len(words))) ** 0.5
+        feats = {h: v / norm for h, v in feats.items()}
+        for i, on in enumerate(shape):
+            if on:
+                feats[self.dim + i] = 1.0
+        return feats
+
+    def _matrix(self, sentences: Sequence[str]) -> np.ndarray:
+        x = np.zeros((len(sentences), self.dim + len(self.SHAPE)), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for col, value in self._features(sentence).items():
+                x[row, col] = value
+        return x
+
+    def predict_proba(self, sentences: Sequence[str]) -> np.ndarray:
+        if not sentences:
+            return np.zeros(0, dtype=np.float32)
+        z = self._matrix(sentences) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+    @classmethod
+    def fit(cls, sentences: Sequence[str], labels: Sequence[bool], dim: int = 2 ** 14,
+            epochs: int = 300, lr: float = 0.5, l2: float = 1e-3) -> "SentenceClassifier":
+        """Full-batch gradient descent; the sets this is trained on are small."""
+        model = cls(np.zeros(dim + len(cls.SHAPE), dtype=np.float32), 0.0, dim)
+        x, y = model._matrix(sentences), np.asarray(labels, dtype=np.float32)
+        for _ in range(epochs):
+            err = 1.0 / (1.0 + np.exp(-(x @ model.weights + model.bias))) - y
+            model.weights -= lr * (x.T @ err / len(y) + l2 * model.weights)
+            model.bias -= lr * float(err.mean())
+        return model
+
+    def save(self, path: Path) -> None:
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, dim=self.dim)
+
+    @classmethod
+    def load(cls, path: Path) -> "SentenceClassifier":
+        data = np.load(path)
+        return cls(data["weights"], float(data["bias"]), int(data["dim"]))
+
+
+class PreFilter:
+    def __init__(self, rules: Optional[Sequence[str]] = None,
+                 classifier: Optional[SentenceClassifier] = None, threshold: float = 0.05):
+        """
+        rules: names from RULES to apply (None = all of them).
+        classifier / threshold: reject sentences the classifier gives a
+        P(claim) below `threshold`, after the rules.
+        """
+        unknown = set(rules or ()) - set(RULES)
+        if unknown:
+            raise ValueError(f"Unknown pre-filter rules: {sorted(unknown)}")
+        self.rules = [(name, RULES[name]) for name in (RULES if rules is None else rules)]
+        self.classifier = classifier
+        self.threshold = threshold
+        self.counters: Counter = Counter()
+
+    def reason(self, sentence: str) -> Optional[str]:
+        """Name of the first rule that rejects the sentence, or None."""
+        return next((name for name, rule in self.rules if rule(sentence)), None)
+
+    def verdicts(self, sentences: Sequence[str]) -> List[Optional[str]]:
+        """Per sentence: why it is rejected (rule name or "classifier"), or None to keep it."""
+        reasons = [self.reason(s) for s in sentences]
+        if self.classifier is not None:
+            open_ = [i for i, r in enumerate(reasons) if r is None]
+            probs = self.classifier.predict_proba([sentences[i] for i in open_])
+            for i, p in zip(open_, probs):
+                if p < self.threshold:
+                    reasons[i] = "classifier"
+        return reasons
+
+    def keep(self, sentences: Sequence[str]) -> Tuple[List[int], Counter]:
+        """Indices that go on to Selection, and rejections counted by reason."""
+        reasons = self.verdicts(sentences)
+        rejected = Counter(r for r in reasons if r is not None)
+        self.counters["sentences"] += len(sentences)
+        self.counters.update(rejected)
+        return [i for i, r in enumerate(reasons) if r is None], rejected
+
+    def stats(self) -> Dict[str, int]:
+        rejected = sum(v for k, v in self.counters.items() if k != "sentences")
+        return {"sentences": self.counters["sentences"], "rejected": rejected,
+                "by_reason": {k: v for k, v in self.counters.items() if k != "sentences"}}
+
+
+def load_labels(path: Path) -> List[dict]:
+    """Labelled sentences, one JSON object per line: {"sentence", "label", ...}."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
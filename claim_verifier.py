@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import llm_gateway
+import telemetry
+from claimify import parse_structured
+from llm_cache import BaseLLMCache, cache_key
+from prompt import VERIFICATION_JUDGE, VERIFICATION_SCHEMA, USER_PROMPT_VERIFICATION, USER_PROMPT_VERIFICATION_ITEM
+
+'''
+Claim verification against the loaded index.
+
+Claims (from Claimify or a client) are checked against the text units the
+answer was built from and the claims graphrag extracted at indexing time
+(covariates), without asking the LLM about every claim:
+
+1. embed    : all claims of a request in one batched embedding call (the
+              embedding service dedupes, caches and batches them).
+2. retrieve : cosine similarity of every claim to every text unit and
+              covariate in one matrix product per block of rows, top_k each.
+              Text unit vectors are the precomputed text_unit.text embeddings
+              of the vector store; covariate descriptions have none, so they
+              are embedded once per snapshot (and then come from the cache).
+3. decide   : per claim, from the best matches
+                covariate >= covariate_threshold  -> its status decides
+                                                     (TRUE supported, FALSE refuted)
+                text unit >= support_threshold    -> supported, if every number
+                                                     in the claim is in the evidence
+                everything < unsupported_threshold -> unsupported
+              and anything else is ambiguous.
+4. judge    : only ambiguous claims go to the LLM, judge_batch_size claims
+              with their evidence per request, answering JSON (VERIFICATION_SCHEMA).
+              Without the judge they stay "unverified".
+
+So LLM calls grow with the ambiguous claims / judge_batch_size and embedding
+calls with the distinct claims / the embedding batch size, not one call per
+claim. The thresholds depend on the embedding model; the defaults are for
+text-embedding-3 models (see CLAIM_VERIFY_* in config.py).
+
+EvidenceIndex holds the per-snapshot part (matrices and texts) and is kept in
+snapshot.derived like report_ranking.ReportIndex.
+'''
+
+log = logging.getLogger(__name__)
+
+VERDICTS = ("supported", "refuted", "unsupported", "unverified")
+BLOCK_ROWS = 1 << 16     # evidence rows per similarity matrix product
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+EmbedFn = Callable[[List[str]], Awaitable[List[Sequence[float]]]]
+StoredVectorsFn = Callable[[List[str]], Optional[Tuple[np.ndarray, np.ndarray]]]   # vector_index.read_vectors
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def top_k(queries: np.ndarray, matrix: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(rows, similarities), both (queries, min(k, rows)), best first; unit vectors, so dot = cosine."""
+    m, k = len(queries), min(k, len(matrix))
+    best_rows = np.zeros((m, 0), dtype=np.int64)
+    best_sims = np.zeros((m, 0), dtype=np.float32)
+    for lo in range(0, len(matrix), BLOCK_ROWS):
+        sims = queries @ matrix[lo:lo + BLOCK_ROWS].T
+        kk = min(k, sims.shape[1])
+        part = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+        best_rows = np.concatenate([best_rows, part + lo], axis=1)
+        best_sims = np.concatenate([best_sims, np.take_along_axis(sims, part, axis=1)], axis=1)
+    order = np.argsort(-best_sims, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_sims, order, axis=1)
+
+
+@dataclass
+class Evidence:
+    kind: str              # "text_unit" or "covariate"
+    id: str
+    human_readable_id: Optional[int]
+    score: float
+    text: str
+    status: Optional[str] = None   # covariates: TRUE / FALSE / SUSPECTED
+
+
+@dataclass
+class Verification:
+    claim: str
+    verdict: str           # one of VERDICTS
+    method: str            # "covariate", "retrieval" or "judge"
+    score: float           # best evidence similarity
+    evidence: List[Evidence] = field(default_factory=list)
+
+    def public(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class VerificationStats:
+    claims: int = 0
+    embedded: int = 0      # distinct claims sent to the embedding service
+    judged: int = 0        # claims escalated to the LLM judge
+    llm_calls: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    seconds: float = 0.0
+
+
+class EvidenceIndex:
+    """Unit-normalised text unit and covariate vectors of one snapshot, with their texts."""
+
+    def __init__(self, text_units: pd.DataFrame, unit_vectors: np.ndarray,
+                 covariates: pd.DataFrame, covariate_vectors: np.ndarray):
+        self.text_units = text_units.reset_index(drop=True)
+        self.covariates = covariates.reset_index(drop=True)
+        self.unit_vectors = unit_vectors
+        self.covariate_vectors = covariate_vectors
+        self.unit_text = self.text_units["text"].fillna("").tolist()
+        self.covariate_text = [_covariate_text(r) for r in self.covariates.itertuples(index=False)]
+        self.covariate_status = (
+            self.covariates["status"].fillna("").astype(str).str.upper().tolist()
+            if "status" in self.covariates else [""] * len(self.covariates)
+        )
+
+    @classmethod
+    async def build(cls, text_units: pd.DataFrame, covariates: Optional[pd.DataFrame], embed: EmbedFn,
+                    stored_vectors: Optional[StoredVectorsFn] = None) -> "EvidenceIndex":
+        """
+        Text unit vectors come from `stored_vectors` (ids -> (vectors, found),
+        the text_unit.text table read in one pass, on a worker thread); rows it
+        lacks, and all covariate descriptions, are embedded.
+        """
+        covariates = covariates if covariates is not None else pd.DataFrame(columns=["id", "description"])
+        texts = text_units["text"].fillna("").tolist()
+        unit_vectors = None
+        if stored_vectors is not None and len(text_units):
+            try:
+                stored = await asyncio.to_thread(stored_vectors, text_units["id"].tolist())
+                if stored is None:
+                    raise LookupError("no text unit embedding table")
+                unit_vectors = await _fill(*stored, texts, embed)
+            except Exception as e:
+                log.warning("text unit embeddings unavailable from the vector store, embedding them: %s", e)
+        if unit_vectors is None:
+            unit_vectors = await _embed_matrix(texts, embed)
+        covariate_texts = [_covariate_text(r) for r in covariates.itertuples(index=False)]
+        covariate_vectors = await _embed_matrix(covariate_texts, embed)
+        return cls(text_units, unit_vectors, covariates, covariate_vectors)
+
+    def search(self, claim_vectors: np.ndarray, k: int) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """kind -> (rows, similarities) of the k best text units and covariates per claim."""
+        out = {}
+        for kind, matrix in (("text_unit", self.unit_vectors), ("covariate", self.covariate_vectors)):
+            if len(matrix):
+                out[kind] = top_k(claim_vectors, matrix, k)
+            else:
+                empty = np.zeros((len(claim_vectors), 0))
+                out[kind] = empty.astype(np.int64), empty.astype(np.float32)
+        return out
+
+    def evidence(self, kind: str, row: int, score: float, chars: int) -> Evidence:
+        table = self.text_units if kind == "text_unit" else self.covariates
+        text = self.unit_text[row] if kind == "text_unit" else self.covariate_text[row]
+        hrid = table["human_readable_id"].iloc[row] if "human_readable_id" in table else None
+        return Evidence(
+            kind=kind,
+            id=str(table["id"].iloc[row]),
+            human_readable_id=None if hrid is None or pd.isna(hrid) else int(hrid),
+            score=round(float(score), 4),
+            text=text[:chars],
+            status=self.covariate_status[row] if kind == "covariate" else None,
+        )
+
+
+def _covariate_text(row) -> str:
+    subject = getattr(row, "subject_id", None)
+    description = getattr(row, "description", None) or ""
+    return f"{subject}: {description}" if subject and subject != "NONE" else str(description)
+
+
+async def _embed_matrix(texts: List[str], embed: EmbedFn) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return _unit(np.asarray(await embed(texts), dtype=np.float32))
+
+
+async def _fill(vectors: np.ndarray, found: np.ndarray, texts: List[str], embed: EmbedFn) -> np.ndarray:
+    """Stored vectors, with the rows the store has no vector for embedded."""
+    missing = np.flatnonzero(~found)
+    if len(missing) == len(texts):
+        raise LookupError("no text unit vectors in the store")
+    if len(missing):
+        log.info("embedding %d text units missing from the vector store", len(missing))
+        vectors[missing] = np.asarray(await embed([texts[i] for i in missing]), dtype=np.float32)
+    return _unit(vectors)
+
+
+_build_lock = asyncio.Lock()
+
+
+async def evidence_index(snapshot, embed: EmbedFn, stored_vectors: Optional[StoredVectorsFn] = None
+                         ) -> EvidenceIndex:
+    """EvidenceIndex for a snapshot, built on first use and kept on it."""
+    async with _build_lock:
+        index = snapshot.derived.get("evidence_index")
+        if index is None:
+            t0 = time.perf_counter()
+            index = snapshot.derived["evidence_index"] = await EvidenceIndex.build(
+                snapshot.text_units, snapshot.covariates, embed, stored_vectors
+            )
+            log.info("evidence index: %d text units, %d covariates in %.2fs",
+                     len(index.text_units), len(index.covariates), time.perf_counter() - t0)
+        return index
+
+
+class ClaimVerifier:
+    def __init__(self, embed: EmbedFn, gateway=None, model: str = "gpt-4o-mini",
+                 cache: Optional[BaseLLMCache] = None, top_k: int = 3,
+                 support_threshold: float = 0.72, covariate_threshold: float = 0.85,
+                 unsupported_threshold: float = 0.40, judge_batch_size: int = 10,
+                 concurrency: int = 4, evidence_chars: int = 600):
+        """
+        embed: async texts -> vectors, the model the text units were embedded with.
+        gateway / model / cache: the LLM judge (llm_gateway.shared() by default).
+        Thresholds are cosine similarities, see the module docstring.
+        """
+        self.embed = embed
+        self.gateway = gateway or llm_gateway.shared()
+        self.model = model
+        self.cache = cache
+        self.top_k = max(1, top_k)
+        self.support_threshold = support_threshold
+        self.covariate_threshold = covariate_threshold
+        self.unsupported_threshold = unsupported_threshold
+        self.judge_batch_size = max(1, judge_batch_size)
+        self.evidence_chars = evidence_chars
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self.counters: Counter = Counter()
+        self._counter_lock = threading.Lock()
+
+    def _decide(self, claim: str, units: List[Evidence], covariates: List[Evidence]) -> Optional[Tuple[str, str]]:
+        """(verdict, method) from the retrieved evidence, or None when the judge has to decide."""
+        best_unit = units[0].score if units else 0.0
+        best_cov = covariates[0] if covariates else None
+        if best_cov is not None and best_cov.score >= self.covariate_threshold and best_cov.status in ("TRUE", "FALSE"):
+            return ("supported" if best_cov.status == "TRUE" else "refuted"), "covariate"
+        if best_unit >= self.support_threshold:
+            # a close paraphrase with another figure is the usual false match
+            evidence_numbers = {n for e in units for n in _NUMBER.findall(e.text)}
+            if set(_NUMBER.findall(claim)) <= evidence_numbers:
+                return "supported", "retrieval"
+        if max(best_unit, best_cov.score if best_cov is not None else 0.0) < self.unsupported_threshold:
+            return "unsupported", "retrieval"
+        return None
+
+    async def verify(self, claims: Sequence[str], index: EvidenceIndex, judge: bool = True,
+                     top_k: Optional[int] = None) -> Tuple[List[Verification], VerificationStats]:
+        t0 = time.perf_counter()
+        k = max(1, top_k or self.top_k)
+        stats = VerificationStats(claims=len(claims))
+        distinct = list(dict.fromkeys(claims))
+        stats.embedded = len(distinct)
+        vectors = _unit(np.asarray(await self.embed(distinct), dtype=np.float32)) if distinct else None
+
+        results: Dict[str, Verification] = {}
+        ambiguous: List[str] = []
+        if vectors is not None:
+            found = await asyncio.to_thread(index.search, vectors, k)
+            for n, claim in enumerate(distinct):
+                ev = {kind: [index.evidence(kind, int(r), s, self.evidence_chars) for r, s in zip(rows[n], sims[n])]
+                      for kind, (rows, sims) in found.items()}
+                best = max([e[0].score for e in ev.values() if e], default=0.0)
+                decided = self._decide(claim, ev["text_unit"], ev["covariate"])
+                verdict, method = decided if decided is not None else ("unverified", "retrieval")
+                results[claim] = Verification(claim, verdict, method, round(best, 4), ev["text_unit"] + ev["covariate"])
+                if decided is None:
+                    ambiguous.append(claim)
+
+        if judge and ambiguous:
+            stats.judged = len(ambiguous)
+            chunks = [ambiguous[i:i + self.judge_batch_size] for i in range(0, len(ambiguous), self.judge_batch_size)]
+            for chunk, verdicts in zip(chunks, await asyncio.gather(*(self._judge(c, results, stats) for c in chunks))):
+                for claim in chunk:
+                    if claim in verdicts:
+                        results[claim].verdict, results[claim].method = verdicts[claim], "judge"
+
+        out = [results[c] for c in claims]
+        with self._counter_lock:
+            self.counters.update(f"{r.method}:{r.verdict}" for r in out)
+        for r in out:
+            telemetry.CLAIMS_VERIFIED.inc(verdict=r.verdict, method=r.method)
+        stats.seconds = round(time.perf_counter() - t0, 3)
+        return out, stats
+
+    async def _judge(self, claims: List[str], results: Dict[str, Verification],
+                     stats: VerificationStats) -> Dict[str, str]:
+        """Verdicts of the LLM judge for a chunk of claims; claims it does not answer are left out."""
+        items = "\n".join(
+            USER_PROMPT_VERIFICATION_ITEM.format(
+                id=n, claim=claim,
+                evidence="\n".join(f"- ({e.kind} {e.human_readable_id}) {e.text}" for e in results[claim].evidence),
+            )
+            for n, claim in enumerate(claims, start=1)
+        )
+        user_prompt = USER_PROMPT_VERIFICATION.format(claims=items)
+        try:
+            reply = await self._ask(VERIFICATION_JUDGE, user_prompt, stats)
+        except ValueError as e:
+            # one retry, as Claimify does for its structured replies
+            telemetry.CLAIMIFY_PARSE_ERRORS.inc(stage="verification", outcome="retried")
+            retry_prompt = (f"{user_prompt}\nYour previous reply could not be used ({e}). "
+                            f"Reply with only the JSON object described above.\n")
+            try:
+                reply = await self._ask(VERIFICATION_JUDGE, retry_prompt, stats)
+            except ValueError as e:
+                telemetry.CLAIMIFY_PARSE_ERRORS.inc(stage="verification", outcome="failed")
+                log.warning("verification judge reply still invalid after a retry (%s); %d claims stay unverified",
+                            e, len(claims))
+                return {}
+        return {claims[v["id"] - 1]: v["verdict"] for v in reply["verdicts"] if 1 <= v["id"] <= len(claims)}
+
+    async def _ask(self, system_prompt: str, user_prompt: str, stats: VerificationStats) -> dict:
+        """The judge's reply validated against VERIFICATION_SCHEMA (ValueError otherwise); only valid replies are cached."""
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
+        params = {"temperature": 0, "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "claim_verification", "schema": VERIFICATION_SCHEMA, "strict": True},
+        }}
+        key = None
+        if self.cache is not None:
+            key = cache_key("chat_verification", self.model, messages, **params)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                stats.cache_hits += 1
+                return parse_structured(cached, VERIFICATION_SCHEMA)
+        async with self._sem:
+            with telemetry.span("llm"):
+                res = await self.gateway.chat(model=self.model, messages=messages, **params)
+        usage = res.usage
+        telemetry.record_llm_usage("claim_verification", usage.prompt_tokens if usage else 0,
+                                   usage.completion_tokens if usage else 0)
+        stats.llm_calls += 1
+        stats.prompt_tokens += usage.prompt_tokens if usage else 0
+        stats.completion_tokens += usage.completion_tokens if usage else 0
+        content = (res.choices[0].message.content or "").strip()
+        reply = parse_structured(content, VERIFICATION_SCHEMA)
+        if key is not None:
+            await self.cache.aset(key, content, {"model": self.model, "messages": messages, **params})
+        return reply
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counter_lock:
+            return {"claims": sum(self.counters.values()), "by_method_and_verdict": dict(self.counters)}
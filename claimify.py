@@ -1,80 +1,480 @@
-from openai import AsyncOpenAI
-from typing import List
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
 from prompt import (
-    SELECTION, DISAMBIGUATION, DECOMPOSITION,
-    USER_PROMPT_SELECTION, USER_PROMPT_DISAMBIGUATION, USER_PROMPT_DECOMPOSITION
+    SELECTION, DISAMBIGUATION, DECOMPOSITION, SELECTION_BATCH, CLAIMIFY_SCHEMAS,
+    SELECTION_JSON, DISAMBIGUATION_JSON, DECOMPOSITION_JSON, SELECTION_BATCH_JSON,
+    DISAMBIGUATION_DECOMPOSITION, DISAMBIGUATION_DECOMPOSITION_JSON,
+    USER_PROMPT_SELECTION, USER_PROMPT_DISAMBIGUATION, USER_PROMPT_DECOMPOSITION,
+    USER_PROMPT_DISAMBIGUATION_DECOMPOSITION,
+    USER_PROMPT_SELECTION_BATCH, USER_PROMPT_SELECTION_BATCH_ITEM,
 )
-from splitter import split_text
+from splitter import SentenceTable, split_answer, split_many
+from claim_prefilter import PreFilter
+from llm_cache import BaseLLMCache, cache_key
+from llm_gateway import LLMGateway
+import llm_gateway
+import telemetry
+import asyncio
+import json
+import logging
+import math
 import os
+import re
+import time
 
-api_key = os.getenv("GRAPHRAG_API_KEY")
-if not api_key:
-    raise EnvironmentError("Missing GRAPHRAG_API_KEY environment variable.")
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ExtractionStats:
+    """LLM work done for one answer (tallied by _ask through a ContextVar)."""
+    sentences: int = 0
+    prefiltered: int = 0      # rejected by the local pre-filter, never sent to Selection
+    llm_calls_saved: int = 0  # Selection calls those rejections avoided
+    llm_calls: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    parse_retries: int = 0    # structured replies asked for again after failing validation
+    parse_failures: int = 0   # ... and still invalid after the retry (that sentence is dropped)
+    seconds: float = 0.0
+
+
+@dataclass
+class Extraction:
+    """Result for item `index` of an extract_many() batch."""
+    index: int
+    claims: List[str] = field(default_factory=list)
+    stats: ExtractionStats = field(default_factory=ExtractionStats)
+    error: Optional[str] = None
+
+    def public(self) -> Dict[str, Any]:
+        return {"index": self.index, "claims": self.claims, **asdict(self.stats), "error": self.error}
+
+
+_stats: ContextVar[Optional[ExtractionStats]] = ContextVar("claimify_stats", default=None)
+
+RESPONSE_FORMATS = ("json_schema", "json_object")
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_JSON_TYPES = {
+    "object": dict, "array": list, "string": str, "boolean": bool,
+    "integer": int, "number": (int, float), "null": type(None),
+}
+
+
+def _validate(value: Any, schema: dict, path: str = "$") -> None:
+    """Raise ValueError unless value matches the (small) JSON-schema subset used in CLAIMIFY_SCHEMAS."""
+    types = schema.get("type")
+    if types is not None:
+        types = [types] if isinstance(types, str) else types
+        # bool is an int subclass; JSON true is not an integer
+        if not any(isinstance(value, _JSON_TYPES[t]) and not (t in ("integer", "number") and isinstance(value, bool))
+                   for t in types):
+            raise ValueError(f"{path}: expected {' or '.join(types)}, got {type(value).__name__}")
+    if "enum" in schema and value not in schema["enum"]:
+        raise ValueError(f"{path}: {value!r} is not one of {schema['enum']}")
+    if isinstance(value, dict):
+        missing = [k for k in schema.get("required", ()) if k not in value]
+        if missing:
+            raise ValueError(f"{path}: missing {', '.join(missing)}")
+        for k, sub in schema.get("properties", {}).items():
+            if k in value:
+                _validate(value[k], sub, f"{path}.{k}")
+    elif isinstance(value, list) and "items" in schema:
+        for n, item in enumerate(value):
+            _validate(item, schema["items"], f"{path}[{n}]")
+
+
+def parse_structured(content: str, schema: dict) -> dict:
+    """The JSON object in a structured-output reply, validated against schema (ValueError otherwise)."""
+    text = _FENCE.sub("", content.strip())
+    try:
+        value = json.loads(text)
+    except ValueError:
+        # prose around the object: json_object mode on a model that still talks
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            raise ValueError("reply is not JSON") from None
+        value = json.loads(text[start:end + 1])
+    _validate(value, schema)
+    return value
 
-client = AsyncOpenAI(api_key=api_key)
 
 class Claimify:
-    def __init__(self, model: str = "gpt-4o-mini", p: int = 2, f: int = 2):
+    def __init__(self, model: str = "gpt-4o-mini", p: int = 2, f: int = 2, concurrency: int = 1,
+                 cache: Optional[BaseLLMCache] = None, batch_selection: bool = False,
+                 selection_batch_size: int = 10, gateway: Optional[LLMGateway] = None,
+                 prefilter: Optional[PreFilter] = None, response_format: Optional[str] = None,
+                 fused: bool = False):
+        """
+        concurrency: max number of sentences whose Selection → Disambiguation →
+        Decomposition chain may be in flight at once. 1 keeps the original
+        sequential behaviour. The semaphore is shared by every extract() call
+        on this instance, so it also bounds concurrent requests.
+
+        cache: optional response cache (see llm_cache.py). Calls run at
+        temperature=0, so identical requests are answered from the cache.
+
+        batch_selection: judge the sentences of an answer in chunks of
+        selection_batch_size with one SELECTION_BATCH request per chunk instead
+        of one request per sentence; only survivors go on to Disambiguation.
+
+        gateway: LLM gateway the requests go through (default: the shared one,
+        so Claimify and the searches share its connections and rate limits).
+
+        prefilter: local rules / classifier (claim_prefilter.py) that reject
+        obvious non-claims before Selection, without an LLM call.
+
+        response_format: "json_schema" or "json_object" to have every stage
+        answer with a JSON object (the *_JSON prompts, validated against
+        CLAIMIFY_SCHEMAS, asked again once when invalid) instead of the
+        free-text format scanned line by line. None keeps the text prompts.
+
+        fused: run Disambiguation and Decomposition of a selected sentence as
+        one DISAMBIGUATION_DECOMPOSITION request instead of two in a row
+        (default for extract(); each call can override it).
+        """
+        if gateway is None and not os.getenv("GRAPHRAG_API_KEY"):
+            raise EnvironmentError("Missing GRAPHRAG_API_KEY environment variable.")
+        if response_format not in (None, *RESPONSE_FORMATS):
+            raise ValueError(f"response_format must be one of {RESPONSE_FORMATS} or None")
         self.model = model
         self.p = p
         self.f = f
+        self.concurrency = max(1, concurrency)
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self.cache = cache
+        self.batch_selection = batch_selection
+        self.selection_batch_size = max(1, selection_batch_size)
+        self.gateway = gateway or llm_gateway.shared()
+        self.prefilter = prefilter
+        self.response_format = response_format
+        self.fused = fused
+
+    @property
+    def structured(self) -> bool:
+        return self.response_format is not None
+
+    async def _ask(self, system_prompt: str, user_prompt: str, stage: str = "chat",
+                   response_format: Optional[dict] = None, parse: Optional[Callable[[str], Any]] = None) -> Any:
+        """
+        The reply to one chat request, through the cache. With `parse`, the
+        parsed reply is returned instead, and a reply it rejects (ValueError)
+        is not cached.
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        params: Dict[str, Any] = {"temperature": 0}
+        if response_format is not None:
+            params["response_format"] = response_format
+        key = None
+        if self.cache is not None:
+            key = cache_key(f"chat_{stage}", self.model, messages, **params)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                if (stats := _stats.get()) is not None:
+                    stats.cache_hits += 1
+                return parse(cached) if parse is not None else cached
+
+        with telemetry.span("llm"):
+            res = await self.gateway.chat(model=self.model, messages=messages, **params)
+        usage = res.usage
+        telemetry.record_llm_usage(f"claimify_{stage}", usage.prompt_tokens if usage else 0,
+                                   usage.completion_tokens if usage else 0)
+        if (stats := _stats.get()) is not None:
+            stats.llm_calls += 1
+            stats.prompt_tokens += usage.prompt_tokens if usage else 0
+            stats.completion_tokens += usage.completion_tokens if usage else 0
+        content = (res.choices[0].message.content or "").strip()
+        result = parse(content) if parse is not None else content
+
+        if key is not None:
+            await self.cache.aset(key, content, {"model": self.model, "messages": messages, **params})
+        return result
+
+    def _response_format(self, stage: str) -> dict:
+        if self.response_format == "json_object":
+            return {"type": "json_object"}
+        return {"type": "json_schema",
+                "json_schema": {"name": f"claimify_{stage}", "schema": CLAIMIFY_SCHEMAS[stage], "strict": True}}
+
+    async def _ask_json(self, system_prompt: str, user_prompt: str, stage: str) -> Optional[dict]:
+        """
+        A structured reply validated against CLAIMIFY_SCHEMAS[stage]. An invalid
+        reply is asked for once more, with the validation error appended to the
+        prompt; None when the retry is invalid too.
+        """
+        schema = CLAIMIFY_SCHEMAS[stage]
+        fmt = self._response_format(stage)
+        stats = _stats.get()
+        try:
+            return await self._ask(system_prompt, user_prompt, stage, fmt, lambda c: parse_structured(c, schema))
+        except ValueError as e:
+            error = str(e)
+        if stats is not None:
+            stats.parse_retries += 1
+        telemetry.CLAIMIFY_PARSE_ERRORS.inc(stage=stage, outcome="retried")
+        retry_prompt = (f"{user_prompt}\nYour previous reply could not be used ({error}). "
+                        f"Reply with only the JSON object described above.\n")
+        try:
+            return await self._ask(system_prompt, retry_prompt, stage, fmt, lambda c: parse_structured(c, schema))
+        except ValueError as e:
+            log.warning("Claimify %s reply still invalid after a retry: %s", stage, e)
+        if stats is not None:
+            stats.parse_failures += 1
+        telemetry.CLAIMIFY_PARSE_ERRORS.inc(stage=stage, outcome="failed")
+        return None
 
-    async def _ask(self, system_prompt: str, user_prompt: str) -> str:
-        res = await client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0,
+    def _context_window(self, sents: SentenceTable, idx: int) -> str:
+        # p sentences before and f after, built for the whole answer at once
+        return sents.windows(self.p, self.f)[idx]
+
+    async def _select(self, question: str, sents: SentenceTable, i: int) -> bool:
+        ctx = self._context_window(sents, i)
+        sel_prompt = USER_PROMPT_SELECTION.format(sentence=sents[i], context=ctx, question=question)
+        if self.structured:
+            reply = await self._ask_json(SELECTION_JSON, sel_prompt, stage="selection")
+            return reply is not None and "Does NOT contain" not in reply["verdict"]
+        sel_result = await self._ask(SELECTION, sel_prompt, stage="selection")
+        return "Does NOT contain" not in sel_result
+
+    @staticmethod
+    def _parse_batch_selection(result: str) -> Dict[int, bool]:
+        """
+        Map sentence id -> selected from a SELECTION_BATCH reply. Accepts the
+        requested JSON array (optionally inside a ``` fence) and falls back to
+        "<id>: <verdict>" lines. Ids without a verdict are simply absent.
+        """
+        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", result.strip())
+        verdicts: Dict[int, bool] = {}
+        try:
+            items = json.loads(text)
+            if isinstance(items, dict):
+                items = items.get("verdicts", [])
+            for item in items:
+                verdicts[int(item["id"])] = "Does NOT contain" not in str(item["verdict"])
+            return verdicts
+        except (ValueError, TypeError, KeyError):
+            pass
+        for line in text.splitlines():
+            m = re.match(r"^\s*\[?(\d+)\]?\s*[:.)-]\s*(.+)$", line)
+            if m and "contain" in m.group(2).lower():
+                verdicts[int(m.group(1))] = "Does NOT contain" not in m.group(2)
+        return verdicts
+
+    async def _select_batch(self, question: str, sents: SentenceTable, indices: List[int]) -> Dict[int, bool]:
+        items = "\n".join(
+            USER_PROMPT_SELECTION_BATCH_ITEM.format(id=n, context=self._context_window(sents, i), sentence=sents[i])
+            for n, i in enumerate(indices, start=1)
         )
-        return res.choices[0].message.content.strip()
+        user_prompt = USER_PROMPT_SELECTION_BATCH.format(question=question, sentences=items)
+        if self.structured:
+            reply = await self._ask_json(SELECTION_BATCH_JSON, user_prompt, stage="selection_batch")
+            verdicts = {v["id"]: "Does NOT contain" not in v["verdict"] for v in (reply or {}).get("verdicts", [])}
+        else:
+            verdicts = self._parse_batch_selection(await self._ask(SELECTION_BATCH, user_prompt, stage="selection_batch"))
 
-    def _context_window(self, sents: List[str], idx: int) -> str:
-        start, end = max(0, idx - self.p), min(len(sents), idx + self.f + 1)
-        return " ".join(sents[start:idx] + sents[idx + 1:end])
+        selected = {}
+        for n, i in enumerate(indices, start=1):
+            if n in verdicts:
+                selected[i] = verdicts[n]
+            else:
+                # the model skipped this one – judge it on its own rather than drop it
+                selected[i] = await self._select(question, sents, i)
+        return selected
 
-    async def extract(self, question: str, answer: str) -> List[str]:
-        sents = split_text(answer)
-        claims = []
+    async def _acquire(self) -> None:
+        t0 = time.perf_counter()
+        await self._sem.acquire()
+        telemetry.record_queue_wait("claimify", time.perf_counter() - t0)
 
-        for i, sent in enumerate(sents):
-            ctx = self._context_window(sents, i)
+    async def _select_batch_bounded(self, question: str, sents: SentenceTable, indices: List[int]) -> Dict[int, bool]:
+        await self._acquire()
+        try:
+            return await self._select_batch(question, sents, indices)
+        finally:
+            self._sem.release()
 
-            # 1. Selection
-            sel_prompt = USER_PROMPT_SELECTION.format(sentence=sent, context=ctx, question=question)
-            sel_result = await self._ask(SELECTION, sel_prompt)
-            if "Does NOT contain" in sel_result:
-                continue
+    @staticmethod
+    def _parse_disambiguation(result: str) -> Optional[str]:
+        """
+        The sentence after the last "DecontextualizedSentence:" of a text
+        DISAMBIGUATION reply, on the same line or (as the prompt's format has
+        it) the next non-empty one; None when it cannot be decontextualized.
+        """
+        if "Cannot be decontextualized" in result:
+            return None
+        lines = result.splitlines()
+        at = next((n for n in range(len(lines) - 1, -1, -1) if lines[n].startswith("DecontextualizedSentence:")), None)
+        if at is None:
+            return None
+        rest = [lines[at].replace("DecontextualizedSentence:", "")] + lines[at + 1:]
+        sentence = next((l.strip() for l in rest if l.strip()), None)
+        return None if sentence is None or sentence.startswith("Cannot") else sentence
 
-            # 2. Disambiguation
-            dis_prompt = USER_PROMPT_DISAMBIGUATION.format(sentence=sent, context=ctx, question=question)
-            dis_result = await self._ask(DISAMBIGUATION, dis_prompt)
-            if "Cannot be decontextualized" in dis_result:
-                continue
+    async def _disambiguate_and_decompose(self, question: str, sents: SentenceTable, i: int) -> List[str]:
+        sent = sents[i]
+        ctx = self._context_window(sents, i)
 
-            # Extract Decontextualized Sentence
-            decontext_line = next(
-                (l for l in reversed(dis_result.splitlines()) if l.startswith("DecontextualizedSentence:")),
-                None
+        # 2. Disambiguation
+        dis_prompt = USER_PROMPT_DISAMBIGUATION.format(sentence=sent, context=ctx, question=question)
+        if self.structured:
+            reply = await self._ask_json(DISAMBIGUATION_JSON, dis_prompt, stage="disambiguation")
+            if reply is None or not reply["decontextualized"] or not (reply["sentence"] or "").strip():
+                return []
+            decontext_sent = reply["sentence"].strip()
+        else:
+            decontext_sent = self._parse_disambiguation(
+                await self._ask(DISAMBIGUATION, dis_prompt, stage="disambiguation")
             )
-            if not decontext_line or "Cannot" in decontext_line:
-                continue
-            decontext_sent = decontext_line.replace("DecontextualizedSentence:", "").strip()
-
-            # 3. Decomposition
-            dec_prompt = USER_PROMPT_DECOMPOSITION.format(sentence=decontext_sent, context=ctx, question=question)
-            dec_result = await self._ask(DECOMPOSITION, dec_prompt)
-
-            # Extract claims from output
-            inside_block = False
-            for line in dec_result.splitlines():
-                if line.strip().startswith("["):
-                    inside_block = True
-                    continue
-                if line.strip().startswith("]"):
-                    break
-                if inside_block and line.strip().startswith('"'):
-                    claims.append(line.strip().strip('",'))
+            if decontext_sent is None:
+                return []
+
+        # 3. Decomposition
+        dec_prompt = USER_PROMPT_DECOMPOSITION.format(sentence=decontext_sent, context=ctx, question=question)
+        if self.structured:
+            reply = await self._ask_json(DECOMPOSITION_JSON, dec_prompt, stage="decomposition")
+            return [p.strip() for p in (reply or {}).get("propositions", []) if p.strip()]
+        dec_result = await self._ask(DECOMPOSITION, dec_prompt, stage="decomposition")
+
+        return self._parse_decomposition(dec_result)
 
+    @staticmethod
+    def _parse_decomposition(result: str) -> List[str]:
+        """The quoted lines of the first [...] block of a text DECOMPOSITION reply."""
+        claims = []
+        inside_block = False
+        for line in result.splitlines():
+            if line.strip().startswith("["):
+                inside_block = True
+                continue
+            if line.strip().startswith("]"):
+                break
+            if inside_block and line.strip().startswith('"'):
+                claims.append(line.strip().strip('",'))
         return claims
+
+    async def _disambiguate_decompose_fused(self, question: str, sents: SentenceTable, i: int) -> List[str]:
+        # 2+3. one request: decontextualized sentence and its propositions
+        prompt = USER_PROMPT_DISAMBIGUATION_DECOMPOSITION.format(
+            sentence=sents[i], context=self._context_window(sents, i), question=question
+        )
+        if self.structured:
+            reply = await self._ask_json(DISAMBIGUATION_DECOMPOSITION_JSON, prompt, stage="disambiguation_decomposition")
+            if reply is None or not reply["decontextualized"]:
+                return []
+            return [p.strip() for p in reply["propositions"] if p.strip()]
+        result = await self._ask(DISAMBIGUATION_DECOMPOSITION, prompt, stage="disambiguation_decomposition")
+        if self._parse_disambiguation(result) is None:
+            return []
+        # the propositions follow the sentence; the reasoning before it may contain "[...]"
+        return self._parse_decomposition(result.rsplit("DecontextualizedSentence:", 1)[1])
+
+    async def _process_sentence(self, question: str, sents: SentenceTable, i: int, selected: bool = False,
+                                fused: bool = False) -> List[str]:
+        # 1. Selection (skipped when a batched selection already kept the sentence)
+        if not selected and not await self._select(question, sents, i):
+            return []
+        if fused:
+            return await self._disambiguate_decompose_fused(question, sents, i)
+        return await self._disambiguate_and_decompose(question, sents, i)
+
+    async def _process_sentence_bounded(self, question: str, sents: SentenceTable, i: int,
+                                        selected: bool = False, fused: bool = False) -> List[str]:
+        await self._acquire()
+        try:
+            return await self._process_sentence(question, sents, i, selected, fused)
+        finally:
+            self._sem.release()
+
+    async def _run(self, question: str, sents: SentenceTable, indices: List[int], selected: bool = False,
+                   bounded: bool = False, fused: bool = False) -> List[List[str]]:
+        if self.concurrency == 1 and not bounded:
+            return [await self._process_sentence(question, sents, i, selected, fused) for i in indices]
+        # one task per sentence; gather keeps results in sentence order
+        return await asyncio.gather(
+            *(self._process_sentence_bounded(question, sents, i, selected, fused) for i in indices)
+        )
+
+    async def _batch_selected_indices(self, question: str, sents: SentenceTable, indices: List[int]) -> List[int]:
+        size = self.selection_batch_size
+        chunks = [indices[k:k + size] for k in range(0, len(indices), size)]
+        results = await asyncio.gather(*(self._select_batch_bounded(question, sents, c) for c in chunks))
+        selected = {i: keep for r in results for i, keep in r.items()}
+        return [i for i in indices if selected.get(i)]
+
+    def _prefilter(self, sents: SentenceTable, stats: Optional[ExtractionStats]) -> List[int]:
+        """Indices that go to Selection; rejections and the calls they save are recorded."""
+        candidates, rejected = self.prefilter.keep(sents.sentences)
+        if self.batch_selection:
+            size = self.selection_batch_size
+            saved = math.ceil(len(sents) / size) - math.ceil(len(candidates) / size)
+        else:
+            saved = len(sents) - len(candidates)
+        for reason, count in rejected.items():
+            telemetry.PREFILTERED.inc(count, reason=reason)
+        telemetry.LLM_CALLS_SAVED.inc(saved, model="claimify_selection")
+        if stats is not None:
+            stats.prefiltered += len(sents) - len(candidates)
+            stats.llm_calls_saved += saved
+        return candidates
+
+    async def extract(self, question: str, answer: str, bounded: bool = False,
+                      fused: Optional[bool] = None) -> List[str]:
+        """
+        bounded: also run the sentences through the shared semaphore when
+        concurrency is 1, so concurrent extract() calls queue for the same
+        `concurrency` slots instead of each running its own sequential chain.
+
+        fused: one Disambiguation+Decomposition request per selected sentence
+        (None = the instance's `fused`).
+        """
+        fused = self.fused if fused is None else fused
+        sents = split_answer(answer)
+        stats = _stats.get()
+        if stats is not None:
+            stats.sentences += len(sents)
+        candidates = self._prefilter(sents, stats) if self.prefilter is not None else list(range(len(sents)))
+
+        if self.batch_selection:
+            survivors = await self._batch_selected_indices(question, sents, candidates)
+            per_sentence = await self._run(question, sents, survivors, selected=True, bounded=bounded, fused=fused)
+        else:
+            per_sentence = await self._run(question, sents, candidates, bounded=bounded, fused=fused)
+        return [claim for claims in per_sentence for claim in claims]
+
+    async def _extract_item(self, index: int, question: str, answer: str, fused: Optional[bool]) -> Extraction:
+        # runs in its own task, so the stats ContextVar is private to this item
+        result = Extraction(index=index)
+        _stats.set(result.stats)
+        t0 = time.perf_counter()
+        try:
+            result.claims = await self.extract(question, answer, bounded=True, fused=fused)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.stats.seconds = round(time.perf_counter() - t0, 3)
+        return result
+
+    async def extract_many(self, items: Sequence[Tuple[str, str]],
+                           fused: Optional[bool] = None) -> AsyncIterator[Extraction]:
+        """
+        Extract claims from many (question, answer) pairs, yielding each
+        Extraction as soon as it is finished. The sentences of all items are
+        scheduled together on the instance's `concurrency` slots, so a batch
+        takes about as long as its sentences need at that concurrency, not
+        one answer after the other. A failing item is reported in its
+        `error` and does not stop the others. `fused` as for extract().
+        """
+        # split all answers (and build their context windows) in one go, off the event loop;
+        # extract() then finds them in split_answer's memo
+        await asyncio.to_thread(split_many, [answer for _, answer in items], self.p, self.f)
+        tasks = [asyncio.create_task(self._extract_item(i, q, a, fused)) for i, (q, a) in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
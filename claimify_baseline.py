@@ -1,8 +1,8 @@
 # graphrag_claimify/claimify.py
-from openai import AsyncOpenAI
 from typing import List
 from prompt import SELECTION, DISAMBIGUATION, DECOMPOSITION
 from splitter import split_text
+import llm_gateway
 import os 
 '''
 use open ai 
@@ -59,14 +59,12 @@ api_key = os.getenv("GRAPHRAG_API_KEY")
 if not api_key:
     raise EnvironmentError("Missing GRAPHRAG_API_KEY environment variable.")
 
-client = AsyncOpenAI(api_key=api_key)
-
 class Claimify:
     def __init__(self, model: str = "gpt-4o-mini", p: int = 2, f: int = 2):
         self.model, self.p, self.f = model, p, f
 
     async def _ask(self, prompt: str) -> str:
-        res = await client.chat.completions.create(
+        res = await llm_gateway.shared().chat(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
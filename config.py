@@ -1,4 +1,103 @@
 PROJECT_DIRECTORY = "indexbox"
 COMMUNITY_LEVEL = 2
 CLAIM_EXTRACTION_ENABLED = True
-RESPONSE_TYPE = "Single Paragraph"
\ No newline at end of file
+RESPONSE_TYPE = "Single Paragraph"
+CLAIMIFY_CONCURRENCY = 25  # max sentences processed in parallel (cf. concurrent_requests in settings.yaml)
+CLAIMIFY_BATCH_SELECTION = True   # one Selection request per chunk of sentences instead of per sentence
+CLAIMIFY_SELECTION_BATCH_SIZE = 10
+CLAIMIFY_MAX_BATCH_ITEMS = 100     # (question, answer) pairs per /claims/extract request
+# Claimify stages answer with JSON validated against prompt.CLAIMIFY_SCHEMAS (one retry when invalid):
+# "json_schema" (strict structured output), "json_object" (JSON mode), or None for the free-text prompts
+CLAIMIFY_RESPONSE_FORMAT = "json_schema"
+CLAIMIFY_FUSED = False   # one Disambiguation+Decomposition call per selected sentence (per request: "fused")
+
+# Local pre-filter before Claimify's Selection call (claim_prefilter.py): headings, bare
+# citations, "the dataset does not contain information" sentences, ... are rejected without an LLM call
+CLAIMIFY_PREFILTER_ENABLED = True
+CLAIMIFY_PREFILTER_RULES = None          # None = all claim_prefilter.RULES, or a list of rule names
+CLAIMIFY_PREFILTER_MODEL = None          # classifier under PROJECT_DIRECTORY from benchmarks/eval_prefilter.py --train
+CLAIMIFY_PREFILTER_THRESHOLD = 0.05      # the classifier rejects sentences with P(claim) below this
+
+# Claim verification against the index (claim_verifier.py): claims are embedded in one batch and
+# matched against text unit / covariate embeddings; only claims between the thresholds go to an LLM judge.
+# Thresholds are cosine similarities and depend on the embedding model (these suit text-embedding-3).
+CLAIM_VERIFY_TOP_K = 3                    # evidence passages and covariates per claim
+CLAIM_VERIFY_SUPPORT_THRESHOLD = 0.72     # best text unit at or above: supported
+CLAIM_VERIFY_COVARIATE_THRESHOLD = 0.85   # best covariate at or above: its status (TRUE / FALSE) decides
+CLAIM_VERIFY_UNSUPPORTED_THRESHOLD = 0.40 # all evidence below: unsupported
+CLAIM_VERIFY_JUDGE_BATCH_SIZE = 10        # ambiguous claims per judge request
+CLAIM_VERIFY_MAX_CLAIMS = 500             # claims per /claims/verify request
+
+# Claimify LLM response cache (stored under <PROJECT_DIRECTORY>/<CLAIMIFY_CACHE_DIR>)
+CLAIMIFY_CACHE_ENABLED = True
+CLAIMIFY_CACHE_DIR = "cache/claimify"
+CLAIMIFY_CACHE_MAX_ENTRIES = 2048       # in-memory LRU size
+CLAIMIFY_CACHE_MAX_DISK_ENTRIES = None  # None = unbounded
+CLAIMIFY_CACHE_TTL_SECONDS = None       # None = never expire
+
+# Result cache in front of /search/* (invalidated when the output folder changes)
+SEARCH_CACHE_ENABLED = True
+SEARCH_CACHE_MAX_ENTRIES = 256
+SEARCH_CACHE_TTL_SECONDS = None
+SEARCH_CACHE_SIMILARITY_THRESHOLD = None  # e.g. 0.95 to also answer paraphrases (embeds each query)
+
+# Global search report pre-filter (report_ranking.py): only the best-ranked reports
+# (embedding similarity + BM25 + rank) go to the map step
+GLOBAL_PREFILTER_ENABLED = True
+GLOBAL_PREFILTER_TOP_K = 16             # reports sent to the map step
+GLOBAL_PREFILTER_MAX_TOKENS = 48_000    # and at most this many tokens of report content (None = no budget)
+GLOBAL_PREFILTER_WEIGHTS = {"semantic": 0.6, "keyword": 0.25, "rank": 0.15}
+GLOBAL_LEVEL_SELECTION = "auto"         # "all" | "auto" (no report together with its ancestor) | "dynamic" (graphrag, LLM-rated)
+
+# Query embeddings (embeddings.py): shared by all searches, deduplicated, micro-batched
+# and cached (stored under <PROJECT_DIRECTORY>/<EMBEDDING_CACHE_DIR>, None = memory only)
+EMBEDDING_SERVICE_ENABLED = True
+EMBEDDING_CACHE_DIR = "cache/query_embeddings"
+EMBEDDING_CACHE_MAX_ENTRIES = 10_000      # in-memory LRU size
+EMBEDDING_CACHE_MAX_DISK_ENTRIES = 100_000
+EMBEDDING_BATCH_WINDOW_SECONDS = 0.005    # how long a miss waits for others to share its request
+EMBEDDING_MAX_BATCH_SIZE = 64             # texts per embeddings request
+
+# Shared LLM gateway (llm_gateway.py): one OpenAI client and connection pool for Claimify and
+# the search chat / embedding calls, with the per-model concurrent_requests / requests_per_minute /
+# tokens_per_minute of settings.yaml applied across all of them
+LLM_GATEWAY_ENABLED = True      # False = searches use graphrag's own clients (Claimify always uses the gateway)
+LLM_MAX_CONNECTIONS = 100       # HTTP connection pool size
+LLM_TIMEOUT_SECONDS = 180
+LLM_MAX_RETRIES = 6             # on 429 / 5xx / timeouts, honouring retry-after
+LLM_MAX_BACKOFF_SECONDS = 60
+LLM_COALESCE_REQUESTS = True    # identical chat requests in flight share one API call
+
+# Startup: with STARTUP_BACKGROUND_LOAD the server answers /status and /ready at once and
+# sets up the models, loads the index tables and imports graphrag.api in the background;
+# requests that need the index wait up to STARTUP_READY_TIMEOUT_SECONDS, then get a 503
+STARTUP_BACKGROUND_LOAD = True
+STARTUP_READY_TIMEOUT_SECONDS = 30
+
+# "pandas": read parquet into each worker; "arrow": memory-map Arrow copies shared by all workers
+INDEX_STORE_BACKEND = "pandas"
+
+# local / DRIFT search on the precomputed adjacency index (graph_index.py) instead of graphrag.api
+GRAPH_INDEX_ENABLED = True
+
+# "lancedb": graphrag's LanceDB store (scans the table per query);
+# "numpy": vector_index.py, memory-mapped float32 copies of the same tables
+VECTOR_STORE_BACKEND = "lancedb"
+VECTOR_INDEX_TYPE = "exact"   # "exact" or "ivf" (approximate; numpy backend only)
+VECTOR_IVF_LISTS = None       # None = 4 * sqrt(rows)
+VECTOR_IVF_NPROBE = 8         # lists scanned per query: higher = better recall, slower
+VECTOR_IVF_MIN_ROWS = 20_000  # smaller tables are always searched exactly
+
+# Observability (telemetry.py): /metrics is always on
+SERVER_TIMING_ENABLED = True   # Server-Timing header with the request's spans
+PROFILER_ENABLED = False       # GET /debug/profile (sampling profiler); enable only while debugging
+PROFILER_MAX_SECONDS = 30
+
+INDEX_JOB_WORKERS = 1  # indexing jobs (worker processes) allowed to run at once
+
+# /upload/new_file and resumable /upload/sessions (None = no limit)
+UPLOAD_CHUNK_SIZE = 1024 * 1024                  # bytes copied per read/write
+UPLOAD_MAX_FILE_BYTES = 1024 * 1024 * 1024       # 1 GiB per file
+UPLOAD_MAX_TOTAL_BYTES = 4 * 1024 * 1024 * 1024  # 4 GiB per request
+UPLOAD_SESSION_DIR = "cache/uploads"             # partial resumable uploads
+UPLOAD_SESSION_TTL_SECONDS = 24 * 3600           # abandoned sessions are removed after this
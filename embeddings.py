@@ -0,0 +1,207 @@
+import asyncio
+import base64
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import telemetry
+from llm_cache import BaseLLMCache, cache_key
+
+'''
+Shared query-embedding service.
+
+Every search embeds its query (and DRIFT every follow-up query) through the
+embedding model from settings.yaml. EmbeddingService sits in front of that
+model for the whole API process:
+
+- cache        : vectors are kept in an llm_cache cache (bounded LRU, and with
+                 a cache dir one file per vector, so they survive restarts),
+                 keyed by cache_key("embedding", model, [text]); the value is
+                 the base64 of the float32 vector.
+- deduplicate  : a text already being embedded is not requested again; the
+                 second caller waits for the first request.
+- micro-batch  : misses are collected for `window_seconds` (or until
+                 `max_batch_size` texts) and sent as one embeddings request.
+
+The service runs on its own event loop thread, because graphrag calls the
+synchronous EmbeddingModel.embed() from inside its async search code: sync
+callers block on a future, async callers await it, and the underlying model
+is only ever used from that one loop.
+
+CachedEmbeddingModel exposes the service through graphrag's EmbeddingModel
+interface and is registered in graphrag's ModelManager under the names the
+query factory and graph_index.py look up, so local, DRIFT and basic search all
+go through it. Its prefetch() lets DRIFT embed all follow-up queries of a
+step in one request before the local searches ask for them one by one.
+'''
+
+EmbedBatchFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+# ModelManager names graphrag's query factory (and graph_index.py) use
+SEARCH_EMBEDDING_NAMES = {
+    "local_search_embedding": "local_search",
+    "drift_search_embedding": "drift_search",
+    "basic_search_embedding": "basic_search",
+}
+
+
+def encode_vector(vector: Sequence[float]) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_vector(value: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+
+class EmbeddingService:
+    def __init__(self, embed_batch: EmbedBatchFn, model: str, cache: Optional[BaseLLMCache] = None,
+                 window_seconds: float = 0.005, max_batch_size: int = 64):
+        self.embed_batch = embed_batch
+        self.model = model
+        self.cache = cache
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.counters = {"texts": 0, "cache_hits": 0, "deduplicated": 0, "embedded": 0, "batches": 0, "errors": 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # only touched on the service loop
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: List[Tuple[str, str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    # ---- public API (any thread / any loop) ----
+    async def aembed_many(self, texts: Sequence[str]) -> List[np.ndarray]:
+        return await asyncio.wrap_future(self._submit(texts))
+
+    def embed_many(self, texts: Sequence[str]) -> List[np.ndarray]:
+        return self._submit(texts).result()
+
+    def close(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            **self.counters,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    # ---- service loop ----
+    def _submit(self, texts: Sequence[str]):
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name=f"embeddings-{self.model}", daemon=True
+                )
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(self._embed(list(texts)), self._loop)
+
+    async def _embed(self, texts: List[str]) -> List[np.ndarray]:
+        loop = asyncio.get_running_loop()
+        self.counters["texts"] += len(texts)
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        waits = []
+        for i, text in enumerate(texts):
+            key = cache_key("embedding", self.model, [text])
+            cached = await self.cache.aget(key) if self.cache is not None else None
+            if cached is not None:
+                self.counters["cache_hits"] += 1
+                results[i] = decode_vector(cached)
+                continue
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.counters["deduplicated"] += 1
+            else:
+                fut = self._inflight[key] = loop.create_future()
+                self._queue.append((key, text, fut))
+            waits.append((i, fut))
+
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._queue and self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        for i, fut in waits:
+            results[i] = await asyncio.shield(fut)
+        return results
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            batch, self._queue = self._queue[:self.max_batch_size], self._queue[self.max_batch_size:]
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        self.counters["batches"] += 1
+        self.counters["embedded"] += len(batch)
+        try:
+            vectors = await self.embed_batch([text for _, text, _ in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"expected {len(batch)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            self.counters["errors"] += 1
+            for key, _, fut in batch:
+                self._inflight.pop(key, None)
+                fut.set_exception(e)
+            return
+        for (key, text, fut), vector in zip(batch, vectors):
+            value = encode_vector(vector)
+            self._inflight.pop(key, None)
+            fut.set_result(decode_vector(value))
+            if self.cache is not None:
+                await self.cache.aset(key, value, {"model": self.model, "text": text})
+
+
+class CachedEmbeddingModel:
+    """graphrag EmbeddingModel backed by an EmbeddingService."""
+
+    def __init__(self, service: EmbeddingService, config: Any = None):
+        self.service = service
+        self.config = config
+
+    async def aembed_batch(self, text_list: List[str], **kwargs) -> List[List[float]]:
+        with telemetry.span("embedding"):
+            return [v.tolist() for v in await self.service.aembed_many(text_list)]
+
+    async def aembed(self, text: str, **kwargs) -> List[float]:
+        with telemetry.span("embedding"):
+            return (await self.service.aembed_many([text]))[0].tolist()
+
+    def embed_batch(self, text_list: List[str], **kwargs) -> List[List[float]]:
+        with telemetry.span("embedding"):
+            return [v.tolist() for v in self.service.embed_many(text_list)]
+
+    def embed(self, text: str, **kwargs) -> List[float]:
+        with telemetry.span("embedding"):
+            return self.service.embed_many([text])[0].tolist()
+
+    async def prefetch(self, texts: Sequence[str]) -> None:
+        """Embed `texts` in one batch so later embed() calls are cache hits."""
+        if texts and self.service.cache is not None:
+            await self.service.aembed_many(texts)
+
+
+def register_search_embedders(config, make_service: Callable[[Any], EmbeddingService]) -> Dict[str, EmbeddingService]:
+    """
+    One EmbeddingService per embedding model of the local / DRIFT / basic search
+    configs (make_service(model settings)), registered in graphrag's ModelManager.
+    """
+    from graphrag.language_model.manager import ModelManager
+
+    services: Dict[str, EmbeddingService] = {}
+    manager = ModelManager()
+    for name, section in SEARCH_EMBEDDING_NAMES.items():
+        model_id = getattr(config, section).embedding_model_id
+        settings = config.get_language_model_config(model_id)
+        if model_id not in services:
+            services[model_id] = make_service(settings)
+        manager.embedding_models[name] = CachedEmbeddingModel(services[model_id], settings)
+    return services
@@ -0,0 +1,415 @@
+import copy
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import tiktoken
+from graphrag.callbacks.noop_query_callbacks import NoopQueryCallbacks
+from graphrag.config.embeddings import (
+    community_full_content_embedding,
+    entity_description_embedding,
+)
+from graphrag.language_model.manager import ModelManager
+from graphrag.language_model.providers.fnllm.utils import (
+    get_openai_model_parameters_from_config,
+)
+from graphrag.query.context_builder.entity_extraction import EntityVectorStoreKey
+from graphrag.query.indexer_adapters import (
+    read_indexer_covariates,
+    read_indexer_entities,
+    read_indexer_relationships,
+    read_indexer_report_embeddings,
+    read_indexer_reports,
+    read_indexer_text_units,
+)
+from graphrag.query.structured_search.drift_search.drift_context import (
+    DRIFTSearchContextBuilder,
+)
+from graphrag.query.structured_search.drift_search.search import DRIFTSearch
+from graphrag.query.structured_search.local_search.mixed_context import (
+    LocalSearchMixedContext,
+)
+from graphrag.query.structured_search.local_search.search import LocalSearch
+from graphrag.utils.api import get_embedding_store, load_search_prompt
+
+'''
+Precomputed graph index for local and DRIFT search.
+
+graphrag.api.local_search / drift_search rebuild every Entity, Relationship,
+TextUnit and CommunityReport object from the DataFrames on each query, and
+LocalSearchMixedContext then scans the whole relationship list once per
+selected entity (relationship context, out-of-network ranking, text unit
+ranking) and the whole claim list once per selected entity. Both grow with
+the index, not with the answer.
+
+GraphIndex is built once per snapshot (index_store.load_snapshot) with numpy:
+
+- CSR incidence: node ids for every entity title / relationship endpoint,
+  `indptr` and, per node, the relationship rows and neighbour nodes touching
+  it, so the relationships of k entities cost O(sum of their degrees);
+- entity -> text unit postings;
+- community membership (community -> entity titles, entity -> communities).
+
+IndexedLocalContext is LocalSearchMixedContext with the same ranking code,
+but it hands graphrag's context functions only the relationships and claims
+incident to the selected entities (in their original order, so ties sort the
+same way) instead of the full lists. The graphrag objects and context
+builders are created once per snapshot and community level and reused.
+
+DRIFT runs on PrefetchingDRIFTSearch: each step's follow-up queries are
+embedded in one request (when the embedder has prefetch(), see
+embeddings.py) before the local searches embed them one at a time.
+'''
+
+
+class GraphIndex:
+    def __init__(self, nodes: pd.Index, indptr: np.ndarray, edges: np.ndarray, neighbors: np.ndarray,
+                 text_units: Dict[str, List[str]], entity_communities: Dict[str, List[str]],
+                 community_entities: Dict[str, List[str]]):
+        self.nodes = nodes                # node id -> entity title / endpoint name
+        self.indptr = indptr              # node i owns edges[indptr[i]:indptr[i + 1]]
+        self.edges = edges                # relationship row numbers
+        self.neighbors = neighbors        # node at the other end of each edge
+        self._text_units = text_units
+        self._entity_communities = entity_communities
+        self._community_entities = community_entities
+
+    @classmethod
+    def build(cls, entities: pd.DataFrame, relationships: pd.DataFrame,
+              communities: Optional[pd.DataFrame] = None) -> "GraphIndex":
+        titles = entities["title"] if "title" in entities.columns else pd.Series([], dtype=object)
+        sources = relationships["source"] if "source" in relationships.columns else pd.Series([], dtype=object)
+        targets = relationships["target"] if "target" in relationships.columns else pd.Series([], dtype=object)
+        nodes = pd.Index(pd.unique(pd.concat([titles, sources, targets], ignore_index=True).astype(object)))
+
+        nodes.get_indexer(nodes[:1])  # build the title hash table now, not on the first query
+        src = nodes.get_indexer(sources.astype(object))
+        dst = nodes.get_indexer(targets.astype(object))
+        rows = np.arange(len(relationships), dtype=np.int64)
+        # every relationship is listed under both endpoints (once for a self-loop)
+        loop = src == dst
+        owner = np.concatenate([src, dst[~loop]])
+        edges = np.concatenate([rows, rows[~loop]])
+        other = np.concatenate([dst, src[~loop]])
+        order = np.argsort(owner, kind="stable")
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owner, minlength=len(nodes)), out=indptr[1:])
+
+        text_units = {}
+        if "text_unit_ids" in entities.columns:
+            for title, ids in zip(titles, entities["text_unit_ids"]):
+                text_units[title] = list(ids) if ids is not None else []
+
+        entity_communities: Dict[str, List[str]] = defaultdict(list)
+        community_entities: Dict[str, List[str]] = {}
+        if communities is not None and {"community", "entity_ids"} <= set(communities.columns) \
+                and "id" in entities.columns:
+            title_of = dict(zip(entities["id"], titles))
+            for community, entity_ids in zip(communities["community"], communities["entity_ids"]):
+                members = [title_of[e] for e in (entity_ids if entity_ids is not None else []) if e in title_of]
+                community_entities[str(community)] = members
+                for title in members:
+                    entity_communities[title].append(str(community))
+
+        return cls(nodes, indptr, edges[order], other[order], text_units,
+                   dict(entity_communities), community_entities)
+
+    def node(self, title: str) -> int:
+        return int(self.nodes.get_indexer([title])[0])
+
+    def degree(self, title: str) -> int:
+        i = self.node(title)
+        return int(self.indptr[i + 1] - self.indptr[i]) if i >= 0 else 0
+
+    def incident_edges(self, titles: Iterable[str]) -> np.ndarray:
+        """Sorted relationship rows with a source or target in `titles`."""
+        ids = self.nodes.get_indexer(list(titles))
+        parts = [self.edges[self.indptr[i]:self.indptr[i + 1]] for i in ids if i >= 0]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def neighbors_of(self, title: str) -> List[str]:
+        i = self.node(title)
+        if i < 0:
+            return []
+        return list(self.nodes[np.unique(self.neighbors[self.indptr[i]:self.indptr[i + 1]])])
+
+    def text_unit_ids(self, title: str) -> List[str]:
+        return self._text_units.get(title, [])
+
+    def communities_of(self, title: str) -> List[str]:
+        return self._entity_communities.get(title, [])
+
+    def community_members(self, community: Any) -> List[str]:
+        return self._community_entities.get(str(community), [])
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "nodes": len(self.nodes),
+            "edges": int(len(self.edges)),
+            "max_degree": int(np.diff(self.indptr).max()) if len(self.nodes) else 0,
+            "communities": len(self._community_entities),
+        }
+
+
+# ─────────────── Local search context ──────────────── #
+def _detached(obj):
+    """Shallow copy with its own attributes dict (graphrag writes ranking scratch values into it)."""
+    obj = copy.copy(obj)
+    if obj.attributes is not None:
+        obj.attributes = dict(obj.attributes)
+    return obj
+
+
+class IndexedLocalContext(LocalSearchMixedContext):
+    """LocalSearchMixedContext that only looks at the selected entities' neighbourhood."""
+
+    def __init__(self, graph: GraphIndex, relationships: list, covariates: Optional[dict] = None, **kwargs):
+        super().__init__(relationships=relationships, covariates=covariates, **kwargs)
+        self.graph = graph
+        # row order of relationships.parquet == order of the list and of GraphIndex.edges
+        self.relationship_rows = relationships
+        self.covariates_by_subject = {
+            name: _group_by_subject(values) for name, values in (covariates or {}).items()
+        }
+
+    def _view(self, selected_entities: list) -> "IndexedLocalContext":
+        titles = [entity.title for entity in selected_entities]
+        view = copy.copy(self)
+        view.relationships = {}
+        for row in self.graph.incident_edges(titles):
+            rel = _detached(self.relationship_rows[row])
+            view.relationships[rel.id] = rel
+        view.covariates = {}
+        for name, by_subject in self.covariates_by_subject.items():
+            # build_covariates_context takes its header from the first claim of
+            # the full list, so that one always stays in front
+            rows = dict(by_subject.get(None, ()))
+            for title in titles:
+                rows.update(by_subject.get(title, ()))
+            view.covariates[name] = [rows[pos] for pos in sorted(rows)]
+        return view
+
+    def _build_local_context(self, selected_entities, *args, **kwargs):
+        view = self._view(selected_entities)
+        return super(IndexedLocalContext, view)._build_local_context(selected_entities, *args, **kwargs)
+
+    def _build_text_unit_context(self, selected_entities, *args, **kwargs):
+        view = self._view(selected_entities)
+        return super(IndexedLocalContext, view)._build_text_unit_context(selected_entities, *args, **kwargs)
+
+
+def _group_by_subject(covariates: list) -> Dict[Optional[str], list]:
+    """subject -> [(position, covariate)]; None -> the first covariate."""
+    grouped: Dict[Optional[str], list] = defaultdict(list)
+    for pos, cov in enumerate(covariates):
+        grouped[cov.subject_id].append((pos, cov))
+    if covariates:
+        grouped[None] = [(0, covariates[0])]
+    return dict(grouped)
+
+
+# ─────────────── Search engines ──────────────── #
+@dataclass
+class SearchData:
+    """graphrag objects for one snapshot and community level, built once."""
+    entities: list
+    relationships: list
+    text_units: list
+    reports: list
+    covariates: list
+    local_context: Optional[IndexedLocalContext] = None
+    drift_context: Optional[IndexedLocalContext] = None
+    report_embeddings_loaded: bool = False
+
+
+def build_search_data(snapshot, community_level: int) -> SearchData:
+    return SearchData(
+        entities=read_indexer_entities(snapshot.entities, snapshot.communities, community_level),
+        relationships=read_indexer_relationships(snapshot.relationships),
+        text_units=read_indexer_text_units(snapshot.text_units),
+        reports=read_indexer_reports(snapshot.community_reports, snapshot.communities, community_level),
+        covariates=read_indexer_covariates(snapshot.covariates) if snapshot.covariates is not None else [],
+    )
+
+
+def _embedding_store(config, embedding_name: str):
+    args = {index: store.model_dump() for index, store in config.vector_store.items()}
+    return get_embedding_store(config_args=args, embedding_name=embedding_name)
+
+
+def _models(config, chat_model_id: str, embedding_model_id: str, chat_name: str, embedding_name: str):
+    """Same model instances graphrag's query factory uses (ModelManager keys them by name)."""
+    chat_settings = config.get_language_model_config(chat_model_id)
+    chat_model = ModelManager().get_or_create_chat_model(
+        name=chat_name, model_type=chat_settings.type, config=chat_settings
+    )
+    embedding_settings = config.get_language_model_config(embedding_model_id)
+    embedding_model = ModelManager().get_or_create_embedding_model(
+        name=embedding_name, model_type=embedding_settings.type, config=embedding_settings
+    )
+    return chat_settings, chat_model, embedding_model, tiktoken.get_encoding(chat_settings.encoding_model)
+
+
+def local_context(config, data: SearchData, graph: GraphIndex, drift: bool = False) -> IndexedLocalContext:
+    """Context builder for local (with claims) or DRIFT (without, as in graphrag) search; cached on `data`."""
+    cached = data.drift_context if drift else data.local_context
+    if cached is not None:
+        return cached
+    search_config = config.drift_search if drift else config.local_search
+    _, _, embedding_model, encoding = _models(
+        config, search_config.chat_model_id, search_config.embedding_model_id,
+        "drift_search_chat" if drift else "local_search_chat",
+        "drift_search_embedding" if drift else "local_search_embedding",
+    )
+    context = IndexedLocalContext(
+        graph=graph,
+        community_reports=data.reports,
+        text_units=data.text_units,
+        entities=data.entities,
+        relationships=data.relationships,
+        covariates=None if drift else {"claims": data.covariates},
+        entity_text_embeddings=_embedding_store(config, entity_description_embedding),
+        embedding_vectorstore_key=EntityVectorStoreKey.ID,
+        text_embedder=embedding_model,
+        # graphrag's DRIFT builder leaves the encoder unset for its local context
+        token_encoder=None if drift else encoding,
+    )
+    if drift:
+        data.drift_context = context
+    else:
+        data.local_context = context
+    return context
+
+
+def load_report_embeddings(config, data: SearchData) -> None:
+    """DRIFT's primer needs the community report embeddings; read them once."""
+    if not data.report_embeddings_loaded:
+        read_indexer_report_embeddings(data.reports, _embedding_store(config, community_full_content_embedding))
+        data.report_embeddings_loaded = True
+
+
+_prepare_lock = threading.Lock()
+
+
+def prepare(snapshot, config, community_level: int, method: str) -> SearchData:
+    """
+    Objects and context builder `method` ("local" / "drift") needs, built on
+    first use and kept on the snapshot. Blocking; run it on a worker thread.
+    """
+    with _prepare_lock:
+        key = ("search_data", community_level)
+        data = snapshot.derived.get(key)
+        if data is None:
+            data = snapshot.derived[key] = build_search_data(snapshot, community_level)
+        local_context(config, data, snapshot.graph, drift=method == "drift")
+        if method == "drift":
+            load_report_embeddings(config, data)
+        return data
+
+
+def local_search_streaming(config, data: SearchData, graph: GraphIndex, response_type: str,
+                           query: str, callbacks: Optional[list] = None) -> AsyncGenerator:
+    """graphrag.api.local_search_streaming on prebuilt objects (same engine parameters)."""
+    ls = config.local_search
+    chat_settings, chat_model, _, token_encoder = _models(
+        config, ls.chat_model_id, ls.embedding_model_id, "local_search_chat", "local_search_embedding"
+    )
+    engine = LocalSearch(
+        model=chat_model,
+        system_prompt=load_search_prompt(config.root_dir, ls.prompt),
+        context_builder=local_context(config, data, graph),
+        token_encoder=token_encoder,
+        model_params=get_openai_model_parameters_from_config(chat_settings),
+        context_builder_params={
+            "text_unit_prop": ls.text_unit_prop,
+            "community_prop": ls.community_prop,
+            "conversation_history_max_turns": ls.conversation_history_max_turns,
+            "conversation_history_user_turns_only": True,
+            "top_k_mapped_entities": ls.top_k_entities,
+            "top_k_relationships": ls.top_k_relationships,
+            "include_entity_rank": True,
+            "include_relationship_weight": True,
+            "include_community_rank": False,
+            "return_candidate_context": False,
+            "embedding_vectorstore_key": EntityVectorStoreKey.ID,
+            "max_context_tokens": ls.max_context_tokens,
+        },
+        response_type=response_type,
+        callbacks=callbacks,
+    )
+    return engine.stream_search(query=query)
+
+
+class PrefetchingDRIFTSearch(DRIFTSearch):
+    async def _search_step(self, global_query: str, search_engine, actions: list) -> list:
+        prefetch = getattr(search_engine.context_builder.text_embedder, "prefetch", None)
+        if prefetch is not None:
+            await prefetch([action.query for action in actions])
+        return await super()._search_step(global_query, search_engine, actions)
+
+
+def drift_search_streaming(config, data: SearchData, graph: GraphIndex, response_type: str,
+                           query: str, callbacks: Optional[list] = None) -> AsyncGenerator:
+    """graphrag.api.drift_search_streaming on prebuilt objects."""
+    ds = config.drift_search
+    _, chat_model, embedding_model, token_encoder = _models(
+        config, ds.chat_model_id, ds.embedding_model_id, "drift_search_chat", "drift_search_embedding"
+    )
+    context = local_context(config, data, graph, drift=True)
+    engine = PrefetchingDRIFTSearch(
+        model=chat_model,
+        context_builder=DRIFTSearchContextBuilder(
+            model=chat_model,
+            text_embedder=embedding_model,
+            entities=data.entities,
+            relationships=data.relationships,
+            reports=data.reports,
+            entity_text_embeddings=context.entity_text_embeddings,
+            text_units=data.text_units,
+            local_system_prompt=load_search_prompt(config.root_dir, ds.prompt),
+            reduce_system_prompt=load_search_prompt(config.root_dir, ds.reduce_prompt),
+            config=ds,
+            response_type=response_type,
+            local_mixed_context=context,
+        ),
+        token_encoder=token_encoder,
+        callbacks=callbacks,
+    )
+    return engine.stream_search(query=query)
+
+
+async def _collect(stream, callbacks: Optional[list]) -> tuple:
+    """(response, context) like graphrag.api.local_search / drift_search."""
+    context_data: Any = {}
+
+    def on_context(context: Any) -> None:
+        nonlocal context_data
+        context_data = context
+
+    collector = NoopQueryCallbacks()
+    collector.on_context = on_context
+    response = ""
+    async for chunk in stream(callbacks=[*(callbacks or []), collector]):
+        response += chunk
+    return response, context_data
+
+
+async def local_search(config, data: SearchData, graph: GraphIndex, response_type: str,
+                       query: str, callbacks: Optional[list] = None) -> tuple:
+    return await _collect(
+        lambda callbacks: local_search_streaming(config, data, graph, response_type, query, callbacks),
+        callbacks,
+    )
+
+
+async def drift_search(config, data: SearchData, graph: GraphIndex, response_type: str,
+                       query: str, callbacks: Optional[list] = None) -> tuple:
+    return await _collect(
+        lambda callbacks: drift_search_streaming(config, data, graph, response_type, query, callbacks),
+        callbacks,
+    )
@@ -0,0 +1,197 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from graph_index import GraphIndex
+from search_cache import index_fingerprint
+
+'''
+Immutable snapshot of the GraphRAG output tables.
+
+api.py keeps exactly one IndexSnapshot in app.state.index and replaces it with
+a single assignment, so a request that grabbed the snapshot at its start sees
+a consistent set of tables (never new entities with old relationships) even if
+/reload swaps in a new one while it is still running.
+
+load_snapshot() reads all parquet files in parallel on worker threads, so the
+event loop keeps serving requests while a reload is in progress. The graph
+index (graph_index.GraphIndex) is built right after, also off the loop.
+
+With backend="arrow" the parquet files are converted once to uncompressed
+Arrow IPC (Feather v2) files under output/.arrow/ and memory-mapped. String
+columns stay Arrow-backed (pd.StringDtype("pyarrow")), so the text-heavy
+columns are not copied into each process: every uvicorn worker maps the same
+file and shares it through the page cache. Nested and numeric columns are
+converted to regular pandas columns because graphrag's indexer adapters
+(explode / groupby-agg) do not handle ArrowDtype for those.
+'''
+
+ARROW_SUBDIR = ".arrow"
+
+
+TABLES = (
+    "entities",
+    "relationships",
+    "documents",
+    "text_units",
+    "communities",
+    "community_reports",
+    "covariates",
+)
+
+
+def load_parquet_safe(path: Path, empty_cols: list[str] | None = None):
+    """
+    Load a parquet file if it exists and is non-empty; otherwise return an
+    empty DataFrame with the supplied columns (or 0-col DF if None).
+    """
+    if path.exists() and path.stat().st_size:
+        return pd.read_parquet(path)
+    return pd.DataFrame(columns=empty_cols or [])
+
+
+def ensure_arrow(parquet_path: Path, arrow_dir: Path) -> Optional[Path]:
+    """
+    Return the Arrow IPC copy of a parquet file, (re)converting it when it is
+    missing or older than the parquet. None if the parquet does not exist.
+    """
+    if not (parquet_path.exists() and parquet_path.stat().st_size):
+        return None
+    arrow_path = arrow_dir / (parquet_path.stem + ".arrow")
+    if arrow_path.exists() and arrow_path.stat().st_mtime_ns >= parquet_path.stat().st_mtime_ns:
+        return arrow_path
+    arrow_dir.mkdir(parents=True, exist_ok=True)
+    # several workers may convert at once; each writes its own temp file and
+    # the rename makes whichever finishes last win with a complete file
+    tmp = arrow_dir / f".{arrow_path.name}.{os.getpid()}.tmp"
+    feather.write_feather(pq.read_table(parquet_path), tmp, compression="uncompressed")
+    os.replace(tmp, arrow_path)
+    return arrow_path
+
+
+def _arrow_types(t: pa.DataType):
+    if pa.types.is_string(t) or pa.types.is_large_string(t):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+class ArrowIndexStore:
+    """Memory-mapped, column-projected access to the output tables."""
+
+    def __init__(self, output_dir: Path, arrow_dir: Optional[Path] = None):
+        self.output_dir = Path(output_dir)
+        self.arrow_dir = Path(arrow_dir) if arrow_dir else self.output_dir / ARROW_SUBDIR
+
+    def path(self, name: str) -> Optional[Path]:
+        return ensure_arrow(self.output_dir / f"{name}.parquet", self.arrow_dir)
+
+    def table(self, name: str, columns: Optional[Sequence[str]] = None) -> Optional[pa.Table]:
+        """Zero-copy Arrow table backed by the mapped file (None if the table does not exist)."""
+        path = self.path(name)
+        if path is None:
+            return None
+        table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        return table.select(list(columns)) if columns is not None else table
+
+    def frame(self, name: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """DataFrame view; string columns reference the mapped file instead of copying it."""
+        table = self.table(name, columns)
+        if table is None:
+            return pd.DataFrame(columns=list(columns or []))
+        return table.to_pandas(types_mapper=_arrow_types)
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    entities: pd.DataFrame
+    relationships: pd.DataFrame
+    documents: pd.DataFrame
+    text_units: pd.DataFrame
+    communities: pd.DataFrame
+    community_reports: pd.DataFrame
+    covariates: Optional[pd.DataFrame]
+    fingerprint: str = ""
+    loaded_at: float = field(default_factory=time.time)
+    # table -> {"rows": int, "seconds": float}
+    load_stats: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # set when loaded with backend="arrow"; gives column-projected views
+    store: Optional[ArrowIndexStore] = None
+    graph: Optional[GraphIndex] = None
+    # per-snapshot derived objects (graph_index.prepare); dropped with the snapshot
+    derived: Dict[Any, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "backend": "arrow" if self.store is not None else "pandas",
+            "fingerprint": self.fingerprint,
+            "loaded_at": self.loaded_at,
+            "tables": self.load_stats,
+            "graph": self.graph.summary() if self.graph is not None else None,
+        }
+
+
+def _timed(load, *args) -> tuple[pd.DataFrame, float]:
+    t0 = time.perf_counter()
+    df = load(*args)
+    return df, time.perf_counter() - t0
+
+
+async def load_snapshot(output_dir: Path, include_covariates: bool = True,
+                        backend: str = "pandas") -> IndexSnapshot:
+    """Read every table on a worker thread (in parallel) and build a snapshot."""
+    fingerprint = index_fingerprint(output_dir)
+    names = [n for n in TABLES if include_covariates or n != "covariates"]
+    if backend == "arrow":
+        store = ArrowIndexStore(output_dir)
+        loads = [asyncio.to_thread(_timed, store.frame, name) for name in names]
+    elif backend == "pandas":
+        store = None
+        loads = [asyncio.to_thread(_timed, load_parquet_safe, output_dir / f"{name}.parquet") for name in names]
+    else:
+        raise ValueError(f"Unknown index store backend: {backend}")
+    results = await asyncio.gather(*loads)
+    tables = {name: df for name, (df, _) in zip(names, results)}
+    stats = {name: {"rows": len(df), "seconds": round(sec, 4)} for name, (df, sec) in zip(names, results)}
+    graph, sec = await asyncio.to_thread(
+        _timed, GraphIndex.build, tables["entities"], tables["relationships"], tables["communities"]
+    )
+    stats["graph"] = {"rows": len(graph.edges), "seconds": round(sec, 4)}
+    return IndexSnapshot(
+        entities=tables["entities"],
+        relationships=tables["relationships"],
+        documents=tables["documents"],
+        text_units=tables["text_units"],
+        communities=tables["communities"],
+        community_reports=tables["community_reports"],
+        covariates=tables.get("covariates"),
+        fingerprint=fingerprint,
+        load_stats=stats,
+        store=store,
+        graph=graph,
+    )
+
+
+def empty_snapshot(previous: Optional[IndexSnapshot] = None, fingerprint: str = "") -> IndexSnapshot:
+    """Snapshot with zero-row tables, keeping the previous column layout if known."""
+
+    def blank(name: str):
+        df = getattr(previous, name, None) if previous is not None else None
+        if name == "covariates" and previous is not None and df is None:
+            return None
+        return df.iloc[0:0] if df is not None else pd.DataFrame()
+
+    tables = {name: blank(name) for name in TABLES}
+    return IndexSnapshot(
+        **tables,
+        graph=GraphIndex.build(tables["entities"], tables["relationships"]),
+        fingerprint=fingerprint,
+        load_stats={name: {"rows": 0, "seconds": 0.0} for name in TABLES},
+    )
@@ -0,0 +1,101 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from uploads import safe_name
+
+'''
+Incremental indexing helpers for /index/update.
+
+GraphRAG's update run (build_index(..., is_update_run=True)) only processes
+input documents whose title is not yet in documents.parquet: it chunks and
+extracts the delta into a separate storage, then merges documents, text
+units, entities, relationships, covariates, communities, community reports
+and embeddings into the existing output.
+
+Here we decide which uploaded documents actually need that work by comparing
+content hashes with documents.parquet (same id GraphRAG computes for text
+inputs: sha512 of the text):
+
+- unchanged : same title and same content        -> skipped
+- new       : title not in the index             -> staged as-is
+- changed   : same title, different content      -> staged under a versioned
+  title, because GraphRAG keys the delta on title. The previous version stays
+  in the index until the next full re-index (reported as `stale_titles`).
+'''
+
+
+def document_id(text: str) -> str:
+    """Document id as GraphRAG's text loader computes it (sha512 of the text)."""
+    return hashlib.sha512(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class DocumentDelta:
+    new: Dict[str, str] = field(default_factory=dict)        # title -> text
+    changed: Dict[str, str] = field(default_factory=dict)    # title -> text
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.new and not self.changed
+
+
+def diff_documents(uploads: Dict[str, str], documents: pd.DataFrame) -> DocumentDelta:
+    """Classify uploaded documents (title -> text) against documents.parquet."""
+    known_ids = set(documents["id"]) if "id" in documents.columns else set()
+    known_titles = set(documents["title"]) if "title" in documents.columns else set()
+
+    delta = DocumentDelta()
+    for title, text in uploads.items():
+        if document_id(text) in known_ids:
+            delta.unchanged.append(title)
+        elif title in known_titles:
+            delta.changed[title] = text
+        else:
+            delta.new[title] = text
+    return delta
+
+
+def versioned_title(title: str, text: str) -> str:
+    stem, suffix = Path(title).stem, Path(title).suffix
+    return f"{stem}__v{document_id(text)[:8]}{suffix}"
+
+
+def stage_documents(delta: DocumentDelta, input_dir: Path, file_pattern: str,
+                    encoding: str = "utf-8") -> Dict[str, List[str]]:
+    """
+    Write new/changed documents into the GraphRAG input folder. Titles must be
+    bare file names (see uploads.safe_name); anything with a directory part
+    raises ValueError before a file is written.
+    """
+    input_dir.mkdir(parents=True, exist_ok=True)
+    pattern = re.compile(file_pattern)
+    staged, skipped = [], []
+
+    items = list(delta.new.items()) + [
+        (versioned_title(title, text), text) for title, text in delta.changed.items()
+    ]
+    for title, _ in items:
+        if safe_name(title) != title:
+            raise ValueError(f"Invalid file name: {title!r}")
+    for title, text in items:
+        if not pattern.search(title):
+            skipped.append(title)
+            continue
+        (input_dir / title).write_text(text, encoding=encoding)
+        staged.append(title)
+
+    return {"staged": staged, "skipped": skipped, "stale_titles": list(delta.changed)}
+
+
+def summarize_run(outputs: List[Any]) -> List[Dict[str, Any]]:
+    """PipelineRunResult list -> JSON-friendly summary."""
+    return [
+        {"workflow": o.workflow, "errors": [str(e) for e in (o.errors or [])]}
+        for o in outputs
+    ]
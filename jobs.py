@@ -0,0 +1,269 @@
+import asyncio
+import multiprocessing as mp
+import queue
+import time
+import traceback
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import telemetry
+from indexing import summarize_run
+
+'''
+In-process job subsystem for GraphRAG indexing runs.
+
+Each job runs graphrag.api.build_index in its own spawned worker process, so
+neither the LLM fan-out nor the CPU-heavy graph steps share the API's event
+loop or GIL. At most `max_workers` worker processes run at once (a process
+pool); a process per job is used instead of concurrent.futures so a running
+job can actually be cancelled (terminated).
+
+The worker reports back through a multiprocessing queue:
+    {"type": "workflow_start" | "workflow_end", "workflow": ...}
+    {"type": "progress", "workflow": ..., "percent": ..., "completed_items": ..., "total_items": ...}
+    {"type": "llm", "calls": ..., "input_tokens": ..., "output_tokens": ..., "cache_hits": ...}
+    {"type": "warning" | "error", "message": ...}
+    {"type": "result", "workflows": [...]}
+The parent appends every message to the job's event log; /jobs/{id}/events
+replays the log and then follows it live.
+
+Note: cancelling a full (non-update) build leaves the output folder partially
+rewritten; the in-memory index is only replaced after a successful run.
+'''
+
+PROGRESS_INTERVAL = 0.5  # seconds between progress events per workflow
+
+
+def _index_worker(project_dir: str, method: str, is_update_run: bool, events) -> None:
+    """Entry point of the worker process."""
+    from pathlib import Path
+
+    import graphrag.api as api
+    from graphrag.callbacks.noop_workflow_callbacks import NoopWorkflowCallbacks
+    from graphrag.config.enums import IndexingMethod
+    from graphrag.config.load_config import load_config
+    from graphrag.language_model.providers.fnllm.events import FNLLMEvents
+
+    llm = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cache_hits": 0}
+
+    # count LLM usage in this process only: graphrag routes every fnllm model's
+    # events through FNLLMEvents
+    async def on_execute_llm(self) -> None:
+        llm["calls"] += 1
+
+    async def on_usage(self, usage) -> None:
+        llm["input_tokens"] += usage.input_tokens
+        llm["output_tokens"] += usage.output_tokens
+
+    async def on_cache_hit(self, cache_key, name) -> None:
+        llm["cache_hits"] += 1
+
+    FNLLMEvents.on_execute_llm = on_execute_llm
+    FNLLMEvents.on_usage = on_usage
+    FNLLMEvents.on_cache_hit = on_cache_hit
+
+    class QueueCallbacks(NoopWorkflowCallbacks):
+        def __init__(self):
+            self.workflow = None
+            self.last_progress = 0.0
+
+        def pipeline_start(self, names: list[str]) -> None:
+            events.put({"type": "pipeline_start", "workflows": names})
+
+        def workflow_start(self, name: str, instance: object) -> None:
+            self.workflow = name
+            events.put({"type": "workflow_start", "workflow": name})
+
+        def workflow_end(self, name: str, instance: object) -> None:
+            events.put({"type": "workflow_end", "workflow": name})
+            events.put({"type": "llm", **llm})
+
+        def progress(self, progress) -> None:
+            now = time.monotonic()
+            done = progress.total_items and progress.completed_items == progress.total_items
+            if now - self.last_progress < PROGRESS_INTERVAL and not done:
+                return
+            self.last_progress = now
+            events.put({
+                "type": "progress",
+                "workflow": self.workflow,
+                "percent": progress.percent,
+                "completed_items": progress.completed_items,
+                "total_items": progress.total_items,
+            })
+            events.put({"type": "llm", **llm})
+
+        def error(self, message: str, cause=None, stack=None, details=None) -> None:
+            events.put({"type": "error", "message": message, "cause": str(cause) if cause else None})
+
+        def warning(self, message: str, details=None) -> None:
+            events.put({"type": "warning", "message": message})
+
+    try:
+        config = load_config(Path(project_dir))
+        outputs = asyncio.run(api.build_index(
+            config=config,
+            method=IndexingMethod(method),
+            is_update_run=is_update_run,
+            callbacks=[QueueCallbacks()],
+        ))
+        events.put({"type": "llm", **llm})
+        events.put({"type": "result", "workflows": summarize_run(outputs)})
+    except BaseException as e:
+        events.put({"type": "error", "message": str(e), "traceback": traceback.format_exc()})
+        raise SystemExit(1)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str = "queued"  # queued | running | completed | failed | cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    llm: Dict[str, int] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+    _process: Any = field(default=None, repr=False)
+    _cancel_requested: bool = field(default=False, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def public(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+            "llm": self.llm,
+            "events": len(self.events),
+        }
+
+    async def _emit(self, event: Dict[str, Any]) -> None:
+        event = {"time": time.time(), **event}
+        if event["type"] == "llm":
+            self.llm = {k: v for k, v in event.items() if k not in ("type", "time")}
+        self.events.append(event)
+        async with self._changed:
+            self._changed.notify_all()
+
+
+class JobManager:
+    def __init__(self, project_dir: str, max_workers: int = 1,
+                 on_success: Optional[Callable[[Job], Awaitable[None]]] = None):
+        self.project_dir = project_dir
+        self.on_success = on_success
+        self._slots = asyncio.Semaphore(max_workers)
+        self._ctx = mp.get_context("spawn")
+        self.jobs: Dict[str, Job] = {}
+
+    def submit_index(self, method: str = "standard", is_update_run: bool = False,
+                     extra: Optional[Dict[str, Any]] = None) -> Job:
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind="index",
+            params={"method": method, "is_update_run": is_update_run, **(extra or {})},
+        )
+        self.jobs[job.id] = job
+        job._task = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    async def _run(self, job: Job) -> None:
+        async with self._slots:
+            if job.status == "cancelled":
+                return
+            job.status, job.started_at = "running", time.time()
+            telemetry.record_queue_wait("index_jobs", job.started_at - job.created_at)
+            await job._emit({"type": "status", "status": job.status})
+
+            events = self._ctx.Queue()
+            proc = self._ctx.Process(
+                target=_index_worker,
+                args=(self.project_dir, job.params["method"], job.params["is_update_run"], events),
+                daemon=True,
+            )
+            job._process = proc
+            proc.start()
+
+            # pump worker messages into the job log without blocking the loop
+            while True:
+                try:
+                    msg = await asyncio.to_thread(events.get, True, 0.5)
+                except queue.Empty:
+                    if not proc.is_alive():
+                        break
+                    continue
+                await job._emit(msg)
+                if msg["type"] == "result":
+                    job.result = {"workflows": msg["workflows"]}
+            await asyncio.to_thread(proc.join)
+
+        if job._cancel_requested:
+            job.status = "cancelled"
+        elif proc.exitcode != 0:
+            job.status = "failed"
+            job.error = next((e["message"] for e in reversed(job.events) if e["type"] == "error"),
+                             f"worker exited with code {proc.exitcode}")
+        elif any(w["errors"] for w in (job.result or {}).get("workflows", [])):
+            job.status = "failed"
+            job.error = "one or more workflows reported errors"
+        else:
+            try:
+                if self.on_success is not None:
+                    await self.on_success(job)
+                job.status = "completed"
+            except Exception as e:
+                job.status, job.error = "failed", f"reload after indexing failed: {e}"
+        job.finished_at = time.time()
+        await job._emit({"type": "status", "status": job.status, "error": job.error})
+
+    async def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._cancel_requested = True
+        if job.status == "running":
+            # _run notices the dead process and finishes the job as cancelled
+            if job._process is not None and job._process.is_alive():
+                job._process.terminate()
+        else:
+            job.status, job.finished_at = "cancelled", time.time()
+            await job._emit({"type": "status", "status": job.status})
+        return True
+
+    async def follow(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Replay a job's events, then yield new ones until it finishes."""
+        job = self.jobs[job_id]
+        idx = 0
+        while True:
+            while idx < len(job.events):
+                yield job.events[idx]
+                idx += 1
+            if job.finished and idx >= len(job.events):
+                return
+            async with job._changed:
+                await job._changed.wait_for(lambda: len(job.events) > idx or job.finished)
+
+    def shutdown(self) -> None:
+        for job in self.jobs.values():
+            if job._process is not None and job._process.is_alive():
+                job._process.terminate()
@@ -0,0 +1,269 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+'''
+Content-addressed cache for deterministic (temperature=0) chat completions.
+
+Keys are built the same way GraphRAG names the files under indexbox/cache/*:
+    <prefix>_<sha256 of the request>_v2
+e.g. chat_selection_3f1a..._v2, so a cache directory is easy to inspect and
+can be wiped per stage with a glob.
+
+Backends
+- MemoryLLMCache : bounded LRU in process memory
+- FileLLMCache   : one JSON file per key ({"result": ..., "input": ...}) like GraphRAG
+- TieredLLMCache : memory in front of disk; disk hits are promoted to memory
+
+All backends support an optional TTL and keep hit/miss counters (see stats()).
+get / set are blocking; code on an event loop uses aget / aset, which only
+run the disk part on a worker thread (a memory hit never leaves the loop).
+'''
+
+CACHE_VERSION = "v2"
+
+
+def cache_key(prefix: str, model: str, messages: list, **params: Any) -> str:
+    """Hash of everything that determines the response of a deterministic call."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, **params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{prefix}_{digest}_{CACHE_VERSION}"
+
+
+class BaseLLMCache(ABC):
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    @abstractmethod
+    def _lookup(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def _store(self, key: str, value: str, request: Optional[Dict[str, Any]]) -> None:
+        ...
+
+    def _count(self, value: Optional[str]) -> Optional[str]:
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        return self._count(self._lookup(key))
+
+    def set(self, key: str, value: str, request: Optional[Dict[str, Any]] = None) -> None:
+        self._store(key, value, request)
+
+    async def aget(self, key: str) -> Optional[str]:
+        return self._count(await asyncio.to_thread(self._lookup, key))
+
+    async def aset(self, key: str, value: str, request: Optional[Dict[str, Any]] = None) -> None:
+        await asyncio.to_thread(self._store, key, value, request)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class MemoryLLMCache(BaseLLMCache):
+    def __init__(self, max_entries: int = 2048, ttl_seconds: Optional[float] = None):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, created = item
+            if self._expired(created):
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _store(self, key: str, value: str, request: Optional[Dict[str, Any]] = None,
+               created: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, created or time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    async def aget(self, key: str) -> Optional[str]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str, request: Optional[Dict[str, Any]] = None) -> None:
+        self._store(key, value, request)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+        super().clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "entries": len(self._data), "max_entries": self.max_entries}
+
+
+class FileLLMCache(BaseLLMCache):
+    def __init__(self, cache_dir: Path, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        super().__init__(ttl_seconds)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._stores_since_prune = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def read(self, key: str) -> Optional[tuple[str, float]]:
+        """Return (value, created) without touching the counters."""
+        path = self._path(key)
+        try:
+            doc = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        created = doc.get("created", path.stat().st_mtime)
+        if self._expired(created):
+            path.unlink(missing_ok=True)
+            return None
+        return doc["result"], created
+
+    def _lookup(self, key: str) -> Optional[str]:
+        item = self.read(key)
+        return item[0] if item else None
+
+    def _store(self, key: str, value: str, request: Optional[Dict[str, Any]] = None) -> None:
+        doc = {"result": value, "input": request or {}, "created": time.time()}
+        # write-then-rename so concurrent readers never see a half-written file
+        tmp = self._path(f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._path(key))
+
+        if self.max_entries is not None:
+            self._stores_since_prune += 1
+            # pruning lists the directory, so only do it every so often
+            if self._stores_since_prune >= max(1, self.max_entries // 10):
+                self._stores_since_prune = 0
+                self.prune()
+
+    def prune(self) -> int:
+        """Drop expired files, then the oldest ones beyond max_entries."""
+        files = [p for p in self.cache_dir.iterdir() if p.is_file() and not p.name.startswith(".")]
+        removed = 0
+        if self.ttl_seconds is not None:
+            cutoff = time.time() - self.ttl_seconds
+            for p in [p for p in files if p.stat().st_mtime < cutoff]:
+                p.unlink(missing_ok=True)
+                files.remove(p)
+                removed += 1
+        if self.max_entries is not None and len(files) > self.max_entries:
+            files.sort(key=lambda p: p.stat().st_mtime)
+            for p in files[: len(files) - self.max_entries]:
+                p.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for p in self.cache_dir.iterdir():
+            if p.is_file():
+                p.unlink(missing_ok=True)
+        super().clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "cache_dir": str(self.cache_dir), "max_entries": self.max_entries}
+
+
+class TieredLLMCache(BaseLLMCache):
+    """In-memory LRU in front of a FileLLMCache."""
+
+    def __init__(self, memory: MemoryLLMCache, disk: FileLLMCache):
+        super().__init__(memory.ttl_seconds)
+        self.memory = memory
+        self.disk = disk
+        self.disk_hits = 0
+
+    def _promote(self, key: str, item: Optional[tuple[str, float]]) -> Optional[str]:
+        if item is None:
+            return None
+        value, created = item
+        self.memory._store(key, value, created=created)
+        with self._lock:
+            self.disk_hits += 1
+        return value
+
+    def _lookup(self, key: str) -> Optional[str]:
+        value = self.memory._lookup(key)
+        if value is not None:
+            return value
+        return self._promote(key, self.disk.read(key))
+
+    def _store(self, key: str, value: str, request: Optional[Dict[str, Any]] = None) -> None:
+        self.memory._store(key, value)
+        self.disk._store(key, value, request)
+
+    async def aget(self, key: str) -> Optional[str]:
+        value = self.memory._lookup(key)
+        if value is None:
+            value = self._promote(key, await asyncio.to_thread(self.disk.read, key))
+        return self._count(value)
+
+    async def aset(self, key: str, value: str, request: Optional[Dict[str, Any]] = None) -> None:
+        self.memory._store(key, value)
+        await asyncio.to_thread(self.disk._store, key, value, request)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+        self.disk_hits = 0
+        super().clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "disk_hits": self.disk_hits,
+            "entries": len(self.memory._data),
+            "max_entries": self.memory.max_entries,
+            "cache_dir": str(self.disk.cache_dir),
+            "max_disk_entries": self.disk.max_entries,
+        }
+
+
+def build_llm_cache(cache_dir: Optional[Path], max_entries: int = 2048,
+                    max_disk_entries: Optional[int] = None,
+                    ttl_seconds: Optional[float] = None) -> BaseLLMCache:
+    """Memory-only cache when cache_dir is None, otherwise memory + disk."""
+    memory = MemoryLLMCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if cache_dir is None:
+        return memory
+    disk = FileLLMCache(cache_dir, max_entries=max_disk_entries, ttl_seconds=ttl_seconds)
+    return TieredLLMCache(memory, disk)
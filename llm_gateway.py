@@ -0,0 +1,461 @@
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+import telemetry
+from llm_cache import cache_key
+
+'''
+Shared LLM gateway.
+
+One OpenAI client (and one HTTP connection pool) for every LLM call of the
+process: Claimify, and - via GatewayChatModel and the embedding service - the
+search chat and embedding calls. Per model name it applies the limits
+configured in settings.yaml:
+
+- concurrent_requests : at most this many requests in flight.
+- requests_per_minute,
+  tokens_per_minute   : token buckets refilled continuously; a request takes
+                        1 request and its estimated tokens (prompt chars / 4 +
+                        max_tokens) and the estimate is corrected with the
+                        usage the response reports.
+- 429 / 5xx / timeouts: retried up to `max_retries` times, waiting what the
+                        server asks for (retry-after-ms / retry-after) or an
+                        exponential backoff with jitter. A 429 also pauses
+                        every other request for that model until the wait is
+                        over, instead of letting them run into the same 429.
+- coalescing          : identical chat requests in flight at the same time
+                        share one API call (not for streams).
+
+The gateway runs on its own event loop thread (as EmbeddingService does), so
+callers on any loop or thread - uvicorn's, fnllm's sync runner, the embedding
+service - share the same pool, limits and in-flight requests.
+'''
+
+OPENAI_CHAT_TYPES = ("openai_chat",)
+OPENAI_EMBEDDING_TYPES = ("openai_embedding",)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def estimate_tokens(params: Dict[str, Any]) -> int:
+    """Rough token count of a chat or embeddings request, as the rate limiter sees it."""
+    if "messages" in params:
+        chars = sum(len(str(m.get("content") or "")) for m in params["messages"])
+        completion = params.get("max_completion_tokens") or params.get("max_tokens") or 0
+        return chars // 4 + 4 * len(params["messages"]) + completion
+    texts = params.get("input", [])
+    texts = [texts] if isinstance(texts, str) else texts
+    return sum(len(str(t)) for t in texts) // 4 + 1
+
+
+def retry_after(headers: Optional[httpx.Headers]) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said so."""
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            date = email.utils.parsedate_to_datetime(value)
+            return max(0.0, date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """`per_minute` units, refilled continuously; at most one minute's worth is banked."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self, amount: float) -> None:
+        # a request bigger than the bucket could never fit: let it drain the bucket
+        amount = min(amount, self.capacity)
+        async with self._lock:  # first come, first served
+            self._refill()
+            while self.level < amount:
+                await asyncio.sleep((amount - self.level) / self.rate)
+                self._refill()
+            self.level -= amount
+
+    def adjust(self, amount: float) -> None:
+        """Take (or, negative, give back) `amount` after the fact; the level may go into debt."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class ModelLimits:
+    def __init__(self, concurrent_requests: Optional[int] = None, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None):
+        self.concurrent_requests = concurrent_requests or None
+        self.requests_per_minute = requests_per_minute or None
+        self.tokens_per_minute = tokens_per_minute or None
+        self.slots = asyncio.Semaphore(concurrent_requests) if concurrent_requests else None
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+
+    def tighter(self, other: "ModelLimits") -> "ModelLimits":
+        """Two settings.yaml models with the same model name share the lower limits."""
+        def low(a, b):
+            return min(x for x in (a, b) if x) if (a or b) else None
+        return ModelLimits(
+            low(self.concurrent_requests, other.concurrent_requests),
+            low(self.requests_per_minute, other.requests_per_minute),
+            low(self.tokens_per_minute, other.tokens_per_minute),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrent_requests": self.concurrent_requests,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "in_flight": self.in_flight,
+            "cooling_down": max(0.0, round(self.cooldown_until - time.monotonic(), 3)),
+        }
+
+
+class LLMGateway:
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_connections: int = 100, timeout: float = 180.0, max_retries: int = 6,
+                 backoff_seconds: float = 1.0, max_backoff_seconds: float = 60.0, coalesce: bool = True):
+        self.api_key = api_key or os.getenv("GRAPHRAG_API_KEY")
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.coalesce = coalesce
+        self.limits: Dict[str, ModelLimits] = {}
+        self.routes: Dict[str, tuple] = {}  # model -> (api_key, base_url) when it differs from the default
+        self.counters = {"requests": 0, "coalesced": 0, "retries": 0, "rate_limited": 0, "errors": 0}
+        self._unlimited = ModelLimits()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # only touched on the gateway loop
+        self._http: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[tuple, AsyncOpenAI] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def register_model(self, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                       concurrent_requests: Optional[int] = None, requests_per_minute: Optional[int] = None,
+                       tokens_per_minute: Optional[int] = None) -> None:
+        limits = ModelLimits(concurrent_requests, requests_per_minute, tokens_per_minute)
+        if model in self.limits:
+            limits = self.limits[model].tighter(limits)
+        self.limits[model] = limits
+        if (api_key or self.api_key, base_url or self.base_url) != (self.api_key, self.base_url):
+            self.routes[model] = (api_key or self.api_key, base_url or self.base_url)
+
+    # ---- public API (any thread / any loop) ----
+    async def chat(self, **params) -> Any:
+        """client.chat.completions.create(**params), non-streaming."""
+        return await asyncio.wrap_future(self._submit(self._chat(params)))
+
+    def chat_sync(self, **params) -> Any:
+        return self._submit(self._chat(params)).result()
+
+    async def chat_stream(self, **params) -> AsyncIterator[Any]:
+        """Chunks of a streamed chat completion (retried only until the first chunk arrives)."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        future = self._submit(self._stream(params, lambda item: loop.call_soon_threadsafe(queue.put_nowait, item), done))
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    async def embed(self, **params) -> Any:
+        """client.embeddings.create(**params)."""
+        return await asyncio.wrap_future(self._submit(self._call("embeddings", params)))
+
+    def close(self) -> None:
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_clients(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "in_flight_coalescable": len(self._inflight),
+            "models": {model: limits.stats() for model, limits in self.limits.items()},
+        }
+
+    # ---- gateway loop ----
+    def _submit(self, coro):
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _client(self, model: str) -> AsyncOpenAI:
+        route = self.routes.get(model, (self.api_key, self.base_url))
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+            )
+        if route not in self._clients:
+            # retries are ours; base_url None = OPENAI_BASE_URL or api.openai.com
+            self._clients[route] = AsyncOpenAI(api_key=route[0], base_url=route[1], max_retries=0,
+                                               http_client=self._http)
+        return self._clients[route]
+
+    async def _close_clients(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http, self._clients = None, {}
+
+    async def _chat(self, params: Dict[str, Any]) -> Any:
+        if not self.coalesce or params.get("stream"):
+            return await self._call("chat", params)
+        extra = {k: v for k, v in params.items() if k not in ("model", "messages")}
+        key = cache_key("inflight", params.get("model", ""), params.get("messages", []), **extra)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            task = self._inflight[key] = asyncio.get_running_loop().create_task(self._call("chat", params))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # one caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _throttle(self, limits: ModelLimits, tokens: int) -> None:
+        t0 = time.monotonic()
+        while (wait := limits.cooldown_until - time.monotonic()) > 0:
+            await asyncio.sleep(wait)
+        if limits.requests is not None:
+            await limits.requests.take(1)
+        if limits.tokens is not None:
+            await limits.tokens.take(tokens)
+        waited = time.monotonic() - t0
+        if waited > 0.001:
+            telemetry.record_queue_wait("llm_rate_limit", waited)
+
+    def _retry_delay(self, error: Exception, attempt: int, limits: ModelLimits) -> Optional[float]:
+        """Seconds to wait before retrying `error`, or None if it is not retried."""
+        if attempt >= self.max_retries:
+            return None
+        hinted = None
+        if isinstance(error, openai.APIStatusError):
+            if error.status_code not in RETRYABLE_STATUS or getattr(error, "code", None) == "insufficient_quota":
+                return None
+            hinted = retry_after(error.response.headers)
+        elif not isinstance(error, openai.APIConnectionError):  # includes timeouts
+            return None
+        backoff = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt) * random.uniform(0.5, 1.0)
+        delay = min(self.max_backoff_seconds, hinted) if hinted is not None else backoff
+        if isinstance(error, openai.RateLimitError):
+            self.counters["rate_limited"] += 1
+            limits.cooldown_until = max(limits.cooldown_until, time.monotonic() + delay)
+        self.counters["retries"] += 1
+        return delay
+
+    @staticmethod
+    def _settle(limits: ModelLimits, estimate: int, usage: Any) -> None:
+        if limits.tokens is not None and usage is not None:
+            limits.tokens.adjust(getattr(usage, "total_tokens", estimate) - estimate)
+
+    async def _call(self, kind: str, params: Dict[str, Any]) -> Any:
+        model = params.get("model", "")
+        limits = self.limits.get(model, self._unlimited)
+        estimate = estimate_tokens(params)
+        client = self._client(model)
+        create = client.chat.completions.create if kind == "chat" else client.embeddings.create
+        attempt = 0
+        while True:
+            await self._throttle(limits, estimate)
+            async with _slot(limits):
+                self.counters["requests"] += 1
+                try:
+                    response = await create(**params)
+                except (openai.APIStatusError, openai.APIConnectionError) as e:
+                    delay = self._retry_delay(e, attempt, limits)
+                    if delay is None:
+                        self.counters["errors"] += 1
+                        raise
+                else:
+                    self._settle(limits, estimate, getattr(response, "usage", None))
+                    return response
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _stream(self, params: Dict[str, Any], put: Callable[[Any], None], done: object) -> None:
+        model = params.get("model", "")
+        limits = self.limits.get(model, self._unlimited)
+        estimate = estimate_tokens(params)
+        params = {**params, "stream": True}
+        params.setdefault("stream_options", {"include_usage": True})
+        attempt = 0
+        try:
+            while True:
+                await self._throttle(limits, estimate)
+                async with _slot(limits):
+                    self.counters["requests"] += 1
+                    try:
+                        stream = await self._client(model).chat.completions.create(**params)
+                    except (openai.APIStatusError, openai.APIConnectionError) as e:
+                        delay = self._retry_delay(e, attempt, limits)
+                        if delay is None:
+                            self.counters["errors"] += 1
+                            raise
+                    else:
+                        usage = None
+                        async with stream:
+                            async for chunk in stream:
+                                usage = getattr(chunk, "usage", None) or usage
+                                put(chunk)
+                        self._settle(limits, estimate, usage)
+                        put(done)
+                        return
+                attempt += 1
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            put(e)
+
+
+class _slot:
+    """Concurrency slot of a model (no-op without a concurrent_requests limit)."""
+
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+
+    async def __aenter__(self):
+        if self.limits.slots is not None:
+            await self.limits.slots.acquire()
+        self.limits.in_flight += 1
+
+    async def __aexit__(self, *exc):
+        self.limits.in_flight -= 1
+        if self.limits.slots is not None:
+            self.limits.slots.release()
+
+
+class GatewayChatModel:
+    """graphrag ChatModel for OpenAI chat models, calling through an LLMGateway."""
+
+    def __init__(self, gateway: LLMGateway, config: Any):
+        from graphrag.language_model.providers.fnllm.utils import get_openai_model_parameters_from_config
+
+        self.gateway = gateway
+        self.config = config
+        self._defaults = get_openai_model_parameters_from_config(config)
+
+    def _request(self, prompt: str, history: Optional[list], model_parameters: Optional[dict] = None,
+                 json: bool = False, **kwargs) -> Dict[str, Any]:
+        # settings.yaml parameters, overridden by the ones the search passes (as fnllm does)
+        overrides = {k: v for k, v in (model_parameters or {}).items() if v is not None}
+        params = {k: v for k, v in {**self._defaults, **overrides}.items() if v is not None}
+        if json and self.config.model_supports_json:
+            params["response_format"] = {"type": "json_object"}
+        messages = [*(history or []), {"role": "user", "content": prompt}]
+        return {"model": self.config.model, "messages": messages, **params}
+
+    def _response(self, request: Dict[str, Any], completion: Any):
+        from fnllm.types.metrics import LLMMetrics, LLMUsageMetrics
+        from graphrag.language_model.response.base import BaseModelOutput, BaseModelResponse
+
+        content = completion.choices[0].message.content or ""
+        usage = completion.usage
+        return BaseModelResponse(
+            output=BaseModelOutput(content=content),
+            history=[*request["messages"], {"role": "assistant", "content": content}],
+            metrics=LLMMetrics(usage=LLMUsageMetrics(
+                input_tokens=usage.prompt_tokens if usage else 0,
+                output_tokens=usage.completion_tokens if usage else 0,
+            )),
+        )
+
+    async def achat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        request = self._request(prompt, history, **kwargs)
+        return self._response(request, await self.gateway.chat(**request))
+
+    async def achat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        async for chunk in self.gateway.chat_stream(**self._request(prompt, history, **kwargs)):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            usage = getattr(chunk, "usage", None)
+            if usage is not None:
+                telemetry.report_stream_usage(usage.prompt_tokens, usage.completion_tokens)
+
+    def chat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        request = self._request(prompt, history, **kwargs)
+        return self._response(request, self.gateway.chat_sync(**request))
+
+    def chat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        raise NotImplementedError("chat_stream is not supported for synchronous execution")
+
+
+_shared: Optional[LLMGateway] = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> LLMGateway:
+    """The process-wide gateway (GRAPHRAG_API_KEY, default limits until configure() is called)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMGateway()
+        return _shared
+
+
+def configure(config, **options) -> LLMGateway:
+    """
+    Apply gateway options (max_connections, timeout, ...) and register the
+    OpenAI models of a GraphRagConfig with their settings.yaml limits.
+    Call before the first request; the HTTP pool is created on first use.
+    """
+    gateway = shared()
+    for name, value in options.items():
+        setattr(gateway, name, value)
+    models: List[Any] = [m for m in config.models.values()
+                         if m.type in OPENAI_CHAT_TYPES + OPENAI_EMBEDDING_TYPES]
+    for settings in models:
+        gateway.register_model(
+            settings.model,
+            api_key=settings.api_key,
+            base_url=settings.api_base,
+            concurrent_requests=settings.concurrent_requests,
+            requests_per_minute=settings.requests_per_minute,
+            tokens_per_minute=settings.tokens_per_minute,
+        )
+    return gateway
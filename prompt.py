@@ -246,4 +246,258 @@ Context:
 
 Sentence:
 {sentence}
-"""
\ No newline at end of file
+"""
+
+# Batched variant of SELECTION: same criteria, but several numbered sentences
+# are judged in a single request and the verdicts come back as JSON.
+SELECTION_BATCH = SELECTION.split("Your output must follow this format exactly.")[0].rstrip() + """
+
+You will be given SEVERAL numbered sentences from the same response, each with its own context. Judge every sentence independently using the rules above, considering only its own context.
+
+Your output must be a JSON array and nothing else, with exactly one object per numbered sentence, in the same order:
+[
+  {"id": <sentence number>, "verdict": "<'Contains a specific and verifiable proposition' or 'Does NOT contain a specific and verifiable proposition'>"},
+  ...
+]
+"""
+
+USER_PROMPT_SELECTION_BATCH = """
+You are now performing a batched SELECTION task.
+
+Question:
+{question}
+
+Sentences:
+{sentences}
+"""
+
+USER_PROMPT_SELECTION_BATCH_ITEM = """[{id}]
+Context:
+{context}
+
+Sentence:
+{sentence}
+"""
+
+# Fused variant of DISAMBIGUATION + DECOMPOSITION (Claimify(fused=True)): both
+# steps for a selected sentence in one request, so the question and context are
+# sent once and the decontextualized sentence needs no second round trip.
+_FUSED_HEAD = """
+You assist fact-checkers in two steps, done one after the other on the same sentence.
+
+STEP 1 – DISAMBIGUATION: rewrite the sentence so it can be understood without the question or surrounding context ("decontextualizing"), or decide that it cannot be.
+
+STEP 2 – DECOMPOSITION: only if the sentence could be decontextualized, extract from the decontextualized sentence all specific, verifiable, decontextualized propositions.
+
+Instructions for STEP 1:
+"""
+
+DISAMBIGUATION_DECOMPOSITION = _FUSED_HEAD + DISAMBIGUATION.split("Your Output Format:")[0].split("Your Goals:")[1].strip() + """
+
+Instructions for STEP 2:
+Your job is to """ + DECOMPOSITION.split("\nFormat:\n")[0].split("Your job is to")[1].strip() + """
+
+Your output must follow this format exactly:
+Incomplete Names, Acronyms, Abbreviations:
+<Step-by-step check — if they exist and if they can be resolved using question/context>
+
+Linguistic Ambiguity in '<original sentence>':
+<Step-by-step reasoning: referential ambiguity, structural ambiguity, would readers reach agreement on what it means?>
+
+DecontextualizedSentence:
+<final version of the sentence with all changes, or "Cannot be decontextualized">
+
+Propositions (omit when the sentence cannot be decontextualized):
+[
+  "<proposition 1 with [essential info]>",
+  "<proposition 2 with [essential info]>",
+  ...
+]
+
+Important: Each fact-checker only sees ONE proposition. Assume they don’t know the rest.
+
+Do not use citations or outside info. Work only with what’s given.
+"""
+
+USER_PROMPT_DISAMBIGUATION_DECOMPOSITION = """
+You are now performing a combined DISAMBIGUATION and DECOMPOSITION task.
+
+Question:
+{question}
+
+Context:
+{context}
+
+Sentence:
+{sentence}
+"""
+
+# Structured-output variants (Claimify(response_format=...)): the same instructions,
+# with the free-text output format replaced by a JSON object matching CLAIMIFY_SCHEMAS.
+_JSON_ONLY = "\n\nYour output must be a single JSON object and nothing else:\n"
+
+SELECTION_JSON = SELECTION.split("Your output must follow this format exactly.")[0].rstrip() + _JSON_ONLY + """{
+  "reasoning": "<4-step thought process: 1. reflect on criteria at a high-level → 2. describe the sentence and its surrounding context → 3. evaluate if it contains a specific and verifiable proposition → 4. rewrite it if needed>",
+  "verdict": "<'Contains a specific and verifiable proposition' or 'Does NOT contain a specific and verifiable proposition'>",
+  "sentence": "<sentence with only verifiable information, or null>"
+}
+"""
+
+SELECTION_BATCH_JSON = SELECTION_BATCH.split("Your output must be a JSON array")[0].rstrip() + _JSON_ONLY + """{
+  "verdicts": [
+    {"id": <sentence number>, "verdict": "<'Contains a specific and verifiable proposition' or 'Does NOT contain a specific and verifiable proposition'>"},
+    ...
+  ]
+}
+with exactly one verdict per numbered sentence, in the same order.
+"""
+
+DISAMBIGUATION_JSON = DISAMBIGUATION.split("Your Output Format:")[0].rstrip() + _JSON_ONLY + """{
+  "reasoning": "<step-by-step check of incomplete names, acronyms and abbreviations, then of referential and structural ambiguity, and the changes needed>",
+  "decontextualized": <true if readers would reach agreement on what the sentence means, otherwise false>,
+  "sentence": "<final version of the sentence with all changes, or null when it cannot be decontextualized>"
+}
+"""
+
+DECOMPOSITION_JSON = DECOMPOSITION.split("\nFormat:\n")[0].rstrip() + _JSON_ONLY + """{
+  "referential_terms": ["<referential term whose referent must be clarified>", ...],
+  "clarified_sentence": "<clarified version of the sentence>",
+  "propositions": ["<specific, verifiable and decontextualized proposition with [essential context/clarifications]>", ...]
+}
+
+Important: Each fact-checker only sees ONE proposition. Assume they don’t know the rest.
+
+Do not use citations or outside info. Work only with what’s given.
+"""
+
+DISAMBIGUATION_DECOMPOSITION_JSON = DISAMBIGUATION_DECOMPOSITION.split(
+    "Your output must follow this format exactly:")[0].rstrip() + _JSON_ONLY + """{
+  "reasoning": "<step-by-step check of incomplete names, acronyms and abbreviations, then of referential and structural ambiguity, and the changes needed>",
+  "decontextualized": <true if readers would reach agreement on what the sentence means, otherwise false>,
+  "sentence": "<final version of the sentence with all changes, or null when it cannot be decontextualized>",
+  "propositions": ["<specific, verifiable and decontextualized proposition of that sentence with [essential context/clarifications]>", ...]
+}
+
+"propositions" is empty when the sentence cannot be decontextualized. Each fact-checker only sees ONE proposition. Assume they don’t know the rest.
+"""
+
+_VERDICT = {"type": "string", "enum": [
+    "Contains a specific and verifiable proposition",
+    "Does NOT contain a specific and verifiable proposition",
+]}
+
+# JSON schemas of the replies above, sent as response_format json_schema (strict:
+# every property required, no others) and used to validate the parsed reply.
+CLAIMIFY_SCHEMAS = {
+    "selection": {
+        "type": "object",
+        "properties": {
+            "reasoning": {"type": "string"},
+            "verdict": _VERDICT,
+            "sentence": {"type": ["string", "null"]},
+        },
+        "required": ["reasoning", "verdict", "sentence"],
+        "additionalProperties": False,
+    },
+    "selection_batch": {
+        "type": "object",
+        "properties": {
+            "verdicts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"id": {"type": "integer"}, "verdict": _VERDICT},
+                    "required": ["id", "verdict"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["verdicts"],
+        "additionalProperties": False,
+    },
+    "disambiguation": {
+        "type": "object",
+        "properties": {
+            "reasoning": {"type": "string"},
+            "decontextualized": {"type": "boolean"},
+            "sentence": {"type": ["string", "null"]},
+        },
+        "required": ["reasoning", "decontextualized", "sentence"],
+        "additionalProperties": False,
+    },
+    "disambiguation_decomposition": {
+        "type": "object",
+        "properties": {
+            "reasoning": {"type": "string"},
+            "decontextualized": {"type": "boolean"},
+            "sentence": {"type": ["string", "null"]},
+            "propositions": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["reasoning", "decontextualized", "sentence", "propositions"],
+        "additionalProperties": False,
+    },
+    "decomposition": {
+        "type": "object",
+        "properties": {
+            "referential_terms": {"type": "array", "items": {"type": "string"}},
+            "clarified_sentence": {"type": "string"},
+            "propositions": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["referential_terms", "clarified_sentence", "propositions"],
+        "additionalProperties": False,
+    },
+}
+
+# LLM judge of claim_verifier.py: only the claims retrieval could not decide.
+VERIFICATION_JUDGE = """
+You assist fact-checkers. You will be given several numbered claims, each with evidence retrieved from a source text: passages of the text (text_unit) and claims extracted from it beforehand (covariate). Judge every claim independently, using ONLY its own evidence:
+
+- "supported": the evidence states the claim, or it follows directly from the evidence.
+- "refuted": the evidence contradicts the claim (e.g., a different figure, date, name or condition).
+- "unsupported": the evidence neither states nor contradicts the claim.
+
+Do not use outside knowledge. A claim that is only partly supported is "unsupported"; a claim with any contradicted part is "refuted".
+
+Your output must be a single JSON object and nothing else, with exactly one verdict per numbered claim, in the same order:
+{
+  "verdicts": [
+    {"id": <claim number>, "verdict": "<'supported', 'refuted' or 'unsupported'>"},
+    ...
+  ]
+}
+"""
+
+USER_PROMPT_VERIFICATION = """
+You are now performing a VERIFICATION task.
+
+Claims:
+{claims}
+"""
+
+USER_PROMPT_VERIFICATION_ITEM = """[{id}]
+Claim:
+{claim}
+
+Evidence:
+{evidence}
+"""
+
+VERIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdicts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "verdict": {"type": "string", "enum": ["supported", "refuted", "unsupported"]},
+                },
+                "required": ["id", "verdict"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["verdicts"],
+    "additionalProperties": False,
+}
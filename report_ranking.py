@@ -0,0 +1,210 @@
+import functools
+import logging
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import tiktoken
+from graphrag.config.embeddings import community_full_content_embedding
+
+import vector_index
+
+'''
+Report pre-filter for global search.
+
+graphrag's global search sends every community report up to the community
+level to the map step (one LLM call per max_context_tokens of reports), so
+its cost grows with the index. Here the reports are ranked per query and only
+the best ones are passed on:
+
+    score = w_semantic * cosine(query embedding, report embedding)
+          + w_keyword  * BM25(query, report full_content)
+          + w_rank     * report rank (graphrag's 0-10 importance rating)
+
+each term min-max normalised over the candidates. Reports are taken in score
+order until `top_k` reports or `max_tokens` of report content are selected.
+
+ReportIndex holds what does not depend on the query, built once per snapshot
+and community level: the candidate reports, their embeddings (read from the
+community.full_content vector store), BM25 postings and token counts.
+
+Level selection:
+- "all"  : every report up to the community level is a candidate (graphrag's
+           behaviour, just ranked and cut).
+- "auto" : same candidates, but a report is skipped when one of its ancestor
+           or descendant communities is already selected, so a broad query
+           ends up with high-level reports and a specific one with leaves.
+- "dynamic" is graphrag's LLM-rated dynamic_community_selection; api.py
+  passes it through to graphrag and does not pre-filter.
+'''
+
+log = logging.getLogger(__name__)
+
+LEVEL_SELECTIONS = ("all", "auto", "dynamic")
+_TOKEN = re.compile(r"\w\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class KeywordIndex:
+    """BM25 over a list of documents, with postings in numpy arrays."""
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.vocab: Dict[str, int] = {}
+        terms, docs, tfs = [], [], []
+        self.doc_len = np.zeros(len(texts), dtype=np.float32)
+        for d, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_len[d] = sum(counts.values())
+            for term, tf in counts.items():
+                terms.append(self.vocab.setdefault(term, len(self.vocab)))
+                docs.append(d)
+                tfs.append(tf)
+        order = np.argsort(np.asarray(terms, dtype=np.int64), kind="stable")
+        self.docs = np.asarray(docs, dtype=np.int64)[order]
+        self.tfs = np.asarray(tfs, dtype=np.float32)[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(np.asarray(terms, dtype=np.int64),
+                                                                  minlength=len(self.vocab)))])
+        df = np.diff(self.offsets)
+        n = len(texts)
+        self.idf = np.log(1 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        self.avgdl = float(self.doc_len.mean()) if n else 0.0
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(len(self.doc_len), dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            lo, hi = self.offsets[t], self.offsets[t + 1]
+            docs, tf = self.docs[lo:hi], self.tfs[lo:hi]
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / max(self.avgdl, 1e-9))
+            out[docs] += self.idf[t] * tf * (self.k1 + 1) / (tf + norm)
+        return out
+
+
+def _normalise(x: np.ndarray) -> np.ndarray:
+    lo, hi = float(x.min()), float(x.max())
+    return np.zeros_like(x) if hi - lo < 1e-12 else (x - lo) / (hi - lo)
+
+
+@dataclass
+class Selection:
+    communities: List[int]
+    candidates: int
+    tokens: int
+    scores: Dict[int, float] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"candidates": self.candidates, "selected": len(self.communities), "tokens": self.tokens}
+
+
+class ReportIndex:
+    def __init__(self, reports: pd.DataFrame, vectors: Optional[np.ndarray], tokens: np.ndarray):
+        self.reports = reports.reset_index(drop=True)
+        self.community = self.reports["community"].astype(int).to_numpy()
+        self.rank = self.reports["rank"].fillna(0).astype(np.float32).to_numpy()
+        self.tokens = tokens
+        self.keywords = KeywordIndex(self.reports["full_content"].fillna("").tolist())
+        # unit vectors; rows without an embedding are zero
+        self.vectors = vectors
+        parent = dict(zip(self.community, self.reports["parent"].fillna(-1).astype(int)))
+        self.ancestors = [self._ancestors(c, parent) for c in self.community]
+
+    @staticmethod
+    def _ancestors(community: int, parent: Dict[int, int]) -> frozenset:
+        out, c = set(), parent.get(community, -1)
+        while c != -1 and c not in out:
+            out.add(c)
+            c = parent.get(c, -1)
+        return frozenset(out)
+
+    @classmethod
+    def build(cls, community_reports: pd.DataFrame, community_level: int, token_encoder=None,
+              stored_vectors: Optional[Callable[[List[str]], Any]] = None) -> "ReportIndex":
+        """
+        Candidates are the reports up to `community_level`, as graphrag's
+        read_indexer_reports selects them; their vectors come from
+        `stored_vectors` (ids -> (vectors, found), see vector_index.read_vectors).
+        """
+        reports = community_reports[community_reports["level"] <= community_level]
+        contents = reports["full_content"].fillna("").tolist()
+        if token_encoder is not None:
+            tokens = np.asarray([len(token_encoder.encode(t)) for t in contents], dtype=np.int64)
+        else:
+            tokens = np.asarray([len(t) // 4 for t in contents], dtype=np.int64)
+
+        vectors = None
+        if stored_vectors is not None and len(reports):
+            try:
+                stored = stored_vectors(reports["id"].tolist())
+            except Exception as e:
+                log.warning("report embeddings unavailable, ranking without them: %s", e)
+                stored = None
+            if stored is not None and stored[1].any():
+                vectors = stored[0]
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                vectors /= np.where(norms == 0, 1, norms)
+        return cls(reports, vectors, tokens)
+
+    def __len__(self) -> int:
+        return len(self.reports)
+
+    def select(self, query: str, query_vector: Optional[np.ndarray], top_k: int,
+               max_tokens: Optional[int], weights: Dict[str, float], level_selection: str = "all") -> Selection:
+        if len(self) == 0:
+            return Selection(communities=[], candidates=0, tokens=0)
+        score = weights.get("keyword", 0) * _normalise(self.keywords.scores(query))
+        score += weights.get("rank", 0) * _normalise(self.rank)
+        if query_vector is not None and self.vectors is not None:
+            q = np.asarray(query_vector, dtype=np.float32)
+            score += weights.get("semantic", 0) * _normalise(self.vectors @ (q / (np.linalg.norm(q) or 1)))
+
+        chosen, chosen_set, covered, used = [], set(), set(), 0
+        for i in np.argsort(-score, kind="stable"):
+            if len(chosen) >= top_k:
+                break
+            c = int(self.community[i])
+            if level_selection == "auto" and (c in covered or self.ancestors[i] & chosen_set):
+                continue
+            if max_tokens is not None and chosen and used + self.tokens[i] > max_tokens:
+                continue  # a shorter report further down may still fit
+            chosen.append(c)
+            chosen_set.add(c)
+            covered |= self.ancestors[i]
+            used += int(self.tokens[i])
+        return Selection(
+            communities=chosen,
+            candidates=len(self),
+            tokens=used,
+            scores={int(self.community[i]): float(score[i]) for i in range(len(self))},
+        )
+
+
+_build_lock = threading.Lock()
+
+
+def report_index(snapshot, config, community_level: int, use_embeddings: bool = True) -> ReportIndex:
+    """ReportIndex for a snapshot, built on first use and kept on it. Blocking."""
+    with _build_lock:
+        key = ("report_index", community_level)
+        index = snapshot.derived.get(key)
+        if index is None:
+            settings = config.get_language_model_config(config.global_search.chat_model_id)
+            stored_vectors = (
+                functools.partial(vector_index.read_vectors, config, community_full_content_embedding)
+                if use_embeddings else None
+            )
+            index = snapshot.derived[key] = ReportIndex.build(
+                snapshot.community_reports, community_level,
+                token_encoder=tiktoken.get_encoding(settings.encoding_model),
+                stored_vectors=stored_vectors,
+            )
+        return index
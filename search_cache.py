@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+'''
+Result cache in front of the /search/* endpoints.
+
+Entries are keyed by (method, normalized query, community_level,
+response_type, index fingerprint). The fingerprint is a hash of the parquet
+files the tables were loaded from, so a result can never outlive the index it
+was computed on; api.py also calls invalidate() whenever /reload,
+/clear/output or /upload/new_file touch the output folder.
+
+With an `embed` function and a similarity_threshold the cache additionally
+answers paraphrases: on an exact miss the query is embedded once and compared
+(cosine) against cached queries with the same method/level/response type/
+fingerprint.
+'''
+
+EmbedFn = Callable[[str], Awaitable[List[float]]]
+
+
+def index_fingerprint(output_dir: Path) -> str:
+    """Hash of name, size and mtime of every parquet file in the output folder."""
+    h = hashlib.sha256()
+    if output_dir.exists():
+        for p in sorted(output_dir.glob("*.parquet")):
+            st = p.stat()
+            h.update(f"{p.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:16]
+
+
+def normalize_query(query: str) -> str:
+    q = re.sub(r"\s+", " ", query.strip().lower())
+    return q.rstrip("?!. ")
+
+
+class SearchResultCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = None,
+                 embed: Optional[EmbedFn] = None, similarity_threshold: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        # key -> (result, unit query embedding or None, created)
+        self._data: "OrderedDict[Tuple, Tuple[Dict[str, Any], Optional[np.ndarray], float]]" = OrderedDict()
+        # embeddings computed on a miss, reused when the result is stored
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.embed is not None and self.similarity_threshold is not None
+
+    @staticmethod
+    def make_key(method: str, query: str, community_level: Any, response_type: Any, fingerprint: str) -> Tuple:
+        return (method, normalize_query(query), community_level, response_type, fingerprint)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    async def _query_vector(self, normalized: str) -> np.ndarray:
+        vec = self._pending.get(normalized)
+        if vec is None:
+            vec = np.asarray(await self.embed(normalized), dtype=np.float32)
+            vec /= (np.linalg.norm(vec) or 1.0)
+            self._pending[normalized] = vec
+            while len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)
+        return vec
+
+    async def get(self, method: str, query: str, community_level: Any = None,
+                  response_type: Any = None, fingerprint: str = "") -> Optional[Dict[str, Any]]:
+        key = self.make_key(method, query, community_level, response_type, fingerprint)
+        async with self._lock:
+            item = self._data.get(key)
+            if item is not None and self._expired(item[2]):
+                del self._data[key]
+                item = None
+            if item is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            candidates = [
+                (k, v) for k, v in self._data.items()
+                if k[0] == key[0] and k[2:] == key[2:] and v[1] is not None and not self._expired(v[2])
+            ] if self.semantic else []
+
+        vec = None
+        if candidates:
+            try:
+                vec = await self._query_vector(key[1])
+            except Exception:
+                vec = None  # embedding service unavailable: behave like an exact-only cache
+        if vec is not None:
+            matrix = np.stack([v[1] for _, v in candidates])
+            scores = matrix @ vec
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity_threshold:
+                async with self._lock:
+                    best_key = candidates[best][0]
+                    if best_key in self._data:
+                        self._data.move_to_end(best_key)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                return candidates[best][1][0]
+
+        async with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, method: str, query: str, result: Dict[str, Any], community_level: Any = None,
+                  response_type: Any = None, fingerprint: str = "") -> None:
+        key = self.make_key(method, query, community_level, response_type, fingerprint)
+        vec = None
+        if self.semantic:
+            try:
+                vec = await self._query_vector(key[1])
+            except Exception:
+                vec = None  # still cache the exact query
+        async with self._lock:
+            self._data[key] = (result, vec, time.time())
+            self._data.move_to_end(key)
+            self._pending.pop(key[1], None)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self._data.clear()
+        self._pending.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "semantic": self.semantic,
+            "similarity_threshold": self.similarity_threshold,
+        }
@@ -1,6 +1,9 @@
 # graphrag_claimify/splitter.py
-import re, nltk
-nltk.download("punkt", quiet=True)
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 
 '''
@@ -16,14 +19,161 @@ Reasoning:
 - Prevent tokenizer mistake from causing false sentence splits 
 - Ensure sentence chuk make sense semantically
 - Improve downstream LLM accuracy - especially for claimify stage like selection and disambiguation which assume well formed , meaningful sentences 
+
+nltk and its punkt model are loaded on first use, never downloaded at runtime.
+punkt_tab is not part of the repository; installing it is a build step
+(`python -m nltk.downloader -d nltk_data punkt_tab` in this directory, or into
+any of nltk's usual paths). ./nltk_data next to this file is searched first.
+Without it a regex split on sentence punctuation is used and a warning is
+logged once.
+
+split_answer() is what Claimify uses: it segments an answer once into a
+SentenceTable of (start, end) offsets into the original string (a merge of a
+short fragment just moves an end offset), builds the context windows of all
+sentences in one pass, and is memoized, so the same answer is only split once.
+
+paragraph_split / sentence_split / split_text keep the string-based interface.
 '''
+log = logging.getLogger(__name__)
+
+NLTK_DATA_DIR = Path(__file__).parent / "nltk_data"
+
+# end of sentence, then the whitespace between it and something that can start one (group 1)
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]?(\s+)(?=[\"'(\[]?[A-Z0-9])")
+
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+MIN_SENTENCE_CHARS = 5   # shorter pieces are merged into the previous sentence
+SPLIT_CACHE_SIZE = 1024  # answers memoized by split_answer
+
+
+@lru_cache(maxsize=1)
+def _punkt():
+    """nltk's English punkt tokenizer (what nltk.sent_tokenize uses) if available locally, else None."""
+    try:
+        import nltk
+        from nltk.tokenize import PunktTokenizer
+        if str(NLTK_DATA_DIR) not in nltk.data.path:
+            nltk.data.path.insert(0, str(NLTK_DATA_DIR))
+        nltk.data.find("tokenizers/punkt_tab/english/")
+    except (ImportError, LookupError):
+        log.warning(
+            "nltk punkt_tab not found in %s or nltk's data path; splitting sentences on punctuation "
+            "(install it with `python -m nltk.downloader -d %s punkt_tab`)", NLTK_DATA_DIR, NLTK_DATA_DIR,
+        )
+        return None
+    return PunktTokenizer("english")
+
+
+def _regex_spans(paragraph: str) -> Iterator[Tuple[int, int]]:
+    pos = 0
+    for m in _SENTENCE_END.finditer(paragraph):
+        yield pos, m.start(1)
+        pos = m.end(1)
+    yield pos, len(paragraph)
+
+
+def _regex_split(paragraph: str) -> list[str]:
+    return [s for s in (paragraph[a:b].strip() for a, b in _regex_spans(paragraph)) if s]
+
+
+def _paragraph_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """(start, end) of every paragraph, surrounding whitespace excluded."""
+    pos = 0
+    for m in [*_PARAGRAPH_BREAK.finditer(text), None]:
+        start, end = pos, m.start() if m is not None else len(text)
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            yield start, end
+        if m is not None:
+            pos = m.end()
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Sentence spans of `text`, short fragments merged into the sentence before them."""
+    tokenizer = _punkt()
+    spans: List[Tuple[int, int]] = []
+    for p_start, p_end in _paragraph_spans(text):
+        paragraph = text[p_start:p_end]
+        pieces = tokenizer.span_tokenize(paragraph) if tokenizer is not None else _regex_spans(paragraph)
+        first = len(spans)
+        for s, e in pieces:
+            if e - s < MIN_SENTENCE_CHARS and len(spans) > first:
+                spans[-1] = (spans[-1][0], p_start + e)
+            elif e > s:
+                spans.append((p_start + s, p_start + e))
+    return spans
+
+
+class SentenceTable:
+    """
+    Sentences of one answer as (start, end) offsets into `text`. Strings are
+    sliced out once, on first access; context windows are built once per (p, f).
+    """
+
+    __slots__ = ("text", "spans", "_sentences", "_windows")
+
+    def __init__(self, text: str, spans: Sequence[Tuple[int, int]]):
+        self.text = text
+        self.spans = tuple(spans)
+        self._sentences: Optional[Tuple[str, ...]] = None
+        self._windows: Dict[Tuple[int, int], Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __getitem__(self, i: int) -> str:
+        return self.sentences[i]
+
+    @property
+    def sentences(self) -> Tuple[str, ...]:
+        if self._sentences is None:
+            self._sentences = tuple(self.text[s:e] for s, e in self.spans)
+        return self._sentences
+
+    def windows(self, p: int, f: int) -> Tuple[str, ...]:
+        """
+        For every sentence, the p sentences before and f after it joined by
+        spaces (the sentence itself left out), built in one pass and kept, so
+        Selection and Disambiguation share them.
+        """
+        windows = self._windows.get((p, f))
+        if windows is None:
+            sents, join = self.sentences, " ".join
+            windows = self._windows[(p, f)] = tuple(
+                join(sents[max(0, i - p):i] + sents[i + 1:i + f + 1]) for i in range(len(sents))
+            )
+        return windows
+
+
+@lru_cache(maxsize=SPLIT_CACHE_SIZE)
+def split_answer(text: str) -> SentenceTable:
+    return SentenceTable(text, _sentence_spans(text))
+
+
+def split_many(texts: Sequence[str], p: Optional[int] = None, f: Optional[int] = None) -> List[SentenceTable]:
+    """split_answer for a batch of answers (repeats split once), with their (p, f) windows built if given."""
+    tables = [split_answer(text) for text in texts]
+    if p is not None and f is not None:
+        for table in tables:
+            table.windows(p, f)
+    return tables
+
+
 def paragraph_split(text: str) -> list[str]:
     # two or more newlines → paragraph
     return [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
 
+
 def sentence_split(paragraph: str) -> list[str]:
     """NLTK split + merge sentences shorter than 5 chars."""
-    sents, merged = nltk.sent_tokenize(paragraph), []
+    tokenizer = _punkt()
+    tokenize = tokenizer.tokenize if tokenizer is not None else _regex_split
+    sents, merged = tokenize(paragraph), []
     for s in sents:
         if len(s) < 5 and merged:
             merged[-1] = merged[-1] + " " + s
@@ -31,8 +181,6 @@ def sentence_split(paragraph: str) -> list[str]:
             merged.append(s)
     return merged
 
+
 def split_text(text: str) -> list[str]:
-    sents = []
-    for para in paragraph_split(text):
-        sents.extend(sentence_split(para))
-    return sents
+    return list(split_answer(text).sentences)
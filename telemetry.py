@@ -0,0 +1,356 @@
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+'''
+Request tracing, Prometheus metrics and a sampling profiler.
+
+Tracing: the HTTP middleware in api.py opens a Trace for every request (a
+ContextVar, so it follows the request into the tasks it spawns). Code on the
+request path records spans with `with span("context"): ...` or
+record_span(name, seconds); every span also feeds the span_seconds histogram.
+The trace's spans, summed per name, become the optional Server-Timing header.
+
+Spans recorded by this API:
+    search_cache, context, map, reduce   search phases (utils.SpanCallbacks)
+    llm                                  every chat model call (TracedChatModel, claimify)
+    embedding                            query embeddings (embeddings.CachedEmbeddingModel)
+    serialize                            response encoding
+    queue_wait                           waiting for a claimify slot or an indexing job worker
+
+Metrics are kept in process (no prometheus_client dependency) and rendered
+in the Prometheus text format by /metrics. With several uvicorn workers each
+worker reports its own numbers.
+
+Profiler: sample_stacks() samples the Python stacks of all threads every
+`interval` seconds for `seconds` seconds and returns them in collapsed-stack
+format ("frame;frame;frame count"), which speedscope and flamegraph.pl read.
+'''
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+# ─────────────── Metrics ──────────────── #
+def _labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = sorted(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] += amount
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_labels(dict(k))} {v}" for k, v in self._values.items()]
+
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+
+class GaugeMetric(Metric):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class HistogramMetric(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = buckets
+        self._hist: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None:
+                h = self._hist[key] = [0.0] * (len(self.buckets) + 2)  # buckets, count, sum
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    h[i] += 1
+            h[-2] += 1
+            h[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, h in self._hist.items():
+                labels = dict(key)
+                for bound, n in zip(self.buckets, h):
+                    lines.append(f"{self.name}_bucket{_labels(labels, ('le', repr(float(bound))))} {n}")
+                lines.append(f"{self.name}_bucket{_labels(labels, ('le', '+Inf'))} {h[-2]}")
+                lines.append(f"{self.name}_count{_labels(labels)} {h[-2]}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {h[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def on_collect(self, fn: Callable[[], None]) -> None:
+        """`fn` runs before every render, e.g. to copy counters kept elsewhere."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            fn()
+        out = []
+        for m in self.metrics:
+            out.append(f"# HELP {m.name} {m.help}")
+            out.append(f"# TYPE {m.name} {m.kind}")
+            out.extend(m.samples())
+        return "\n".join(out) + "\n"
+
+
+registry = Registry()
+REQUESTS = registry.add(CounterMetric("graphrag_api_requests_total", "HTTP requests by route and status"))
+REQUEST_SECONDS = registry.add(HistogramMetric("graphrag_api_request_seconds", "HTTP request duration by route"))
+IN_FLIGHT = registry.add(GaugeMetric("graphrag_api_requests_in_flight", "HTTP requests being served"))
+SPAN_SECONDS = registry.add(HistogramMetric("graphrag_api_span_seconds", "Duration of request phases"))
+LLM_CALLS = registry.add(CounterMetric("graphrag_api_llm_calls_total", "Chat model calls by model name"))
+LLM_TOKENS = registry.add(CounterMetric("graphrag_api_llm_tokens_total", "Chat model tokens by model name and kind"))
+CACHE_EVENTS = registry.add(CounterMetric("graphrag_api_cache_events_total", "Cache lookups by cache and result"))
+PREFILTERED = registry.add(CounterMetric("graphrag_api_claimify_prefiltered_total", "Sentences Claimify rejected before Selection, by reason"))
+LLM_CALLS_SAVED = registry.add(CounterMetric("graphrag_api_llm_calls_saved_total", "LLM calls avoided by local pre-filters, by model name"))
+CLAIMS_VERIFIED = registry.add(CounterMetric("graphrag_api_claims_verified_total", "Verified claims by verdict and method (covariate, retrieval, judge)"))
+CLAIMIFY_PARSE_ERRORS = registry.add(CounterMetric("graphrag_api_claimify_parse_errors_total", "Invalid structured Claimify replies, by stage and outcome (retried, failed)"))
+QUEUE_WAIT = registry.add(HistogramMetric("graphrag_api_queue_wait_seconds", "Time spent waiting for a worker slot"))
+
+
+# ─────────────── Tracing ──────────────── #
+@dataclass
+class Trace:
+    start: float = field(default_factory=time.perf_counter)
+    spans: List[Tuple[str, float]] = field(default_factory=list)
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        durations: Dict[str, float] = defaultdict(float)
+        counts: Counter = Counter()
+        for name, seconds in self.spans:
+            durations[name] += seconds
+            counts[name] += 1
+        parts = [
+            f'{name};dur={seconds * 1000:.1f}' + (f';desc="x{counts[name]}"' if counts[name] > 1 else "")
+            for name, seconds in durations.items()
+        ]
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def record_span(name: str, seconds: float) -> None:
+    SPAN_SECONDS.observe(seconds, span=name)
+    trace = _trace.get()
+    if trace is not None:
+        trace.spans.append((name, seconds))
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - t0)
+
+
+def record_queue_wait(queue: str, seconds: float) -> None:
+    QUEUE_WAIT.observe(seconds, queue=queue)
+    record_span("queue_wait", seconds)
+
+
+@dataclass
+class LLMUsage:
+    """Chat model calls made in one context (see track_llm_usage) and the usage they reported."""
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    unmeasured: int = 0        # calls whose response reported no usage
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self.calls += 1
+            if input_tokens:
+                self.prompt_tokens += input_tokens
+                self.completion_tokens += output_tokens
+            else:
+                self.unmeasured += 1
+
+
+_usage: ContextVar[Optional[LLMUsage]] = ContextVar("llm_usage", default=None)
+_stream_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("stream_usage", default=None)
+
+
+def track_llm_usage() -> LLMUsage:
+    """Count the chat model calls of the current context (and the tasks and threads it starts)."""
+    usage = LLMUsage()
+    _usage.set(usage)
+    return usage
+
+
+def report_stream_usage(input_tokens: int, output_tokens: int) -> None:
+    """Usage of the stream TracedChatModel.achat_stream is reading (from its final chunk)."""
+    reported = _stream_usage.get()
+    if reported is not None:
+        reported.update(input_tokens=input_tokens, output_tokens=output_tokens)
+
+
+def record_llm_usage(model: str, input_tokens: int = 0, output_tokens: int = 0) -> None:
+    LLM_CALLS.inc(model=model)
+    if input_tokens:
+        LLM_TOKENS.inc(input_tokens, model=model, kind="input")
+    if output_tokens:
+        LLM_TOKENS.inc(output_tokens, model=model, kind="output")
+    usage = _usage.get()
+    if usage is not None:
+        usage.add(input_tokens, output_tokens)
+
+
+class TracedChatModel:
+    """
+    graphrag ChatModel proxy recording an `llm` span, the call and its token
+    usage; the wrapped model is created on first use by `create()`.
+    """
+
+    def __init__(self, name: str, create: Callable[[], Any], config: Any = None):
+        self.name = name
+        self.config = config
+        self._create = create
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._create()
+        return self._model
+
+    def _usage(self, response: Any) -> None:
+        usage = getattr(getattr(response, "metrics", None), "usage", None)
+        record_llm_usage(self.name, getattr(usage, "input_tokens", 0), getattr(usage, "output_tokens", 0))
+
+    async def achat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        with span("llm"):
+            response = await self.model.achat(prompt, history=history, **kwargs)
+        self._usage(response)
+        return response
+
+    async def achat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        t0 = time.perf_counter()
+        reported: Dict[str, int] = {}
+        _stream_usage.set(reported)   # filled by models that see the stream's usage (GatewayChatModel)
+        try:
+            async for chunk in self.model.achat_stream(prompt, history=history, **kwargs):
+                yield chunk
+        finally:
+            record_span("llm", time.perf_counter() - t0)
+            record_llm_usage(self.name, reported.get("input_tokens", 0), reported.get("output_tokens", 0))
+
+    def chat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        with span("llm"):
+            response = self.model.chat(prompt, history=history, **kwargs)
+        self._usage(response)
+        return response
+
+    def chat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        return self.model.chat_stream(prompt, history=history, **kwargs)
+
+
+# ModelManager names graphrag's query factory (and graph_index.py) use
+SEARCH_CHAT_NAMES = {
+    "local_search_chat": "local_search",
+    "global_search": "global_search",
+    "drift_search_chat": "drift_search",
+    "basic_search_chat": "basic_search",
+}
+
+
+def register_traced_chat_models(config, create: Optional[Callable[[str, Any], Any]] = None) -> None:
+    """
+    Put a TracedChatModel under each search chat model name in graphrag's
+    ModelManager; create(name, model settings) builds the wrapped model
+    (default: graphrag's ModelFactory).
+    """
+    from graphrag.language_model.factory import ModelFactory
+    from graphrag.language_model.manager import ModelManager
+
+    if create is None:
+        def create(name, settings):
+            return ModelFactory.create_chat_model(settings.type, name=name, config=settings)
+
+    manager = ModelManager()
+    for name, section in SEARCH_CHAT_NAMES.items():
+        settings = config.get_language_model_config(getattr(config, section).chat_model_id)
+        manager.chat_models[name] = TracedChatModel(
+            name, lambda name=name, settings=settings: create(name, settings), settings
+        )
+
+
+# ─────────────── Profiler ──────────────── #
+def sample_stacks(seconds: float, interval: float = 0.005, all_threads: bool = True) -> str:
+    """Sample Python stacks (blocking; run it on a worker thread) in collapsed-stack format."""
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    stacks: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (not all_threads and ident != threading.main_thread().ident):
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            stacks[";".join([names.get(ident, str(ident))] + frames[::-1])] += 1
+        time.sleep(interval)
+    return "\n".join(f"{stack} {n}" for stack, n in stacks.most_common()) + "\n"
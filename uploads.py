@@ -0,0 +1,291 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+'''
+Streamed uploads into the output folder.
+
+Files are copied in fixed-size chunks: each chunk is read from the request
+(Starlette has already spooled the multipart body to a temp file), hashed and
+written to `<dest>.<id>.part` on a worker thread, so neither the file nor the
+write ever sits on the event loop. Only when every file of a request is
+within the limits are the temp files renamed over their destinations
+(os.replace, atomic on the same filesystem); otherwise they are removed.
+
+A file whose content hash equals the file already stored under that name is
+reported as `unchanged` and not rewritten.
+
+Resumable uploads (UploadSessions) keep a `.part` file and its metadata under
+a session folder; a client PUTs consecutive byte ranges at the offset the
+server reports and completes the session when done, which verifies the
+optional size / sha256 and renames the part into the output folder.
+'''
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def safe_name(filename: str) -> str:
+    """Strip any directory part a client put in the filename."""
+    name = Path(filename or "").name
+    if name in ("", ".", ".."):
+        raise ValueError(f"Invalid file name: {filename!r}")
+    return name
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def same_content(path: Path, size: int, sha256: str) -> bool:
+    """True if `path` exists with this size and hash (hashes only on a size match)."""
+    return path.exists() and path.stat().st_size == size and file_sha256(path) == sha256
+
+
+@dataclass
+class StagedFile:
+    name: str
+    dest: Path
+    tmp: Path
+    size: int
+    sha256: str
+
+
+async def stage_upload(upload, dest_dir: Path, chunk_size: int, max_bytes: Optional[int],
+                       budget: Optional[int] = None) -> StagedFile:
+    """
+    Copy one UploadFile to a temp file next to its destination, hashing on the
+    fly. Raises UploadTooLarge (and removes the temp file) once the file
+    exceeds `max_bytes` or the remaining request `budget`.
+    """
+    name = safe_name(upload.filename)
+    dest = dest_dir / name
+    tmp = dest_dir / f".{name}.{uuid.uuid4().hex[:8]}.part"
+    limits = [x for x in (max_bytes, budget) if x is not None]
+    limit = min(limits) if limits else None
+    h, size = hashlib.sha256(), 0
+    fh = await asyncio.to_thread(open, tmp, "wb")
+    try:
+        while chunk := await upload.read(chunk_size):
+            size += len(chunk)
+            if limit is not None and size > limit:
+                raise UploadTooLarge(
+                    f"{name}: exceeds the {'per-file upload limit' if limit == max_bytes else 'remaining request budget'} "
+                    f"of {limit} bytes"
+                )
+            h.update(chunk)
+            await asyncio.to_thread(fh.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(fh.close)
+        tmp.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(fh.close)
+    return StagedFile(name=name, dest=dest, tmp=tmp, size=size, sha256=h.hexdigest())
+
+
+def commit_staged(staged: List[StagedFile]) -> List[Dict[str, Any]]:
+    """Rename staged files into place; identical content is left untouched."""
+    results = []
+    for f in staged:
+        if same_content(f.dest, f.size, f.sha256):
+            f.tmp.unlink(missing_ok=True)
+            status = "unchanged"
+        else:
+            os.replace(f.tmp, f.dest)
+            status = "stored"
+        results.append({"file": f.name, "size": f.size, "sha256": f.sha256, "status": status})
+    return results
+
+
+def discard_staged(staged: List[StagedFile]) -> None:
+    for f in staged:
+        f.tmp.unlink(missing_ok=True)
+
+
+# ─────────────── Resumable upload sessions ──────────────── #
+@dataclass
+class UploadSession:
+    id: str
+    filename: str
+    size: Optional[int] = None        # expected total size, if the client knows it
+    sha256: Optional[str] = None      # expected hash, verified on completion
+    offset: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def public(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "size": self.size,
+            "offset": self.offset,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class UploadSessions:
+    """
+    Sessions live on disk (<id>.part + <id>.json) so an upload survives a
+    worker restart; the running hash is kept in memory and rebuilt from the
+    part file when missing.
+    """
+
+    def __init__(self, session_dir: Path, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.session_dir = Path(session_dir)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._hashers: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _part(self, session_id: str) -> Path:
+        return self.session_dir / f"{session_id}.part"
+
+    def _meta(self, session_id: str) -> Path:
+        return self.session_dir / f"{session_id}.json"
+
+    def _save(self, session: UploadSession) -> None:
+        tmp = self._meta(session.id).with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(session.__dict__))
+        os.replace(tmp, self._meta(session.id))
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(session_id, asyncio.Lock())
+
+    def create(self, filename: str, size: Optional[int] = None, sha256: Optional[str] = None) -> UploadSession:
+        if size is not None and self.max_bytes is not None and size > self.max_bytes:
+            raise UploadTooLarge(f"{filename}: exceeds the per-file upload limit of {self.max_bytes} bytes")
+        self.prune()
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        session = UploadSession(id=uuid.uuid4().hex, filename=safe_name(filename), size=size,
+                                sha256=sha256.lower() if sha256 else None)
+        self._part(session.id).touch()
+        self._save(session)
+        self._hashers[session.id] = hashlib.sha256()
+        return session
+
+    def get(self, session_id: str) -> Optional[UploadSession]:
+        meta = self._meta(session_id)
+        if not session_id.isalnum() or not meta.exists():
+            return None
+        session = UploadSession(**json.loads(meta.read_text()))
+        # the part file is the source of truth for how much has been received
+        session.offset = self._part(session_id).stat().st_size
+        return session
+
+    async def append(self, session_id: str, offset: int, chunks, chunk_size: int) -> UploadSession:
+        """
+        Append a byte range starting at `offset`. `chunks` is an async iterator
+        (request.stream()). Raises ValueError if `offset` is not where the
+        session stopped, so the client can resume from the reported offset.
+        """
+        async with self._lock(session_id):
+            session = self.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            if offset != session.offset:
+                raise ValueError(f"Expected offset {session.offset}, got {offset}")
+            hasher = self._hashers.get(session_id)
+            if hasher is None:
+                hasher = await asyncio.to_thread(self._rehash, session_id)
+
+            limit = session.size if session.size is not None else self.max_bytes
+            part = self._part(session_id)
+            fh = await asyncio.to_thread(open, part, "ab")
+            buffered, buf = 0, []
+            try:
+                async for chunk in chunks:
+                    if limit is not None and session.offset + len(chunk) > limit:
+                        raise UploadTooLarge(f"{session.filename}: more than {limit} bytes")
+                    hasher.update(chunk)
+                    session.offset += len(chunk)
+                    buf.append(chunk)
+                    buffered += len(chunk)
+                    if buffered >= chunk_size:
+                        await asyncio.to_thread(fh.write, b"".join(buf))
+                        buf, buffered = [], 0
+                if buf:
+                    await asyncio.to_thread(fh.write, b"".join(buf))
+            except BaseException:
+                # drop the partial range so the stored offset stays consistent
+                await asyncio.to_thread(fh.close)
+                await asyncio.to_thread(os.truncate, part, offset)
+                self._hashers.pop(session_id, None)
+                raise
+            await asyncio.to_thread(fh.close)
+
+            self._hashers[session_id] = hasher
+            session.updated_at = time.time()
+            self._save(session)
+            return session
+
+    def _rehash(self, session_id: str):
+        h = hashlib.sha256()
+        with open(self._part(session_id), "rb") as fh:
+            while chunk := fh.read(1 << 20):
+                h.update(chunk)
+        return h
+
+    async def complete(self, session_id: str, dest_dir: Path) -> Dict[str, Any]:
+        """Verify size / hash and move the part file into `dest_dir`."""
+        async with self._lock(session_id):
+            session = self.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            if session.size is not None and session.offset != session.size:
+                raise ValueError(f"Incomplete upload: {session.offset} of {session.size} bytes received")
+            hasher = self._hashers.get(session_id) or await asyncio.to_thread(self._rehash, session_id)
+            digest = hasher.hexdigest()
+            if session.sha256 is not None and digest != session.sha256:
+                raise ValueError("sha256 mismatch")
+
+            dest = dest_dir / session.filename
+            part = self._part(session_id)
+            if await asyncio.to_thread(same_content, dest, session.offset, digest):
+                part.unlink(missing_ok=True)
+                status = "unchanged"
+            else:
+                # part file and output folder may be on different filesystems
+                tmp = dest_dir / f".{session.filename}.{session_id[:8]}.part"
+                await asyncio.to_thread(shutil.move, part, tmp)
+                os.replace(tmp, dest)
+                status = "stored"
+            self._forget(session_id)
+            return {"file": session.filename, "size": session.offset, "sha256": digest, "status": status}
+
+    def abort(self, session_id: str) -> bool:
+        if self.get(session_id) is None:
+            return False
+        self._part(session_id).unlink(missing_ok=True)
+        self._forget(session_id)
+        return True
+
+    def _forget(self, session_id: str) -> None:
+        self._meta(session_id).unlink(missing_ok=True)
+        self._hashers.pop(session_id, None)
+        self._locks.pop(session_id, None)
+
+    def prune(self) -> int:
+        """Remove sessions untouched for longer than ttl_seconds."""
+        if self.ttl_seconds is None or not self.session_dir.exists():
+            return 0
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        for meta in self.session_dir.glob("*.json"):
+            if meta.stat().st_mtime < cutoff and not self._lock(meta.stem).locked():
+                self.abort(meta.stem)
+                removed += 1
+        return removed
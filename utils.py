@@ -1,14 +1,25 @@
 import json
-from typing import Union, List, Dict, Any
+import time
+from typing import Union, List, Dict, Any, Optional, Sequence
+import numpy as np
 import pandas as pd
+from graphrag.callbacks.noop_query_callbacks import NoopQueryCallbacks
 from graphrag.query.structured_search.base import SearchResult
 
+import telemetry
+
+try:
+    import orjson
+except ImportError:  # optional; encode_json falls back to pandas / json
+    orjson = None
+
 def convert_response_to_string(response: Union[str, Dict[str, Any], List[Dict[str, Any]]]) -> str:
     """
     Convert a response that can be a string, dictionary, or list of dictionaries to a string.
     """
     if isinstance(response, (dict, list)):
-        return json.dumps(response)
+        # DRIFT's reduce context carries each action's context_data DataFrames
+        return json.dumps(recursively_convert(response), default=str)
     elif isinstance(response, str):
         return response
     else:
@@ -40,4 +51,149 @@ def serialize_search_result(search_result: SearchResult) -> Dict[str, Any]:
         "completion_time": search_result.completion_time,
         "llm_calls": search_result.llm_calls,
         "prompt_tokens": search_result.prompt_tokens
-    }
\ No newline at end of file
+    }
+
+class SearchStatsCallback(NoopQueryCallbacks):
+    """
+    Collects the context graphrag.api reports through query callbacks and the
+    LLM usage of the search, so responses from api.*_search /
+    api.*_search_streaming can carry the same metadata as
+    serialize_search_result.
+
+    llm_calls and prompt_tokens come from `usage` (telemetry.track_llm_usage,
+    filled by the traced search chat models). A number that was not measured
+    is None: prompt_tokens when a call reported no usage, both without `usage`.
+    """
+
+    def __init__(self, usage: Optional[telemetry.LLMUsage] = None):
+        self.start = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.context: Any = None
+        self.usage = usage
+
+    def on_context(self, context: Any) -> None:
+        self.context = context
+
+    def mark_token(self) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def metadata(self) -> Dict[str, Any]:
+        usage = self.usage
+        return {
+            "completion_time": time.perf_counter() - self.start,
+            "time_to_first_token": (
+                self.first_token_at - self.start if self.first_token_at is not None else None
+            ),
+            "llm_calls": usage.calls if usage is not None else None,
+            "prompt_tokens": usage.prompt_tokens if usage is not None and not usage.unmeasured else None,
+        }
+
+class SpanCallbacks(NoopQueryCallbacks):
+    """
+    Search progress as spans: `context` until the engine has built its context
+    (for global search: until the map phase starts), `map` for the map phase,
+    `reduce` for DRIFT's reduce.
+    """
+
+    def __init__(self):
+        self._mark = time.perf_counter()
+        self._context_done = False
+        self._reduce_start: Optional[float] = None
+
+    def _context(self) -> None:
+        if not self._context_done:
+            self._context_done = True
+            telemetry.record_span("context", time.perf_counter() - self._mark)
+
+    def on_context(self, context: Any) -> None:
+        self._context()
+
+    def on_map_response_start(self, map_response_contexts: Any) -> None:
+        self._context()
+        self._mark = time.perf_counter()
+
+    def on_map_response_end(self, map_response_outputs: Any) -> None:
+        telemetry.record_span("map", time.perf_counter() - self._mark)
+
+    def on_reduce_response_start(self, reduce_response_context: Any) -> None:
+        self._reduce_start = time.perf_counter()
+
+    def on_reduce_response_end(self, reduce_response_output: str) -> None:
+        if self._reduce_start is not None:
+            telemetry.record_span("reduce", time.perf_counter() - self._reduce_start)
+
+def search_response(response: Any, context_data: Any, stats: SearchStatsCallback) -> Dict[str, Any]:
+    """
+    Result of graphrag.api.*_search as a dict; context_data is kept as
+    DataFrames so encode_json can serialize it column-wise per request.
+    """
+    return {
+        "response": response,
+        "context_data": context_data,
+        **stats.metadata(),
+    }
+
+# ─────────────── JSON encoding ──────────────── #
+CONTEXT_FORMATS = ("records", "columns")
+
+def _json_default(obj: Any) -> Any:
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_json_default).encode()
+
+def encode_frame(df: pd.DataFrame, context_format: str = "records",
+                 columns: Optional[Sequence[str]] = None) -> bytes:
+    """
+    One DataFrame straight to JSON bytes, reading it column by column.
+
+    records: [{"col": value, ...}, ...]  (what to_dict(orient="records") gives)
+    columns: {"col": [values...], ...}   (smaller, and numeric columns are
+             written from the numpy buffer without boxing each value)
+    """
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    names = [str(c) for c in df.columns]
+    if context_format == "columns":
+        return _dumps({
+            name: (df[col].to_numpy() if df[col].dtype.kind in "iufb" else df[col].tolist())
+            for name, col in zip(names, df.columns)
+        })
+    if orjson is None:
+        return df.to_json(orient="records", date_format="iso", default_handler=str).encode()
+    values = [df[col].tolist() for col in df.columns]
+    return _dumps([dict(zip(names, row)) for row in zip(*values)])
+
+def encode_json(obj: Any, context_format: str = "records", columns: Optional[Sequence[str]] = None) -> bytes:
+    """
+    JSON bytes for a response that may contain DataFrames anywhere inside
+    dicts / lists (e.g. search context_data); replaces process_context_data +
+    JSONResponse on the search paths.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return encode_frame(obj, context_format, columns)
+    if isinstance(obj, dict):
+        return b"{" + b",".join(
+            _dumps(str(k)) + b":" + encode_json(v, context_format, columns) for k, v in obj.items()
+        ) + b"}"
+    if isinstance(obj, (list, tuple)):
+        return b"[" + b",".join(encode_json(v, context_format, columns) for v in obj) + b"]"
+    return _dumps(obj)
+
+def sse_event(event: str, data: Any, context_format: str = "records",
+              columns: Optional[Sequence[str]] = None) -> str:
+    """Format one Server-Sent-Events frame."""
+    return f"event: {event}\ndata: {encode_json(data, context_format, columns).decode()}\n\n"
+
@@ -0,0 +1,405 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from graphrag.vector_stores.base import BaseVectorStore, VectorStoreDocument, VectorStoreSearchResult
+from graphrag.vector_stores.factory import VectorStoreFactory
+
+'''
+In-process vector store over the LanceDB embedding tables.
+
+graphrag's LanceDB store scans the table on every query (no ANN index is
+built by the indexer). NumpyVectorStore converts each table once into
+output/lancedb/.numpy/<table>/<version>-<index_type>/:
+
+    vectors.npy   float32 (rows, dim), memory-mapped, shared by all workers
+    sq_norms.npy  squared L2 norm of every row
+    docs.arrow    id / text / attributes (Feather, memory-mapped)
+    ivf.npz       optional: k-means centroids and list offsets (rows are
+                  stored grouped by list so a probed list is one slice)
+    meta.json
+
+The version is a hash of the LanceDB table's files, so a re-index produces a
+new conversion and the old one is removed.
+
+Search is exact by default: one (queries x rows) matrix product, blockwise,
+ranked by squared L2 distance with score = 1 - distance, which is the order
+and score graphrag's LanceDB store returns. With index_type="ivf" only the
+`nprobe` lists nearest to the query are scanned: larger nprobe = higher
+recall, more latency; nprobe >= nlist is exact again.
+
+Selected with VECTOR_STORE_BACKEND = "numpy" in config.py; use_numpy_store()
+registers the type with graphrag and switches the loaded config over, so
+graphrag.api and graph_index.py both get it through get_embedding_store.
+The store is read-only: indexing keeps writing LanceDB.
+'''
+
+log = logging.getLogger(__name__)
+
+NUMPY_STORE_TYPE = "numpy"
+VECTOR_SUBDIR = ".numpy"
+BLOCK_ROWS = 1 << 16      # rows per matrix product in exact search
+KMEANS_ITERATIONS = 10
+KMEANS_MAX_TRAIN = 50_000  # rows sampled to train the IVF centroids
+
+
+# ─────────────── Reading LanceDB tables ──────────────── #
+def table_fingerprint(table_dir: Path) -> str:
+    """Hash of relative path, size and mtime of every file of a LanceDB table."""
+    h = hashlib.sha256()
+    for p in sorted(table_dir.rglob("*")):
+        if p.is_file():
+            st = p.stat()
+            h.update(f"{p.relative_to(table_dir)}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:16]
+
+
+def read_lance_table(db_uri: Path, name: str) -> Optional[pa.Table]:
+    """The table as Arrow, or None if it does not exist."""
+    table_dir = db_uri / f"{name}.lance"
+    if not table_dir.exists():
+        return None
+    try:
+        import lancedb
+        return lancedb.connect(str(db_uri)).open_table(name).to_arrow()
+    except Exception:
+        # a table copied without its _versions manifests: read the newest data file
+        files = sorted((table_dir / "data").glob("*.lance"), key=lambda p: p.stat().st_mtime_ns)
+        if not files:
+            raise
+        from lance.file import LanceFileReader
+        return LanceFileReader(str(files[-1].resolve())).read_all().to_table()
+
+
+def vector_matrix(column: pa.ChunkedArray) -> np.ndarray:
+    """list / fixed_size_list vector column -> contiguous float32 (rows, dim)."""
+    rows = len(column)
+    if rows == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    values = pc.list_flatten(column).to_numpy()
+    if values.size % rows:
+        raise ValueError("vectors do not all have the same dimension")
+    return np.ascontiguousarray(values.reshape(rows, values.size // rows), dtype=np.float32)
+
+
+def read_vectors(config, embedding_name: str, ids: Sequence[Any]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (vectors, found) for `ids` from the LanceDB table of `embedding_name`, read
+    in one pass instead of one search_by_id scan per id: vectors is float32
+    (len(ids), dim) aligned with `ids`, zero where `found` is False. None if
+    no LanceDB / numpy store of `config` has the table.
+    """
+    from graphrag.config.embeddings import create_collection_name
+
+    for store in config.vector_store.values():
+        if store.type not in ("lancedb", NUMPY_STORE_TYPE) or not store.db_uri:
+            continue
+        db_uri = Path(str(store.db_uri).replace("\\", "/"))
+        table = read_lance_table(db_uri, create_collection_name(store.container_name, embedding_name))
+        if table is None or table.num_rows == 0:
+            continue
+        row_of = {i: r for r, i in enumerate(table["id"].to_pylist())}
+        rows = np.fromiter((row_of.get(i, -1) for i in ids), dtype=np.int64, count=len(ids))
+        found = rows >= 0
+        stored = vector_matrix(table["vector"])
+        vectors = np.zeros((len(ids), stored.shape[1]), dtype=np.float32)
+        vectors[found] = stored[rows[found]]
+        return vectors, found
+    return None
+
+
+# ─────────────── Index ──────────────── #
+def _topk(dist: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column positions and values of the k smallest entries of each row, ascending."""
+    if k < dist.shape[1]:
+        part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(dist.shape[1]), dist.shape)
+    vals = np.take_along_axis(dist, part, axis=1)
+    order = np.argsort(vals, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(vals, order, axis=1)
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    c_norms = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(vectors), dtype=np.int64)
+    for lo in range(0, len(vectors), BLOCK_ROWS):
+        block = np.asarray(vectors[lo:lo + BLOCK_ROWS])
+        out[lo:lo + len(block)] = np.argmin(c_norms - 2.0 * block @ centroids.T, axis=1)
+    return out
+
+
+def kmeans(vectors: np.ndarray, nlist: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means on a sample of the rows; returns (nlist, dim) centroids."""
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(len(vectors), size=min(len(vectors), KMEANS_MAX_TRAIN), replace=False))
+    train = np.asarray(vectors[sample], dtype=np.float32)
+    centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest_centroid(train, centroids)
+        order = np.argsort(assign, kind="stable")
+        lists, starts = np.unique(assign[order], return_index=True)
+        sums = np.add.reduceat(train[order], starts, axis=0)
+        counts = np.diff(np.append(starts, len(order)))
+        # lists that got no rows keep their previous centroid
+        centroids[lists] = sums / counts[:, None]
+    return centroids
+
+
+class VectorIndex:
+    """One converted table, opened read-only."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta = json.loads((path / "meta.json").read_text())
+        self.vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        self.sq_norms = np.load(path / "sq_norms.npy")
+        docs = feather.read_table(path / "docs.arrow", memory_map=True)
+        self.ids: List[Any] = docs["id"].to_pylist()
+        self.text = docs["text"]
+        self.attributes = docs["attributes"]
+        self.row_of = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.centroids = self.offsets = None
+        if (path / "ivf.npz").exists():
+            with np.load(path / "ivf.npz") as ivf:
+                self.centroids, self.offsets = ivf["centroids"], ivf["offsets"]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    @classmethod
+    def build(cls, table: pa.Table, path: Path, nlist: int = 0,
+              settings: Optional[Dict[str, Any]] = None) -> "VectorIndex":
+        """Write a table's conversion to `path` (atomically) and open it."""
+        vectors = vector_matrix(table["vector"])
+        docs = table.select(["id", "text", "attributes"])
+        centroids = None
+        if nlist:
+            centroids = kmeans(vectors, nlist)
+            assign = _nearest_centroid(vectors, centroids)
+            order = np.argsort(assign, kind="stable")
+            vectors, docs = vectors[order], docs.take(pa.array(order))
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.mkdir(parents=True)
+        try:
+            np.save(tmp / "vectors.npy", vectors)
+            np.save(tmp / "sq_norms.npy", np.einsum("ij,ij->i", vectors, vectors))
+            feather.write_feather(docs, tmp / "docs.arrow", compression="uncompressed")
+            if centroids is not None:
+                np.savez(tmp / "ivf.npz", centroids=centroids, offsets=offsets)
+            (tmp / "meta.json").write_text(json.dumps({
+                "rows": int(vectors.shape[0]), "dim": int(vectors.shape[1]), "nlist": nlist,
+                "settings": settings or {},
+            }))
+            os.rename(tmp, path)
+        except OSError:
+            # another worker finished the same conversion first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not (path / "meta.json").exists():
+                raise
+        return cls(path)
+
+    def rows_for(self, ids: Sequence[Any]) -> np.ndarray:
+        return np.fromiter((self.row_of[i] for i in ids if i in self.row_of), dtype=np.int64)
+
+    def _distances(self, queries: np.ndarray, lo: int, hi: int) -> np.ndarray:
+        q_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        return self.sq_norms[lo:hi] - 2.0 * (queries @ self.vectors[lo:hi].T) + q_norms
+
+    def search(self, queries: np.ndarray, k: int, nprobe: Optional[int] = None,
+               rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest rows per query (squared L2). Returns (rows, distances), both
+        (queries, k'), k' = min(k, candidates). `rows` restricts the search to
+        those rows (exact); `nprobe` enables the IVF lists if the index has them,
+        where short results are padded with row -1.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        m = len(queries)
+        if rows is not None:
+            cand = self.vectors[rows]
+            q_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+            dist = self.sq_norms[rows] - 2.0 * (queries @ cand.T) + q_norms
+            pos, vals = _topk(dist, min(k, len(rows)))
+            return rows[pos], vals
+        if nprobe and self.nlist and nprobe < self.nlist:
+            return self._search_ivf(queries, k, nprobe)
+
+        best_rows = np.zeros((m, 0), dtype=np.int64)
+        best_dist = np.zeros((m, 0), dtype=np.float32)
+        for lo in range(0, len(self), BLOCK_ROWS):
+            hi = min(lo + BLOCK_ROWS, len(self))
+            pos, vals = _topk(self._distances(queries, lo, hi), min(k, hi - lo))
+            best_rows = np.concatenate([best_rows, pos + lo], axis=1)
+            best_dist = np.concatenate([best_dist, vals], axis=1)
+            if best_rows.shape[1] > k:
+                pos, best_dist = _topk(best_dist, k)
+                best_rows = np.take_along_axis(best_rows, pos, axis=1)
+        return best_rows, best_dist
+
+    def _search_ivf(self, queries: np.ndarray, k: int, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        c_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        probes, _ = _topk(c_norms - 2.0 * (queries @ self.centroids.T), nprobe)
+        k = min(k, len(self))
+        # rows -1 / distance inf where the probed lists hold fewer than k rows
+        out_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        out_dist = np.full((len(queries), k), np.inf, dtype=np.float32)
+        for qi, (q, lists) in enumerate(zip(queries, probes)):
+            cand = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists])
+            if len(cand) == 0:
+                continue
+            # probed lists are contiguous slices of the matrix
+            dist = np.concatenate([self._distances(q[None, :], self.offsets[i], self.offsets[i + 1])[0]
+                                   for i in lists])
+            pos, vals = _topk(dist[None, :], min(k, len(cand)))
+            out_rows[qi, :pos.shape[1]] = cand[pos[0]]
+            out_dist[qi, :pos.shape[1]] = vals[0]
+        return out_rows, out_dist
+
+    def document(self, row: int, vector: bool = True) -> VectorStoreDocument:
+        return VectorStoreDocument(
+            id=self.ids[row],
+            text=self.text[row].as_py(),
+            vector=self.vectors[row].tolist() if vector else None,
+            attributes=json.loads(self.attributes[row].as_py() or "{}"),
+        )
+
+
+_open_indexes: Dict[Tuple[Path, str], VectorIndex] = {}
+_open_lock = threading.Lock()
+
+
+def open_index(db_uri: Path, name: str, index_type: str = "exact", ivf_lists: Optional[int] = None,
+               ivf_min_rows: int = 0) -> Optional[VectorIndex]:
+    """
+    The converted index for table `name`, building it if the LanceDB table (or
+    the IVF settings) changed since the last conversion. Opened indexes are
+    kept per process.
+    """
+    table_dir = db_uri / f"{name}.lance"
+    if not table_dir.exists():
+        return None
+    version = table_fingerprint(table_dir)
+    base = db_uri / VECTOR_SUBDIR / name
+    path = base / f"{version}-{index_type}"
+    settings = {"index_type": index_type, "ivf_lists": ivf_lists, "ivf_min_rows": ivf_min_rows}
+    key = (path, json.dumps(settings, sort_keys=True))
+    with _open_lock:
+        if key in _open_indexes:
+            return _open_indexes[key]
+
+        meta = path / "meta.json"
+        if meta.exists() and json.loads(meta.read_text()).get("settings") == settings:
+            index = VectorIndex(path)
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+            table = read_lance_table(db_uri, name)
+            nlist = 0
+            if index_type == "ivf" and table.num_rows >= max(ivf_min_rows, 1):
+                nlist = min(ivf_lists or int(4 * np.sqrt(table.num_rows)), table.num_rows)
+            log.info("converting %s (%d rows, %d IVF lists) to %s", name, table.num_rows, nlist, path)
+            base.mkdir(parents=True, exist_ok=True)
+            index = VectorIndex.build(table, path, nlist, settings)
+
+        # conversions of older versions of the table
+        for old in base.iterdir():
+            if not old.name.startswith((version, ".")):
+                shutil.rmtree(old, ignore_errors=True)
+        for stale in [k for k in _open_indexes if k[0].parent == base and k[0] != path]:
+            del _open_indexes[stale]
+        _open_indexes[key] = index
+        return index
+
+
+# ─────────────── graphrag vector store ──────────────── #
+class NumpyVectorStore(BaseVectorStore):
+    """graphrag BaseVectorStore over a VectorIndex (see module docstring)."""
+
+    def __init__(self, index_type: str = "exact", nprobe: Optional[int] = None,
+                 ivf_lists: Optional[int] = None, ivf_min_rows: int = 0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ivf_lists = ivf_lists
+        self.ivf_min_rows = ivf_min_rows
+
+    def connect(self, **kwargs: Any) -> None:
+        # settings.yaml may carry a Windows path (output\lancedb)
+        db_uri = Path(str(kwargs["db_uri"]).replace("\\", "/"))
+        self.document_collection = open_index(
+            db_uri, self.collection_name, self.index_type, self.ivf_lists, self.ivf_min_rows
+        )
+        if self.document_collection is None:
+            log.warning("vector table %s not found under %s", self.collection_name, db_uri)
+
+    def load_documents(self, documents: List[VectorStoreDocument], overwrite: bool = True) -> None:
+        raise NotImplementedError("NumpyVectorStore is read-only; indexing writes the LanceDB tables it is built from")
+
+    def filter_by_id(self, include_ids: List[str] | List[int]) -> Any:
+        if len(include_ids) == 0 or self.document_collection is None:
+            self.query_filter = None
+        else:
+            self.query_filter = self.document_collection.rows_for(include_ids)
+        return self.query_filter
+
+    def search_batch(self, query_embeddings: Sequence[Sequence[float]], k: int = 10) -> List[List[VectorStoreSearchResult]]:
+        """similarity_search_by_vector for many queries in one matrix product."""
+        index = self.document_collection
+        if index is None or len(index) == 0 or len(query_embeddings) == 0:
+            return [[] for _ in query_embeddings]
+        if self.query_filter is not None and len(self.query_filter) == 0:
+            return [[] for _ in query_embeddings]
+        rows, dist = index.search(np.asarray(query_embeddings, dtype=np.float32), k,
+                                  nprobe=self.nprobe, rows=self.query_filter)
+        return [
+            [VectorStoreSearchResult(document=index.document(int(r)), score=1 - abs(float(d)))
+             for r, d in zip(row_ids, dists) if r >= 0]
+            for row_ids, dists in zip(rows, dist)
+        ]
+
+    def similarity_search_by_vector(self, query_embedding: List[float], k: int = 10,
+                                    **kwargs: Any) -> List[VectorStoreSearchResult]:
+        return self.search_batch([query_embedding], k)[0]
+
+    def similarity_search_by_text(self, text: str, text_embedder, k: int = 10,
+                                  **kwargs: Any) -> List[VectorStoreSearchResult]:
+        query_embedding = text_embedder(text)
+        if query_embedding:
+            return self.similarity_search_by_vector(query_embedding, k)
+        return []
+
+    def search_by_id(self, id: str) -> VectorStoreDocument:
+        index = self.document_collection
+        if index is not None and id in index.row_of:
+            return index.document(index.row_of[id])
+        return VectorStoreDocument(id=id, text=None, vector=None)
+
+
+def use_numpy_store(config, index_type: str = "exact", nprobe: Optional[int] = None,
+                    ivf_lists: Optional[int] = None, ivf_min_rows: int = 0) -> None:
+    """Register NumpyVectorStore and point every LanceDB store of `config` at it."""
+    VectorStoreFactory.register(NUMPY_STORE_TYPE, functools.partial(
+        NumpyVectorStore, index_type=index_type, nprobe=nprobe,
+        ivf_lists=ivf_lists, ivf_min_rows=ivf_min_rows,
+    ))
+    for store in config.vector_store.values():
+        if store.type == "lancedb":
+            store.type = NUMPY_STORE_TYPE